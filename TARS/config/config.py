@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 
 # Load secrets from .env
 load_dotenv()
@@ -42,6 +42,189 @@ class GoogleAISettings(BaseConfig):
 
 class GraphConfig(BaseConfig):
     agent_model_name: Optional[str] = "anthropic"
+    # Models built and bound to tools at startup, as providers or "provider:model"
+    # (e.g. ["anthropic", "openai:gpt-4o-mini"]); defaults to agent_model_name
+    model_pool: List[str] = []
+    # Models a request may pick with model_name; defaults to agent_model_name and model_pool
+    requestable_models: List[str] = []
+    # Prompt token budget per model provider before older turns are summarized
+    context_token_budgets: Dict[str, int] = {"anthropic": 100_000, "openai": 64_000, "google": 200_000}
+    context_default_token_budget: int = 32_000
+    context_keep_recent_turns: int = 4
+    # Per-turn budget for the agent <-> tools loop; once spent, the agent answers with what it has
+    agent_deadline_seconds: Optional[float] = 90.0
+    agent_max_steps: int = 8  # model calls that request tools
+    agent_max_tokens: Optional[int] = 60_000  # total tokens reported by the model across the turn
+    agent_finalize_seconds: float = 15.0  # time allowed for the final answer once the budget is spent
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class StorageSettings(BaseConfig):
+    data_dir: str = ".tars"  # local state shared by the API, Slack and web processes
+
+    model_config = SettingsConfigDict(env_prefix="TARS_", env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class CheckpointSettings(BaseConfig):
+    checkpoint_enabled: bool = True
+    checkpoint_db_file: str = "checkpoints.sqlite"
+    checkpoint_hot_threads: int = 256  # threads kept in the in-memory tier
+    checkpoint_memory_idle_seconds: float = 900.0  # drop idle threads from memory
+    checkpoint_retention_seconds: float = 7 * 24 * 3600.0  # purge idle threads from disk
+    checkpoint_history_per_thread: int = 3  # checkpoints retained per thread
+    checkpoint_max_messages: int = 200  # per-thread message cap (0 disables)
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class ToolSettings(BaseConfig):
+    # Tools declared in graphs/utils/tools.py that the agent loads and binds
+    tools_enabled: List[str] = ["tavily_search_results_json", "youtube_search"]
+    tool_max_concurrency: int = 8  # concurrent tool calls per process
+    tool_default_timeout_seconds: float = 30.0
+    # Overrides of the per-tool metadata declared in graphs/utils/tools.py
+    tool_timeouts: Dict[str, float] = {}
+    tool_concurrency_limits: Dict[str, int] = {}
+    # Result cache for read-only tools; only tools with a TTL (seconds) are cached
+    tool_cache_enabled: bool = True
+    tool_cache_ttls: Dict[str, float] = {}
+    # Tools that change external state are never cached (in addition to the declared ones)
+    tool_side_effecting: List[str] = []
+    tool_cache_max_entries: int = 1024
+    tool_cache_max_bytes: int = 32 * 1024 * 1024
+    tool_cache_disk_enabled: bool = False
+    tool_cache_disk_file: str = "tool_cache.sqlite"
+    # Bind only the tools relevant to the turn once more than top_k tools are enabled
+    tool_selection_enabled: bool = True
+    tool_selection_top_k: int = 4
+    tool_selection_always_include: List[str] = []
+    tool_selection_history_messages: int = 3  # recent user messages scored against tools
+    tool_selection_min_relative_score: float = 0.4  # drop tools scoring below this share of the best
+    # Hint words indexed with each tool, in addition to the declared ones
+    tool_selection_keywords: Dict[str, List[str]] = {}
+    tool_selection_embeddings_enabled: bool = False  # blend in similarity over tool descriptions
+    tool_selection_embedding_model: str = "text-embedding-3-small"
+    # Cap on the tokens each tool result adds to the prompt; larger results are shrunk
+    tool_output_governor_enabled: bool = True
+    tool_output_max_tokens: int = 2000  # default cap (0: unlimited)
+    tool_output_token_caps: Dict[str, int] = {}  # per-tool overrides of the declared caps
+    tool_output_item_chars: int = 400  # long fields of each result item are cut to this length
+    tool_output_summarize_enabled: bool = False  # rewrite over-cap results with a cheap model instead
+    tool_output_summary_model_name: str = "openai:gpt-4o-mini"
+    tool_output_summary_timeout_seconds: float = 15.0
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class LLMCacheSettings(BaseConfig):
+    llm_cache_enabled: bool = False  # opt-in exact-match cache of model responses
+    llm_cache_backend: str = "memory"  # "memory" or "sqlite"
+    llm_cache_db_file: str = "llm_cache.sqlite"
+    llm_cache_max_entries: int = 2048
+    llm_cache_max_temperature: float = 0.0  # calls above this temperature bypass the cache
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class RateLimitSettings(BaseConfig):
+    rate_limit_enabled: bool = False  # opt-in; enable once RATE_LIMITS matches your API key's tier
+    rate_limit_db_file: str = "rate_limits.sqlite"  # shared by the API, Slack and web processes
+    # Client-side budgets per provider, from your provider's rate limits page, e.g.
+    # {"anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40000}}; providers not listed are not limited
+    rate_limits: Dict[str, Dict[str, float]] = {}
+    rate_limit_output_token_estimate: int = 1024  # reserved per call until actual usage is known
+    rate_limit_max_wait_seconds: float = 60.0  # queue up to this long (or until the request's deadline), then fail
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class CircuitBreakerSettings(BaseConfig):
+    circuit_breaker_enabled: bool = True
+    circuit_failure_threshold: int = 5  # consecutive failures before a breaker opens
+    circuit_recovery_seconds: float = 30.0  # how long an open breaker refuses calls
+    circuit_half_open_max_calls: int = 1  # probe calls allowed once recovery elapses
+    circuit_fallback_model_name: Optional[str] = "openai"  # used while the requested provider is open
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class HedgeSettings(BaseConfig):
+    hedge_enabled: bool = False  # opt-in; hedged requests can double provider spend
+    hedge_secondary_model_name: str = "openai"  # provider or "provider:model"
+    hedge_percentile: float = 95.0  # primary time-to-first-token percentile used as the delay
+    hedge_initial_delay_seconds: float = 2.0  # delay until enough samples are collected
+    hedge_min_delay_seconds: float = 0.5
+    hedge_max_delay_seconds: float = 10.0
+    hedge_window_size: int = 200
+    hedge_min_samples: int = 20
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class SemanticCacheSettings(BaseConfig):
+    semantic_cache_enabled: bool = False  # opt-in; embeds every cacheable question
+    semantic_cache_embedding_model: str = "text-embedding-3-small"
+    semantic_cache_threshold: float = 0.92  # minimum cosine similarity for a hit
+    semantic_cache_ttl_seconds: float = 3600.0  # upper bound; tool TTLs can shorten it
+    semantic_cache_max_entries_per_user: int = 256
+    semantic_cache_min_words: int = 3
+    # Tools that change state, mapped to the tools whose cached answers they invalidate
+    semantic_cache_invalidated_by: Dict[str, List[str]] = {
+        "handle_all_unread_gmail": ["fetch_emails_by_sender_name"],
+    }
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class RouterSettings(BaseConfig):
+    router_enabled: bool = True  # send trivial turns to a tool-free fast path
+    router_fast_model_name: Optional[str] = None  # provider or "provider:model"; defaults to agent_model_name
+    router_classifier_enabled: bool = False  # ask the fast model when the heuristics are unsure
+    router_max_fast_words: int = 12  # longer messages always go to the agent
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class WarmupSettings(BaseConfig):
+    warmup_enabled: bool = True  # warm models and the graph before reporting ready
+    warmup_ping_models: bool = True  # one tiny request per pooled model to open its connection pool
+    warmup_graph_enabled: bool = True  # dry-run the graph up to the first model call
+    warmup_timeout_seconds: float = 60.0  # report ready after this long even if warmup is unfinished
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class RunIndexSettings(BaseConfig):
+    run_index_backend: str = "sqlite"  # "sqlite" (shared by every worker on the host) or "memory"
+    run_index_db_file: str = "runs.sqlite"
+    run_index_max_entries: int = 4096  # runs kept in the in-memory tier
+    run_index_ttl_seconds: float = 7 * 24 * 3600.0  # how long a run can still receive feedback
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class FeedbackSettings(BaseConfig):
+    feedback_queue_enabled: bool = True  # spool feedback and send it in the background (else inline)
+    feedback_spool_file: str = "feedback.sqlite"  # shared by every worker on the host
+    feedback_batch_size: int = 20
+    feedback_flush_interval_seconds: float = 2.0
+    feedback_max_attempts: int = 8  # then the item is dropped
+    feedback_retry_base_seconds: float = 2.0  # doubled after each failed attempt
+    feedback_retry_max_seconds: float = 300.0
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
+class EventSinkSettings(BaseConfig):
+    event_sink_enabled: bool = True  # buffer user events and write them to JSONL files
+    event_sink_dir: str = "events"  # under the data dir; one file series per process
+    event_sink_max_file_bytes: int = 64 * 1024 * 1024  # start a new file past this size
+    event_sink_buffer_size: int = 10_000  # events held in memory before the overflow policy applies
+    event_sink_batch_size: int = 500
+    event_sink_flush_interval_seconds: float = 1.0
+    event_sink_overflow: str = "drop_newest"  # "drop_newest", "drop_oldest" or "block" (drops instead on an event loop)
+    event_sink_block_timeout_seconds: float = 0.05  # longest a "block" emit waits for room
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -53,14 +236,50 @@ class GitHubOAuthSettings(BaseConfig):
     model_config = SettingsConfigDict(env_prefix="GITHUB_", env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 
+class GitHubAPISettings(BaseConfig):
+    # Users whose tokens may use /chat_github
+    allowed_users: List[str] = ["gpsandhu23", "gsandhu_adobe"]
+    api_timeout_seconds: float = 10.0
+    api_max_connections: int = 20  # shared keep-alive pool for outbound GitHub calls
+    copilot_read_timeout_seconds: float = 120.0  # longest pause allowed between streamed Copilot chunks
+    # Verified tokens (keyed by hash) skip the GitHub round-trip until their entry expires
+    token_cache_ttl_seconds: float = 300.0
+    token_negative_cache_ttl_seconds: float = 60.0  # for tokens GitHub rejected
+    token_cache_max_entries: int = 1024
+
+    model_config = SettingsConfigDict(env_prefix="GITHUB_", env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+
 # Initialize the chat models based on settings
 openai_settings = OpenAISettings()
 anthropic_settings = AnthropicSettings()
 google_ai_settings = GoogleAISettings()
 graph_config = GraphConfig()
 
+# Initialize local storage and conversation checkpoint settings
+storage_settings = StorageSettings()
+checkpoint_settings = CheckpointSettings()
+
+# Initialize tool execution settings
+tool_settings = ToolSettings()
+
+# Initialize LLM response cache settings
+llm_cache_settings = LLMCacheSettings()
+hedge_settings = HedgeSettings()
+circuit_breaker_settings = CircuitBreakerSettings()
+rate_limit_settings = RateLimitSettings()
+semantic_cache_settings = SemanticCacheSettings()
+router_settings = RouterSettings()
+warmup_settings = WarmupSettings()
+
+# Initialize feedback correlation settings
+run_index_settings = RunIndexSettings()
+feedback_settings = FeedbackSettings()
+event_sink_settings = EventSinkSettings()
+
 # Initialize Slack settings
 slack_settings = SlackSettings()
 
 # Initialize GitHub OAuth settings
 github_oauth_settings = GitHubOAuthSettings()
+github_api_settings = GitHubAPISettings()
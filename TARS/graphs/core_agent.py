@@ -1,15 +1,34 @@
 from datetime import datetime
-from typing import Generator, Tuple
+from typing import AsyncGenerator, Generator, Optional
+import asyncio
 import logging
+import threading
+import time
+import uuid
 
-from TARS.config.config import GraphConfig
+from TARS.config.config import GraphConfig, router_settings, semantic_cache_settings, warmup_settings
 from TARS.graphs.utils.nodes import (
-    call_model,
+    after_tools,
+    agent_node,
+    aping_models,
+    context_node,
+    fast_node,
+    finalize_node,
+    ping_models,
+    router_node,
+    select_route,
     should_continue,
     tool_node,
+    warm_models,
 )
+from TARS.graphs.utils.budget import BUDGET_EXHAUSTED, budget_config, recursion_limit
+from TARS.graphs.utils.checkpointer import build_checkpointer
+from TARS.graphs.utils.events import AgentEvent, AgentEventTranslator
 from TARS.graphs.utils.state import AgentState
+from TARS.graphs.utils.warmup import WarmupStatus
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 
 # Setup logging
@@ -20,41 +39,292 @@ workflow = StateGraph(AgentState, config_schema=GraphConfig)
 
 # Define the nodes
 # workflow.add_node("load_memory", load_memory)
-workflow.add_node("agent", call_model)
+workflow.add_node("context", context_node)
+workflow.add_node("router", router_node)
+workflow.add_node("fast_reply", fast_node)
+workflow.add_node("agent", agent_node)
 workflow.add_node("action", tool_node)
+workflow.add_node("finalize", finalize_node)
 
-# Set the entrypoint as 'agent'
-workflow.set_entry_point("agent")
+# Set the entrypoint as 'context', which keeps the prompt within budget before 'router'
+workflow.set_entry_point("context")
+workflow.add_edge("context", "router")
 
+# Trivial turns skip the tool-bound agent and are answered in one shot
+workflow.add_conditional_edges(
+    "router",
+    select_route,
+    {
+        "fast": "fast_reply",
+        "agent": "agent",
+    },
+)
+
+# Add conditional edges; fast_reply only calls tools if it fell back to the agent
+for node in ("agent", "fast_reply"):
+    workflow.add_conditional_edges(
+        node,
+        should_continue,
+        {
+            "continue": "action",
+            "finalize": "finalize",
+            "end": END,
+        },
+    )
 
-# Add conditional edges
+# Back from 'action' to 'agent', unless the request's budget is spent
 workflow.add_conditional_edges(
-    "agent",
-    should_continue,
+    "action",
+    after_tools,
     {
-        "continue": "action",
-        "end": END,
+        "agent": "agent",
+        "finalize": "finalize",
     },
 )
 
-# Add edge from 'action' to 'agent'
-workflow.add_edge("action", "agent")
+# Once the budget is spent, the best answer so far ends the turn
+workflow.add_edge("finalize", END)
 
-# Compile the graph without custom checkpointer
-graph = workflow.compile()
+# Compile the graph with the shared SQLite/LRU checkpointer so thread_id resumes conversations
+graph = workflow.compile(checkpointer=build_checkpointer())
 logger.info("Core agent graph compiled successfully")
 
 
-def run_core_agent(user_name: str, message: str) -> Generator:
+# Stream incremental node updates plus model tokens; never full state snapshots
+STREAM_MODES = ["updates", "messages"]
+
+# Per-user cache of final answers to near-identical questions (None when disabled);
+# imported only when enabled, as it loads numpy and the embeddings client
+semantic_cache = None
+if semantic_cache_settings.semantic_cache_enabled:
+    from TARS.graphs.utils.semantic_cache import build_semantic_cache
+
+    semantic_cache = build_semantic_cache()
+
+
+# Startup warmup progress; the API reports ready only once it is done
+warmup_status = WarmupStatus(warmup_settings.warmup_timeout_seconds)
+
+# A trivial turn, which the router sends to the fast path without a model call
+WARMUP_INPUT = {"messages": [HumanMessage(content="hi")]}
+WARMUP_CONFIG: RunnableConfig = {"configurable": {"thread_id": "__warmup__"}}
+
+
+def _build_warmup_graph():
+    """
+    The agent graph with an in-memory checkpointer, interrupted before any
+    model call, so a dry run exercises context budgeting, routing and the
+    graph runtime without calling a provider or writing conversation state.
+    """
+    return workflow.compile(checkpointer=MemorySaver(), interrupt_before=["agent", "fast_reply"])
+
+
+def _ping_targets(warmed):
+    """The warmed model pool, plus the fast-path model if it is separate."""
+    targets = list(warmed)
+    fast_model = router_settings.router_fast_model_name
+    if router_settings.router_enabled and fast_model and fast_model not in targets:
+        targets.append(fast_model)
+    return targets
+
+
+def warm_up() -> None:
+    """
+    Warm this process before it takes traffic: build and bind the model
+    pool, dry-run the graph, read from the checkpointer and open each
+    model's connection pool. Every step is best-effort; warmup_status
+    records how long each took and whether it failed.
+    """
+    if not warmup_status.begin():
+        return
+    try:
+        if not warmup_settings.warmup_enabled:
+            return
+        warmed = []
+        with warmup_status.step("models"):
+            warmed = warm_models()
+        if warmup_settings.warmup_graph_enabled:
+            with warmup_status.step("graph"):
+                _build_warmup_graph().invoke(WARMUP_INPUT, WARMUP_CONFIG)
+        with warmup_status.step("checkpointer"):
+            graph.get_state(WARMUP_CONFIG)
+        if warmup_settings.warmup_ping_models:
+            with warmup_status.step("connections"):
+                ping_models(_ping_targets(warmed))
+    finally:
+        warmup_status.finish()
+
+
+async def awarm_up() -> None:
+    """
+    Async counterpart of warm_up, for async surfaces. Run it on the event
+    loop that serves requests: async clients pool connections per loop.
+    """
+    if not warmup_status.begin():
+        return
+    try:
+        if not warmup_settings.warmup_enabled:
+            return
+        warmed = []
+        with warmup_status.step("models"):
+            warmed = await asyncio.to_thread(warm_models)
+        if warmup_settings.warmup_graph_enabled:
+            with warmup_status.step("graph"):
+                await _build_warmup_graph().ainvoke(WARMUP_INPUT, WARMUP_CONFIG)
+        with warmup_status.step("checkpointer"):
+            await graph.aget_state(WARMUP_CONFIG)
+        if warmup_settings.warmup_ping_models:
+            with warmup_status.step("connections"):
+                await aping_models(_ping_targets(warmed))
+    finally:
+        warmup_status.finish()
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Run warm_up on a background thread so startup is not blocked.
+
+    Returns:
+        threading.Thread: The (daemon) warmup thread.
+    """
+    thread = threading.Thread(target=warm_up, name="tars-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# Placeholder names surfaces use when they do not know the user (API default, failed Slack lookup)
+ANONYMOUS_USER_NAMES = frozenset({"", "Unknown", "Unknown User"})
+ANONYMOUS_THREAD_PREFIX = "anonymous-"
+
+
+def is_anonymous(user_name: str) -> bool:
+    """True if user_name does not identify a user, so nothing may be shared across its requests."""
+    return user_name.strip() in ANONYMOUS_USER_NAMES
+
+
+def _thread_id(user_name: str) -> str:
+    """The user's conversation thread; anonymous requests each get a throwaway one."""
+    if is_anonymous(user_name):
+        return f"{ANONYMOUS_THREAD_PREFIX}{uuid.uuid4()}"
+    return user_name
+
+
+def _forget_anonymous_thread(config: RunnableConfig) -> None:
+    """Delete the checkpoints of an anonymous request's throwaway thread."""
+    thread_id = config["configurable"]["thread_id"]
+    if graph.checkpointer is None or not thread_id.startswith(ANONYMOUS_THREAD_PREFIX):
+        return
+    try:
+        graph.checkpointer.delete_thread(thread_id)
+    except Exception as e:
+        logger.warning(f"Deleting anonymous thread {thread_id} failed: {e}")
+
+
+def _run_config(
+    user_name: str, model_name: Optional[str], deadline_seconds: Optional[float] = None
+) -> RunnableConfig:
+    """
+    Build the run config: the user's thread, the requested model if any, and
+    the turn's deadline and step and token budgets.
+    """
+    configurable = {"thread_id": _thread_id(user_name), **budget_config(deadline_seconds)}
+    if model_name:
+        configurable["model_name"] = model_name
+    return {"configurable": configurable, "recursion_limit": recursion_limit(configurable["max_steps"])}
+
+
+def _opens_conversation(config: RunnableConfig) -> bool:
+    """True if the thread holds no earlier turns, so the question cannot lean on them."""
+    values = graph.get_state(config).values or {}
+    return not values.get("messages") and not values.get("summary")
+
+
+def _semantic_lookup(user_name: str, message: str, config: RunnableConfig):
+    """
+    Look the question up in the semantic cache; failures count as a miss.
+
+    Only a question that opens a conversation is looked up: a follow-up such
+    as "what about the second one" depends on the turns before it. Anonymous
+    requests and follow-ups neither read nor (without a vector) write the cache.
+    """
+    if semantic_cache is None or is_anonymous(user_name):
+        return None, None
+    try:
+        if not _opens_conversation(config):
+            return None, None
+        return semantic_cache.lookup(user_name, message)
+    except Exception as e:
+        logger.error(f"Semantic cache lookup failed: {str(e)}", exc_info=True)
+        return None, None
+
+
+def _cached_turn(message: str, answer: str):
+    """The state update that records a turn answered from the semantic cache."""
+    return {"messages": [HumanMessage(content=message), AIMessage(content=answer)]}
+
+
+class _RunRecorder:
+    """Track the tools and final answer of a run so the answer can be cached."""
+
+    def __init__(self, user_name: str, message: str, vector):
+        self.user_name = user_name
+        self.message = message
+        self.vector = vector
+        self.started_at = time.perf_counter()
+        self.tools = set()
+        self.answer = None
+        self.failed = False
+
+    def observe(self, event: AgentEvent) -> None:
+        if semantic_cache is None:
+            return
+        if event.type == "tool_end":
+            self.tools.add(event.tool_name)
+            self.failed = self.failed or event.status == "error"
+            semantic_cache.notify_tool_run(self.user_name, event.tool_name)
+        elif event.type == "final_answer":
+            self.answer = event.content
+            # An answer cut short by the deadline or step budget must not be served again
+            self.failed = self.failed or event.status == BUDGET_EXHAUSTED
+        elif event.type == "error":
+            self.failed = True
+
+    def store(self) -> None:
+        if semantic_cache is None or self.vector is None or self.failed or not self.answer:
+            return
+        try:
+            semantic_cache.store(
+                self.user_name,
+                self.message,
+                self.answer,
+                tools_used=self.tools,
+                run_ms=(time.perf_counter() - self.started_at) * 1000,
+                vector=self.vector,
+            )
+        except Exception as e:
+            logger.error(f"Semantic cache store failed: {str(e)}", exc_info=True)
+
+
+def run_core_agent(
+    user_name: str,
+    message: str,
+    model_name: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+) -> Generator[AgentEvent, None, None]:
     """
     Run the core agent with the given user name and message.
 
     Args:
         user_name (str): The name of the user
         message (str): The message from the user
+        model_name (str, optional): The model to answer with, as a provider
+            ("openai") or "provider:model"; defaults to GraphConfig.agent_model_name
+        deadline_seconds (float, optional): Time allowed for the turn; defaults
+            to GraphConfig.agent_deadline_seconds
 
     Yields:
-        The content of the agent's response.
+        AgentEvent: Typed events (user_echo, model_delta, tool_start, tool_end,
+        final_answer, error) with timings, in the order they happen.
     """
     logger.info(f"=== CORE AGENT START ===")
     logger.info(f"Input - user_name: {user_name}, message: {message}")
@@ -69,42 +339,120 @@ def run_core_agent(user_name: str, message: str) -> Generator:
     
     try:
         logger.info("Inside run_core_agent try block")
-        config: RunnableConfig = {"configurable": {"thread_id": user_name}}
+        config: RunnableConfig = _run_config(user_name, model_name, deadline_seconds)
         logger.info(f"Created config: {config}")
         
         def response_generator():
+            translator = AgentEventTranslator()
+            yield translator.user_echo(message)
             try:
+                vector, hit = _semantic_lookup(user_name, message, config)
+                if hit is not None:
+                    # Keep the thread's memory consistent with what the user saw
+                    graph.update_state(config, _cached_turn(message, hit.answer), as_node="agent")
+                    yield translator.event("final_answer", content=hit.answer, cached=True)
+                    logger.info("=== CORE AGENT SUCCESS (semantic cache) ===")
+                    return
+                recorder = _RunRecorder(user_name, message, vector)
+
                 logger.info("Starting graph stream...")
                 events = graph.stream(
-                    {"messages": [("user", message)]}, config=config, stream_mode="values"
+                    {"messages": [("user", message)]}, config=config, stream_mode=STREAM_MODES
                 )
                 logger.info("Successfully started graph stream")
 
-                event_count = 0
-                for event in events:
-                    event_count += 1
-                    logger.info(f"Processing event #{event_count}: {event}")
-                    
-                    if "messages" in event and event["messages"]:
-                        last_message = event["messages"][-1]
-                        logger.info(f"Extracting content from message: {last_message}")
-                        content = last_message.content
-                        logger.info(f"Yielding content: '{content}'")
-                        yield content
-                    else:
-                        logger.warning(f"Event #{event_count} has no messages or empty messages: {event}")
-
-                logger.info(f"Completed processing {event_count} events")
+                for mode, chunk in events:
+                    for event in translator.translate(mode, chunk):
+                        if event.type != "model_delta":
+                            logger.info(f"Agent event: {event.type} ({event.elapsed_ms} ms)")
+                        recorder.observe(event)
+                        yield event
+
+                recorder.store()
                 logger.info("=== CORE AGENT SUCCESS ===")
             except Exception as e:
                 logger.error(f"Error in run_core_agent: {str(e)}", exc_info=True)
                 logger.info("=== CORE AGENT ERROR ===")
-                yield f"An error occurred in the core agent: {str(e)}"
+                yield translator.error(f"An error occurred in the core agent: {str(e)}")
+            finally:
+                _forget_anonymous_thread(config)
 
         return response_generator()
     except Exception as e:
         logger.error(f"Error in run_core_agent setup: {str(e)}", exc_info=True)
         logger.info("=== CORE AGENT SETUP ERROR ===")
         def error_generator():
-            yield f"An error occurred in the core agent setup: {str(e)}"
+            yield AgentEvent(type="error", content=f"An error occurred in the core agent setup: {str(e)}")
         return error_generator()
+
+
+def arun_core_agent(
+    user_name: str,
+    message: str,
+    model_name: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+) -> AsyncGenerator[AgentEvent, None]:
+    """
+    Run the core agent asynchronously with the given user name and message.
+
+    This is the non-blocking counterpart of run_core_agent, backed by
+    graph.astream so async surfaces do not stall their event loop while the
+    model and tools are running.
+
+    Args:
+        user_name (str): The name of the user
+        message (str): The message from the user
+        model_name (str, optional): The model to answer with, as a provider
+            ("openai") or "provider:model"; defaults to GraphConfig.agent_model_name
+        deadline_seconds (float, optional): Time allowed for the turn; defaults
+            to GraphConfig.agent_deadline_seconds
+
+    Yields:
+        AgentEvent: The same typed events as run_core_agent.
+    """
+    logger.info(f"=== ASYNC CORE AGENT START ===")
+    logger.info(f"Input - user_name: {user_name}, message: {message}")
+
+    if user_name is None:
+        logger.error("Invalid input: user_name is None")
+        raise ValueError("Invalid input: user_name is None")
+
+    if message is None:
+        logger.error("Invalid input: message is None")
+        raise ValueError("Invalid input: message is None")
+
+    config: RunnableConfig = _run_config(user_name, model_name, deadline_seconds)
+    logger.info(f"Created config: {config}")
+
+    async def response_generator():
+        translator = AgentEventTranslator()
+        yield translator.user_echo(message)
+        try:
+            vector, hit = await asyncio.to_thread(_semantic_lookup, user_name, message, config)
+            if hit is not None:
+                await graph.aupdate_state(config, _cached_turn(message, hit.answer), as_node="agent")
+                yield translator.event("final_answer", content=hit.answer, cached=True)
+                logger.info("=== ASYNC CORE AGENT SUCCESS (semantic cache) ===")
+                return
+            recorder = _RunRecorder(user_name, message, vector)
+
+            logger.info("Starting async graph stream...")
+            async for mode, chunk in graph.astream(
+                {"messages": [("user", message)]}, config=config, stream_mode=STREAM_MODES
+            ):
+                for event in translator.translate(mode, chunk):
+                    if event.type != "model_delta":
+                        logger.info(f"Agent event: {event.type} ({event.elapsed_ms} ms)")
+                    recorder.observe(event)
+                    yield event
+
+            recorder.store()
+            logger.info("=== ASYNC CORE AGENT SUCCESS ===")
+        except Exception as e:
+            logger.error(f"Error in arun_core_agent: {str(e)}", exc_info=True)
+            logger.info("=== ASYNC CORE AGENT ERROR ===")
+            yield translator.error(f"An error occurred in the core agent: {str(e)}")
+        finally:
+            await asyncio.to_thread(_forget_anonymous_thread, config)
+
+    return response_generator()
@@ -6,14 +6,10 @@ import re
 import sys
 import time
 
-import requests
 from dotenv import load_dotenv
 from langchain.agents import tool
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from openai import OpenAI
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+from TARS.graphs.utils.context import count_text_tokens
+from TARS.graphs.utils.rate_limiter import rate_limiter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -103,13 +99,24 @@ def ai_gmail_handler(classifier_input):
     Returns:
         dict: A dictionary containing the processed information of the email.
     """
+    # Client libraries are imported on first use so loading the tools stays cheap
+    from langchain.chat_models import ChatOpenAI
+    from langchain.prompts import ChatPromptTemplate
+
     try:
         prompt = ChatPromptTemplate.from_messages([("human", "{input}")])
         model = ChatOpenAI(model="gpt-4-1106-preview", temperature=0).bind(
             functions=handle_message_schema
         )
         runnable = prompt | model
+        # Share the OpenAI rate limit with the agent and the other TARS processes
+        reserved = count_text_tokens(classifier_input) + 1024
+        if rate_limiter is not None:
+            rate_limiter.acquire("openai", reserved)
         message_action = runnable.invoke({"input": classifier_input})
+        if rate_limiter is not None:
+            usage = getattr(message_action, "usage_metadata", None) or {}
+            rate_limiter.settle("openai", reserved, usage.get("total_tokens"))
         content = message_action.content
         function_call = message_action.additional_kwargs.get("function_call")
 
@@ -281,6 +288,9 @@ def read_image_tool(image_path: str, prompt: str) -> str:
     Returns:
         str: The response from the model providing the requested insight.
     """
+    import requests
+    from openai import OpenAI
+
     try:
         client = OpenAI()
         slack_token = os.environ.get("SLACK_BOT_TOKEN")
@@ -306,6 +316,10 @@ def read_image_tool(image_path: str, prompt: str) -> str:
         else:
             content_block = {"type": "image_url", "image_url": {"url": image_path}}
 
+        # Prompt, image (about 1k tokens at high detail) and max_tokens of output
+        reserved = count_text_tokens(prompt) + 1000 + 900
+        if rate_limiter is not None:
+            rate_limiter.acquire("openai", reserved)
         response = client.chat.completions.create(
             model="gpt-4-vision-preview",
             messages=[
@@ -316,6 +330,8 @@ def read_image_tool(image_path: str, prompt: str) -> str:
             ],
             max_tokens=900,
         )
+        if rate_limiter is not None and response.usage is not None:
+            rate_limiter.settle("openai", reserved, response.usage.total_tokens)
 
         return response.choices[0].message.content
     except Exception as e:
@@ -336,6 +352,9 @@ def fetch_dms_last_x_hours(hours: int) -> list:
         list: A list of dictionaries, each containing details of a direct message, including sender's user ID,
               timestamp, and text of the message. Returns None if an error occurs.
     """
+    from slack_sdk import WebClient
+    from slack_sdk.errors import SlackApiError
+
     try:
         slack_user_token = os.environ.get("SLACK_USER_TOKEN")
         client = WebClient(token=slack_user_token)
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from TARS.config.config import graph_config
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Budget reasons, also used in the messages shown to the model and the user
+DEADLINE = "time"
+STEPS = "steps"
+TOKENS = "tokens"
+
+# response_metadata key (and final_answer status) of answers cut short by a budget
+BUDGET_EXHAUSTED = "budget_exhausted"
+
+
+class BudgetExceeded(TimeoutError):
+    """A model call was cut short because the request's deadline passed."""
+
+
+def budget_config(
+    deadline_seconds: Optional[float] = None,
+    max_steps: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Build the budget entries of a run's configurable, defaulting to GraphConfig.
+
+    The deadline is absolute (epoch seconds), so every node and tool sees the
+    same remaining time however long the earlier steps took.
+
+    Args:
+        deadline_seconds (float, optional): Time allowed for the whole turn.
+        max_steps (int, optional): Model calls that may request tools.
+        max_tokens (int, optional): Total tokens the model may use in the turn.
+
+    Returns:
+        dict: The "deadline", "max_steps" and "max_tokens" entries.
+    """
+    deadline_seconds = deadline_seconds or graph_config.agent_deadline_seconds
+    return {
+        "deadline": time.time() + deadline_seconds if deadline_seconds else None,
+        "max_steps": max_steps or graph_config.agent_max_steps,
+        "max_tokens": max_tokens or graph_config.agent_max_tokens,
+    }
+
+
+def recursion_limit(max_steps: int) -> int:
+    """A LangGraph recursion limit that never cuts the turn before the step budget does."""
+    # context, router, agent, then (action, agent) per step and a final answer
+    return 2 * max_steps + 8
+
+
+def current_turn(messages: Sequence) -> List:
+    """The messages since the user's latest message."""
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return list(messages[index + 1:])
+    return list(messages)
+
+
+def steps_used(messages: Sequence) -> int:
+    """Model calls in the current turn that requested tools."""
+    return sum(1 for msg in current_turn(messages) if isinstance(msg, AIMessage) and msg.tool_calls)
+
+
+def tokens_used(messages: Sequence) -> int:
+    """Total tokens the model reported for the current turn."""
+    total = 0
+    for msg in current_turn(messages):
+        usage = getattr(msg, "usage_metadata", None) or {}
+        total += usage.get("total_tokens") or 0
+    return total
+
+
+def remaining_seconds(config: Optional[RunnableConfig]) -> Optional[float]:
+    """Seconds left before the run's deadline, or None if it has none."""
+    deadline = (config or {}).get("configurable", {}).get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def exhausted(messages: Sequence, config: Optional[RunnableConfig], check_steps: bool = True) -> Optional[str]:
+    """
+    Return which budget of the run is spent (DEADLINE, STEPS or TOKENS), or None.
+
+    Args:
+        messages: The conversation so far.
+        config: The runnable config for this run.
+        check_steps (bool): Also enforce the step budget.
+
+    Returns:
+        str: The exhausted budget, or None if there is budget left.
+    """
+    configurable = (config or {}).get("configurable", {})
+    remaining = remaining_seconds(config)
+    if remaining is not None and remaining <= 0:
+        return DEADLINE
+    max_steps = configurable.get("max_steps", graph_config.agent_max_steps)
+    if check_steps and max_steps and steps_used(messages) > max_steps:
+        return STEPS
+    max_tokens = configurable.get("max_tokens", graph_config.agent_max_tokens)
+    if max_tokens and tokens_used(messages) >= max_tokens:
+        return TOKENS
+    return None
+
+
+def clamp_timeout(timeout: Optional[float], config: Optional[RunnableConfig]) -> Optional[float]:
+    """Cap a timeout at the time left before the run's deadline (never below zero)."""
+    remaining = remaining_seconds(config)
+    if remaining is None:
+        return timeout
+    remaining = max(0.0, remaining)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+_pool: Optional[ContextThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ContextThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ContextThreadPoolExecutor(thread_name_prefix="tars-deadline")
+    return _pool
+
+
+def call_with_timeout(fn: Callable[[], T], timeout: Optional[float]) -> T:
+    """
+    Call fn, giving up after timeout seconds.
+
+    The call runs on a worker thread that keeps the caller's context (so
+    token streaming and tracing still see it); on timeout its result is
+    discarded, as the thread cannot be interrupted.
+
+    Raises:
+        BudgetExceeded: If fn does not return in time.
+    """
+    if timeout is None:
+        return fn()
+    future = _get_pool().submit(fn)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise BudgetExceeded(f"Model call cut short after {timeout:.1f}s by the request deadline")
+
+
+async def acall_with_timeout(call: Awaitable[T], timeout: Optional[float]) -> T:
+    """Async counterpart of call_with_timeout; the call is cancelled on timeout."""
+    if timeout is None:
+        return await call
+    try:
+        return await asyncio.wait_for(call, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise BudgetExceeded(f"Model call cut short after {timeout:.1f}s by the request deadline")
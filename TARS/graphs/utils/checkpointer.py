@@ -0,0 +1,583 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from TARS.config.config import checkpoint_settings, storage_settings
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at);
+"""
+
+# Decoded latest checkpoint kept in the hot tier: (checkpoint_id, parent_id, checkpoint, metadata)
+_Entry = Tuple[str, Optional[str], Checkpoint, CheckpointMetadata]
+
+_SELECT_CHECKPOINT = (
+    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+    "FROM checkpoints "
+)
+
+
+def trim_messages_to_cap(messages: Sequence[Any], max_messages: int) -> List[Any]:
+    """
+    Keep at most max_messages of the most recent messages.
+
+    The retained history always starts at a user message so that tool
+    results are never separated from the AI message that requested them.
+    If the current turn alone exceeds the cap, the whole turn is kept.
+
+    Args:
+        messages: The full message history of a thread.
+        max_messages (int): The cap; 0 or less disables trimming.
+
+    Returns:
+        List: The (possibly) trimmed message history.
+    """
+    messages = list(messages)
+    if max_messages <= 0 or len(messages) <= max_messages:
+        return messages
+    user_turn_starts = [
+        index for index, message in enumerate(messages) if isinstance(message, HumanMessage)
+    ]
+    if not user_turn_starts:
+        return messages[-max_messages:]
+    cutoff = len(messages) - max_messages
+    start = next(
+        (index for index in user_turn_starts if index >= cutoff), user_turn_starts[-1]
+    )
+    return messages[start:]
+
+
+def answer_dangling_tool_calls(messages: Sequence[Any]) -> List[Any]:
+    """
+    Add a result for every tool call left unanswered in a thread.
+
+    A turn that ended (client disconnect, error) after an AI message with
+    tool calls was checkpointed but before the tools ran leaves calls with no
+    result, and providers reject every later request on that thread. Each
+    missing result is inserted right after the results the call did get.
+
+    Args:
+        messages: The message history of a thread.
+
+    Returns:
+        List: The history, with an error result for each unanswered call.
+    """
+    repaired = []
+    pending: List[Dict[str, Any]] = []
+
+    def close_pending():
+        for tool_call in pending:
+            repaired.append(
+                ToolMessage(
+                    content="Not run: the request ended before this tool call completed.",
+                    name=tool_call["name"],
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                )
+            )
+        pending.clear()
+
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            pending[:] = [tool_call for tool_call in pending if tool_call["id"] != message.tool_call_id]
+        else:
+            close_pending()
+        repaired.append(message)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            pending[:] = message.tool_calls
+    # Calls of a trailing AI message are still to be run by the graph
+    return repaired
+
+
+class SQLiteLRUCheckpointer(BaseCheckpointSaver):
+    """
+    A LangGraph checkpointer backed by a local SQLite file with an LRU memory tier.
+
+    The SQLite file (in WAL mode) is shared by every process started by
+    TARS/main.py, so a thread_id resumes the same conversation whether it
+    arrives through the API, Slack or the web UI. The latest checkpoint of the
+    most recently used threads is also kept decoded in memory, so resuming a
+    hot thread skips both the SQLite read and deserialization; the tier is dropped
+    whenever another process commits to the database, so reads never go stale.
+
+    Growth is bounded per thread (message cap and number of retained
+    checkpoints), in memory (hot thread count and idle eviction) and on disk
+    (threads idle longer than the retention window are purged).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        hot_threads: int = 256,
+        memory_idle_seconds: float = 900.0,
+        retention_seconds: float = 0.0,
+        history_per_thread: int = 3,
+        max_messages: int = 0,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.db_path = db_path
+        self.hot_threads = hot_threads
+        self.memory_idle_seconds = memory_idle_seconds
+        self.retention_seconds = retention_seconds
+        self.history_per_thread = history_per_thread
+        self.max_messages = max_messages
+
+        self._lock = threading.RLock()
+        # (thread_id, checkpoint_ns) -> (last_access, latest decoded checkpoint)
+        self._hot: "OrderedDict[Tuple[str, str], Tuple[float, _Entry]]" = OrderedDict()
+        self._last_purge = 0.0
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._data_version = self._read_data_version()
+        logger.info(f"Checkpointer ready at {db_path}")
+
+    # ------------------------------------------------------------------
+    # Hot tier helpers
+    # ------------------------------------------------------------------
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _sync_hot_tier(self) -> None:
+        """Drop the hot tier if another process has committed since we last looked."""
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._hot.clear()
+
+    def _hot_get(self, key: Tuple[str, str]) -> Optional[_Entry]:
+        entry = self._hot.get(key)
+        if entry is None:
+            return None
+        self._hot[key] = (time.monotonic(), entry[1])
+        self._hot.move_to_end(key)
+        return entry[1]
+
+    def _hot_put(self, key: Tuple[str, str], entry: _Entry) -> None:
+        now = time.monotonic()
+        self._hot[key] = (now, entry)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_threads:
+            self._hot.popitem(last=False)
+        while self._hot:
+            oldest_key, (last_access, _) = next(iter(self._hot.items()))
+            if now - last_access <= self.memory_idle_seconds:
+                break
+            del self._hot[oldest_key]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List:
+        rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [
+            (task_id, channel, self.serde.loads_typed((type_, value)))
+            for task_id, channel, type_, value in rows
+        ]
+
+    def _decode(self, row: Tuple) -> _Entry:
+        checkpoint_id, parent_id, type_, blob, metadata_type, metadata = row
+        return (
+            checkpoint_id,
+            parent_id,
+            self.serde.loads_typed((type_, blob)),
+            self.serde.loads_typed((metadata_type, metadata)),
+        )
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, entry: _Entry) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint, metadata = entry
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=copy_checkpoint(checkpoint),
+            metadata=dict(metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        key = (thread_id, checkpoint_ns)
+
+        with self._lock:
+            self._sync_hot_tier()
+            if checkpoint_id is None:
+                entry = self._hot_get(key)
+                if entry is None:
+                    row = self._conn.execute(
+                        _SELECT_CHECKPOINT + "WHERE thread_id = ? AND checkpoint_ns = ? "
+                        "ORDER BY checkpoint_id DESC LIMIT 1",
+                        (thread_id, checkpoint_ns),
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    entry = self._decode(row)
+                    self._hot_put(key, entry)
+            else:
+                row = self._conn.execute(
+                    _SELECT_CHECKPOINT
+                    + "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = self._decode(row)
+            return self._to_tuple(thread_id, checkpoint_ns, entry)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        returned = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and returned >= limit:
+                break
+            with self._lock:
+                checkpoint_tuple = self._to_tuple(
+                    thread_id, checkpoint_ns, self._decode(tuple(row))
+                )
+            if filter and not all(
+                checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()
+            ):
+                continue
+            returned += 1
+            yield checkpoint_tuple
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _bounded(self, checkpoint: Checkpoint) -> Checkpoint:
+        """Apply the per-thread message cap to a copy of the checkpoint."""
+        messages = checkpoint.get("channel_values", {}).get("messages")
+        if not self.max_messages or messages is None or len(messages) <= self.max_messages:
+            return checkpoint
+        bounded = dict(checkpoint)
+        bounded["channel_values"] = dict(checkpoint["channel_values"])
+        bounded["channel_values"]["messages"] = trim_messages_to_cap(
+            messages, self.max_messages
+        )
+        return bounded
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        parent_id = configurable.get("checkpoint_id")
+
+        bounded = self._bounded(checkpoint)
+        type_, blob = self.serde.dumps_typed(bounded)
+        metadata_type, metadata_blob = self.serde.dumps_typed(dict(metadata))
+
+        with self._lock:
+            self._sync_hot_tier()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                "parent_checkpoint_id, type, checkpoint, metadata_type, metadata, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    parent_id,
+                    type_,
+                    blob,
+                    metadata_type,
+                    metadata_blob,
+                    time.time(),
+                ),
+            )
+            self._prune_history(thread_id, checkpoint_ns)
+            # data_version only moves for other connections' commits, so the hot
+            # tier stays valid after our own write
+            self._conn.commit()
+            self._hot_put(
+                (thread_id, checkpoint_ns),
+                (checkpoint["id"], parent_id, copy_checkpoint(bounded), dict(metadata)),
+            )
+            self._maybe_purge_idle_threads()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+        # Special channels (errors, interrupts) replace; regular writes are idempotent
+        verb = (
+            "INSERT OR REPLACE"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE"
+        )
+        rows = []
+        for index, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, index),
+                    channel,
+                    type_,
+                    blob,
+                    task_path,
+                )
+            )
+        with self._lock:
+            self._conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+                "idx, channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        thread_id = str(thread_id)
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            for key in [key for key in self._hot if key[0] == thread_id]:
+                del self._hot[key]
+
+    # ------------------------------------------------------------------
+    # Bounding
+    # ------------------------------------------------------------------
+
+    def _prune_history(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep only the newest history_per_thread checkpoints (and their writes)."""
+        if self.history_per_thread <= 0:
+            return
+        stale = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.history_per_thread),
+        ).fetchall()
+        if not stale:
+            return
+        params = [(thread_id, checkpoint_ns, checkpoint_id) for (checkpoint_id,) in stale]
+        self._conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            params,
+        )
+        self._conn.executemany(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            params,
+        )
+
+    def _maybe_purge_idle_threads(self) -> None:
+        now = time.time()
+        if self.retention_seconds <= 0 or now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        self.purge_idle_threads(self.retention_seconds)
+
+    def purge_idle_threads(self, max_idle_seconds: float) -> int:
+        """
+        Delete every thread whose newest checkpoint is older than max_idle_seconds.
+
+        Args:
+            max_idle_seconds (float): The idle window after which a thread is dropped.
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            idle = self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(updated_at) < ?",
+                (cutoff,),
+            ).fetchall()
+            for (thread_id,) in idle:
+                self.delete_thread(thread_id)
+        if idle:
+            logger.info(f"Purged {len(idle)} idle checkpoint threads")
+        return len(idle)
+
+    # ------------------------------------------------------------------
+    # Async API (SQLite work runs off the event loop)
+    # ------------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def build_checkpointer() -> Optional[SQLiteLRUCheckpointer]:
+    """
+    Build the conversation checkpointer from CheckpointSettings.
+
+    Returns:
+        SQLiteLRUCheckpointer: The shared checkpointer, or None when disabled.
+    """
+    if not checkpoint_settings.checkpoint_enabled:
+        logger.info("Conversation checkpointing disabled")
+        return None
+    return SQLiteLRUCheckpointer(
+        os.path.join(storage_settings.data_dir, checkpoint_settings.checkpoint_db_file),
+        hot_threads=checkpoint_settings.checkpoint_hot_threads,
+        memory_idle_seconds=checkpoint_settings.checkpoint_memory_idle_seconds,
+        retention_seconds=checkpoint_settings.checkpoint_retention_seconds,
+        history_per_thread=checkpoint_settings.checkpoint_history_per_thread,
+        max_messages=checkpoint_settings.checkpoint_max_messages,
+    )
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from TARS.config.config import circuit_breaker_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open; retry after {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    A closed/open/half-open circuit breaker for one dependency.
+
+    The breaker opens after failure_threshold consecutive failures and then
+    refuses calls for recovery_seconds. After that it lets up to
+    half_open_max_calls probe calls through: a success closes it again, a
+    failure re-opens it. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _refresh(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.recovery_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe call through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.recovery_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed; a half-open breaker admits limited probes."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self) -> None:
+        """Return a probe slot taken by allow() for a call that was never made."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self._failures} consecutive failures"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after_seconds": round(self.retry_after(), 1),
+        }
+
+
+class CircuitBreakerRegistry:
+    """The per-process set of circuit breakers, keyed by name (e.g. "model:anthropic", "tool:youtube_search")."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: int = 5,
+        recovery_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        """Return the breaker for a dependency, or None when breakers are disabled."""
+        if not self.enabled:
+            return None
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    name,
+                    CircuitBreaker(
+                        name,
+                        failure_threshold=self.failure_threshold,
+                        recovery_seconds=self.recovery_seconds,
+                        half_open_max_calls=self.half_open_max_calls,
+                    ),
+                )
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return the state of every breaker."""
+        return {name: breaker.snapshot() for name, breaker in list(self._breakers.items())}
+
+
+def build_circuit_breakers() -> CircuitBreakerRegistry:
+    """Build the circuit breaker registry from CircuitBreakerSettings."""
+    return CircuitBreakerRegistry(
+        enabled=circuit_breaker_settings.circuit_breaker_enabled,
+        failure_threshold=circuit_breaker_settings.circuit_failure_threshold,
+        recovery_seconds=circuit_breaker_settings.circuit_recovery_seconds,
+        half_open_max_calls=circuit_breaker_settings.circuit_half_open_max_calls,
+    )
@@ -0,0 +1,184 @@
+import json
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Per-message token counts keyed by (message id, content length); bounded LRU
+_TOKEN_CACHE: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+_TOKEN_CACHE_SIZE = 50_000
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; fall back to a character heuristic if unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating tokens from characters: {e}")
+            _encoding = None
+    return _encoding
+
+
+def count_text_tokens(text: str) -> int:
+    """
+    Count the tokens in a piece of text.
+
+    Uses tiktoken's cl100k_base encoding when available, otherwise an
+    approximation of four characters per token. Either is close enough for
+    budgeting across providers.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        int: The (approximate) token count.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _message_text(message: BaseMessage) -> str:
+    text = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps(tool_calls, default=str)
+    return text
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """
+    Count the tokens of a message, caching the result per message.
+
+    Args:
+        message (BaseMessage): The message to count.
+
+    Returns:
+        int: The token count including per-message overhead.
+    """
+    text = _message_text(message)
+    key = (message.id, len(text)) if message.id else None
+    if key is not None and key in _TOKEN_CACHE:
+        _TOKEN_CACHE.move_to_end(key)
+        return _TOKEN_CACHE[key]
+
+    tokens = count_text_tokens(text) + _MESSAGE_OVERHEAD_TOKENS
+    if key is not None:
+        _TOKEN_CACHE[key] = tokens
+        if len(_TOKEN_CACHE) > _TOKEN_CACHE_SIZE:
+            _TOKEN_CACHE.popitem(last=False)
+    return tokens
+
+
+def count_messages_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Count the tokens of a sequence of messages."""
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Split a message history into turns, each starting at a user message.
+
+    Keeping whole turns together guarantees that an AI message requesting
+    tools and the matching tool results are never split apart.
+
+    Args:
+        messages: The message history.
+
+    Returns:
+        List[List[BaseMessage]]: The turns in order.
+    """
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def plan_summarization(
+    messages: Sequence[BaseMessage],
+    budget: int,
+    keep_recent_turns: int,
+    fixed_tokens: int = 0,
+    target_ratio: float = 0.6,
+) -> List[BaseMessage]:
+    """
+    Pick the oldest messages to fold into the running summary.
+
+    Nothing is summarized while the prompt fits the budget. Once it doesn't,
+    whole turns are taken from the oldest end until the remainder fits
+    target_ratio of the budget, always leaving the most recent
+    keep_recent_turns turns verbatim.
+
+    Args:
+        messages: The non-system messages in state.
+        budget (int): The prompt token budget for the model.
+        keep_recent_turns (int): The number of most recent turns kept verbatim.
+        fixed_tokens (int): Tokens used by the system prompt and current summary.
+        target_ratio (float): The fraction of the budget to shrink to.
+
+    Returns:
+        List[BaseMessage]: The messages to summarize (empty if none).
+    """
+    total = fixed_tokens + count_messages_tokens(messages)
+    if budget <= 0 or total <= budget:
+        return []
+
+    turns = split_turns(messages)
+    # The current turn is always kept, even if keep_recent_turns is 0
+    candidates = turns[: max(0, len(turns) - max(1, keep_recent_turns))]
+    target = int(budget * target_ratio)
+
+    selected: List[BaseMessage] = []
+    for turn in candidates:
+        if total <= target:
+            break
+        selected.extend(turn)
+        total -= count_messages_tokens(turn)
+    logger.info(
+        f"Context over budget ({budget} tokens): summarizing {len(selected)} messages"
+    )
+    return selected
+
+
+def build_summary_prompt(previous_summary: Optional[str], messages: Sequence[BaseMessage]) -> str:
+    """
+    Build the prompt that folds a span of messages into the running summary.
+
+    Args:
+        previous_summary (str, optional): The summary produced so far.
+        messages: The messages to fold in.
+
+    Returns:
+        str: The summarization prompt.
+    """
+    transcript = "\n".join(
+        f"{message.type}: {_message_text(message)}" for message in messages
+    )
+    if previous_summary:
+        header = (
+            f"This is the summary of the conversation so far:\n{previous_summary}\n\n"
+            "Extend the summary with the following messages."
+        )
+    else:
+        header = "Summarize the following conversation."
+    return (
+        f"{header} Keep names, dates, decisions, open requests and facts the user "
+        f"shared; be concise.\n\n{transcript}"
+    )
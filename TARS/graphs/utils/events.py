@@ -0,0 +1,169 @@
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from TARS.graphs.utils.budget import BUDGET_EXHAUSTED
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from pydantic import BaseModel
+
+# Graph nodes whose model tokens are streamed to the user as model_delta events
+MODEL_NODES = ("agent", "fast_reply", "finalize")
+
+# Run metadata naming the hedged request a model stream belongs to, and which contender it is
+HEDGE_ID = "hedge_id"
+HEDGE_CONTENDER = "hedge_contender"
+
+
+class AgentEvent(BaseModel):
+    """
+    A typed event emitted by the core agent while it runs.
+
+    Surfaces pick the event types they care about (e.g. only final_answer)
+    instead of concatenating every message in the agent state.
+    """
+
+    type: Literal[
+        "user_echo", "model_delta", "tool_start", "tool_end", "final_answer", "error"
+    ]
+    content: str = ""
+    tool_name: Optional[str] = None
+    tool_call_id: Optional[str] = None
+    tool_args: Optional[Dict[str, Any]] = None
+    status: Optional[str] = None  # tool_end: "success" or "error"; final_answer: "budget_exhausted" if cut short
+    elapsed_ms: float = 0.0  # time since the start of the run
+    duration_ms: Optional[float] = None  # time spent in the step this event closes
+    cached: Optional[bool] = None  # final answer served from the semantic cache
+
+
+def content_text(content: Any) -> str:
+    """
+    Extract the plain text from a message content payload.
+
+    Providers such as Anthropic return content as a list of typed blocks
+    rather than a plain string, so only the text blocks are kept.
+
+    Args:
+        content: A message content value (str or list of content blocks).
+
+    Returns:
+        str: The concatenated text.
+    """
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif isinstance(block, dict) and block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
+
+
+class AgentEventTranslator:
+    """
+    Translate LangGraph ("updates", "messages") stream chunks into AgentEvents.
+
+    Only the incremental node updates are inspected, so the cost per step does
+    not grow with the length of the conversation. Of the contenders of a
+    hedged model request, only the one that streamed first (the winner) has
+    its tokens passed on as model_delta events.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.step_started_at = self.started_at
+        self.tool_started_at: Dict[str, float] = {}
+        self.hedge_winners: Dict[str, str] = {}
+
+    def _elapsed_ms(self, now: float) -> float:
+        return round((now - self.started_at) * 1000, 2)
+
+    def event(self, type: str, **fields) -> AgentEvent:
+        """Create an event stamped with the time since the run started."""
+        return AgentEvent(
+            type=type, elapsed_ms=self._elapsed_ms(time.perf_counter()), **fields
+        )
+
+    def user_echo(self, message: str) -> AgentEvent:
+        return self.event("user_echo", content=message)
+
+    def error(self, message: str) -> AgentEvent:
+        return self.event("error", content=message)
+
+    def translate(self, mode: str, chunk: Any) -> List[AgentEvent]:
+        """
+        Translate one multi-mode stream chunk into zero or more events.
+
+        Args:
+            mode (str): The LangGraph stream mode that produced the chunk.
+            chunk: The chunk payload.
+
+        Returns:
+            List[AgentEvent]: The events derived from the chunk.
+        """
+        if mode == "messages":
+            return self._translate_message(chunk)
+        if mode == "updates":
+            return self._translate_update(chunk)
+        return []
+
+    def _translate_message(self, chunk: Tuple[Any, Dict[str, Any]]) -> List[AgentEvent]:
+        message, metadata = chunk
+        if not isinstance(message, AIMessageChunk):
+            return []
+        if metadata.get("langgraph_node") not in MODEL_NODES:
+            return []
+        hedge_id = metadata.get(HEDGE_ID)
+        if hedge_id is not None:
+            contender = metadata.get(HEDGE_CONTENDER)
+            if self.hedge_winners.setdefault(hedge_id, contender) != contender:
+                return []
+        text = content_text(message.content)
+        return [self.event("model_delta", content=text)] if text else []
+
+    def _translate_update(self, update: Dict[str, Any]) -> List[AgentEvent]:
+        events = []
+        now = time.perf_counter()
+        for node_update in (update or {}).values():
+            if not isinstance(node_update, dict):
+                continue
+            for message in node_update.get("messages", []):
+                if isinstance(message, ToolMessage):
+                    started = self.tool_started_at.pop(message.tool_call_id, now)
+                    events.append(
+                        self.event(
+                            "tool_end",
+                            content=content_text(message.content),
+                            tool_name=message.name,
+                            tool_call_id=message.tool_call_id,
+                            status=getattr(message, "status", "success"),
+                            duration_ms=round((now - started) * 1000, 2),
+                        )
+                    )
+                elif isinstance(message, AIMessage):
+                    events.extend(self._translate_ai_message(message, now))
+        if events:
+            self.step_started_at = now
+        return events
+
+    def _translate_ai_message(self, message: AIMessage, now: float) -> List[AgentEvent]:
+        if not message.tool_calls:
+            return [
+                self.event(
+                    "final_answer",
+                    content=content_text(message.content),
+                    status=BUDGET_EXHAUSTED if message.response_metadata.get(BUDGET_EXHAUSTED) else None,
+                    duration_ms=round((now - self.step_started_at) * 1000, 2),
+                )
+            ]
+        events = []
+        for tool_call in message.tool_calls:
+            self.tool_started_at[tool_call.get("id")] = now
+            events.append(
+                self.event(
+                    "tool_start",
+                    tool_name=tool_call["name"],
+                    tool_call_id=tool_call.get("id"),
+                    tool_args=tool_call.get("args"),
+                )
+            )
+        return events
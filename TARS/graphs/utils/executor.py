@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence
+
+from TARS.config.config import tool_settings
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.tools import BaseTool
+from pydantic import ValidationError
+from TARS.graphs.utils.budget import clamp_timeout
+from TARS.graphs.utils.circuit_breaker import CircuitBreakerRegistry
+from TARS.graphs.utils.events import content_text
+from TARS.graphs.utils.tool_output import ToolOutputGovernor, build_tool_output_governor
+from TARS.graphs.utils.tool_cache import ToolResultCache, build_tool_cache
+from TARS.graphs.utils.tools import tool_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def timeout_message(tool_call: Dict[str, Any], timeout: float) -> ToolMessage:
+    """Build the ToolMessage returned in place of a tool call that timed out."""
+    return ToolMessage(
+        content=f"Tool '{tool_call['name']}' timed out after {timeout:.1f}s; no result is available.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+        artifact={"timed_out": True, "timeout_seconds": timeout},
+    )
+
+
+def queued_message(tool_call: Dict[str, Any]) -> ToolMessage:
+    """Build the ToolMessage returned in place of a call still queued behind its tool's limit at the deadline."""
+    return ToolMessage(
+        content=f"Tool '{tool_call['name']}' did not start before the request deadline; no result is available.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+        artifact={"timed_out": True, "queued": True},
+    )
+
+
+def error_message(tool_call: Dict[str, Any], error: Exception) -> ToolMessage:
+    """Build the ToolMessage returned in place of a tool call that raised."""
+    return ToolMessage(
+        content=f"Error: {error!r}\n Please fix your mistakes.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+    )
+
+
+def unavailable_message(tool_call: Dict[str, Any], retry_after: float) -> ToolMessage:
+    """Build the ToolMessage returned in place of a call refused by an open circuit breaker."""
+    return ToolMessage(
+        content=f"Tool '{tool_call['name']}' is temporarily unavailable after repeated failures. "
+        f"Do not call it again in this turn; answer with the information you have.",
+        name=tool_call["name"],
+        tool_call_id=tool_call["id"],
+        status="error",
+        artifact={"tool_unavailable": True, "retry_after_seconds": round(retry_after, 1)},
+    )
+
+
+def _is_dependency_failure(error: Exception) -> bool:
+    # Invalid arguments from the model say nothing about the health of the tool
+    return not isinstance(error, ValidationError)
+
+
+class _PendingCall:
+    """
+    A sync tool call submitted to the pool: when it started running, or
+    whether it was abandoned while still queued for a worker or its tool's
+    concurrency limit.
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None
+        self._abandoned = False
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Mark the call as running; False if it was abandoned and must not run."""
+        with self._lock:
+            if self._abandoned:
+                return False
+            self.started_at = time.perf_counter()
+            self.started.set()
+            return True
+
+    def abandon(self) -> bool:
+        """Give up on a call that has not started; False if it already started."""
+        with self._lock:
+            if self.started.is_set():
+                return False
+            self._abandoned = True
+            return True
+
+
+class ToolExecutor:
+    """
+    Execute every tool call of one AI message concurrently, with per-tool timeouts.
+
+    Async execution awaits all calls together (LangChain runs sync-only tools
+    on a worker thread); sync execution fans out on a bounded thread pool.
+    Both paths cap concurrency at max_concurrency, and calls to a tool with a
+    concurrency limit at that limit, so the wall-clock cost of a turn is that
+    of its slowest tool call rather than the sum of all calls.
+    A call that exceeds its timeout, or the time left before the run's
+    deadline, is answered with an error ToolMessage marked timed_out, and the
+    other results are still returned. The timeout starts once the call runs:
+    time queued behind other calls to the same tool does not count against
+    it, only the deadline bounds it. Only a call that overruns the tool's own
+    timeout counts against its circuit breaker; one cut short by the deadline,
+    still queued when it passed, or cancelled counts as neither a failure nor
+    a success, and returns the probe slot of a half-open breaker.
+
+    Note that a timed-out sync tool keeps running on its worker thread until
+    it returns; only its result is discarded.
+
+    When a ToolResultCache is given, calls to cacheable (read-only) tools are
+    answered from it and successful results are stored in it. When a
+    CircuitBreakerRegistry is given, each tool has a breaker that timeouts
+    and errors trip; calls to a tool with an open breaker return a
+    tool_unavailable ToolMessage immediately. When a ToolOutputGovernor is
+    given, results over their tool's token cap are shrunk before they enter
+    the conversation (the cache keeps the full result).
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        max_concurrency: int = 8,
+        default_timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        cache: Optional[ToolResultCache] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        governor: Optional[ToolOutputGovernor] = None,
+    ):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.cache = cache
+        self.breakers = breakers
+        self.governor = governor
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.concurrency_limits = dict(concurrency_limits or {})
+        self._pool = ContextThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="tars-tool"
+        )
+        self._tool_locks = {
+            name: threading.BoundedSemaphore(limit) for name, limit in self.concurrency_limits.items()
+        }
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop = None
+
+    def timeout_for(self, tool_name: str, config: RunnableConfig) -> float:
+        """Return the timeout, in seconds, for a call to the given tool, capped by the run's deadline."""
+        return clamp_timeout(self.timeouts.get(tool_name, self.default_timeout), config)
+
+    def _timed_out(self, tool_call: Dict[str, Any], timeout: float) -> Optional[bool]:
+        """Log a timeout; True (a tool failure) if the tool overran its own timeout, None (unknown) if the deadline cut it short."""
+        logger.warning(f"Tool {tool_call['name']} timed out after {timeout}s")
+        return True if timeout >= self.timeouts.get(tool_call["name"], self.default_timeout) else None
+
+    @staticmethod
+    def _question(state) -> str:
+        """The user's latest message, which the governor's summaries focus on."""
+        messages = state["messages"] if isinstance(state, dict) else state
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                return content_text(message.content)
+        return ""
+
+    def _tool_calls(self, state) -> List[Dict[str, Any]]:
+        messages = state["messages"] if isinstance(state, dict) else state
+        last_message = messages[-1]
+        if not isinstance(last_message, AIMessage):
+            raise ValueError("The action node expects the last message to be an AIMessage")
+        return [{**call, "type": "tool_call"} for call in last_message.tool_calls]
+
+    def _unknown_tool(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        return ToolMessage(
+            content=f"Error: {tool_call['name']} is not a valid tool, try one of "
+            f"[{', '.join(self.tools_by_name)}].",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+        )
+
+    def _cached(self, tool_call: Dict[str, Any]) -> Optional[ToolMessage]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(tool_call["name"], tool_call["args"])
+        if cached is None:
+            return None
+        logger.info(f"Tool cache hit for {tool_call['name']}")
+        return ToolMessage(
+            content=cached["content"],
+            artifact=cached["artifact"],
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            response_metadata={"cache_hit": True},
+        )
+
+    def _remember(self, tool_call: Dict[str, Any], message: ToolMessage) -> ToolMessage:
+        if self.cache is not None and message.status != "error":
+            self.cache.set(tool_call["name"], tool_call["args"], message.content, message.artifact)
+        return message
+
+    def _refused(self, tool_call: Dict[str, Any]) -> Optional[ToolMessage]:
+        """Return a tool_unavailable message if the tool's breaker refuses the call."""
+        breaker = self.breakers.get(f"tool:{tool_call['name']}") if self.breakers else None
+        if breaker is None or breaker.allow():
+            return None
+        logger.warning(f"Circuit open for tool {tool_call['name']}; refusing call")
+        return unavailable_message(tool_call, breaker.retry_after())
+
+    def _record(self, tool_call: Dict[str, Any], failed: Optional[bool]) -> None:
+        """Record a call's outcome on its tool's breaker; None (never run or cut short) returns its probe slot."""
+        breaker = self.breakers.get(f"tool:{tool_call['name']}") if self.breakers else None
+        if breaker is None:
+            return
+        if failed is None:
+            breaker.release()
+        elif failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _run_one(self, tool_call: Dict[str, Any], config: RunnableConfig, pending: _PendingCall):
+        """Run one tool call; return the message and whether it counts as a tool failure."""
+        tool_lock = self._tool_locks.get(tool_call["name"])
+        if tool_lock is not None:
+            tool_lock.acquire()
+        try:
+            if not pending.start():
+                return None, False
+            message = self.tools_by_name[tool_call["name"]].invoke(tool_call, config)
+            return self._remember(tool_call, message), False
+        except Exception as e:
+            logger.error(f"Tool {tool_call['name']} failed: {e}", exc_info=True)
+            return error_message(tool_call, e), _is_dependency_failure(e)
+        finally:
+            if tool_lock is not None:
+                tool_lock.release()
+
+    def _govern(self, messages: List[ToolMessage], question: str, config: RunnableConfig) -> List[ToolMessage]:
+        """
+        Govern the results on the pool, in parallel like ainvoke, so oversized
+        results cost one summary's time rather than one each. All summaries
+        share one deadline: the summary timeout, capped by the run's deadline.
+        """
+        governed_by = time.perf_counter() + clamp_timeout(self.governor.summary_timeout, config)
+
+        def govern(message: ToolMessage) -> ToolMessage:
+            return self.governor.govern(message, question, max(0.0, governed_by - time.perf_counter()))
+
+        return list(self._pool.map(govern, messages))
+
+    def invoke(self, state, config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+        """
+        Run the tool calls of the last AI message on the bounded thread pool.
+
+        Args:
+            state: The current agent state.
+            config: The runnable config for this run.
+
+        Returns:
+            dict: The state update with one ToolMessage per tool call, in order.
+        """
+        tool_calls = self._tool_calls(state)
+        started = time.perf_counter()
+        futures = {}
+        pending: Dict[int, _PendingCall] = {}
+        results: Dict[int, ToolMessage] = {}
+        for index, tool_call in enumerate(tool_calls):
+            if tool_call["name"] not in self.tools_by_name:
+                results[index] = self._unknown_tool(tool_call)
+                continue
+            cached = self._cached(tool_call)
+            if cached is not None:
+                results[index] = cached
+                continue
+            refused = self._refused(tool_call)
+            if refused is not None:
+                results[index] = refused
+                continue
+            pending[index] = _PendingCall()
+            futures[index] = self._pool.submit(self._run_one, tool_call, config, pending[index])
+
+        for index, future in futures.items():
+            tool_call = tool_calls[index]
+            # Waiting for a worker or the tool's limit is bounded only by the deadline
+            if not pending[index].started.wait(clamp_timeout(None, config)) and pending[index].abandon():
+                logger.warning(f"Tool {tool_call['name']} was still queued at the deadline")
+                results[index] = queued_message(tool_call)
+                self._record(tool_call, None)
+                continue
+            timeout = self.timeout_for(tool_call["name"], config)
+            remaining = max(0.0, pending[index].started_at + timeout - time.perf_counter())
+            try:
+                results[index], failed = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                results[index], failed = timeout_message(tool_call, timeout), self._timed_out(tool_call, timeout)
+            self._record(tool_call, failed)
+
+        messages = [results[index] for index in range(len(tool_calls))]
+        if self.governor is not None:
+            messages = self._govern(messages, self._question(state), config)
+        logger.info(
+            f"Executed {len(tool_calls)} tool calls in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return {"messages": messages}
+
+    def _get_semaphore(self, tool_name: Optional[str] = None) -> asyncio.Semaphore:
+        """Return the executor-wide semaphore, or the tool's own when tool_name has a limit."""
+        # Semaphores are bound to the loop they were first used on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._tool_semaphores = {
+                name: asyncio.Semaphore(limit) for name, limit in self.concurrency_limits.items()
+            }
+            self._semaphore_loop = loop
+        if tool_name is None:
+            return self._semaphore
+        return self._tool_semaphores.get(tool_name)
+
+    async def _arun_one(self, tool_call: Dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        if tool_call["name"] not in self.tools_by_name:
+            return self._unknown_tool(tool_call)
+        cached = self._cached(tool_call)
+        if cached is not None:
+            return cached
+        refused = self._refused(tool_call)
+        if refused is not None:
+            return refused
+        try:
+            return await self._arun_allowed(tool_call, config)
+        except asyncio.CancelledError:
+            # The run was cancelled: the call's outcome is unknown
+            self._record(tool_call, None)
+            raise
+
+    async def _arun_allowed(self, tool_call: Dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        """Run a call its tool's breaker admitted, recording the outcome on the breaker."""
+        async with self._get_semaphore():
+            # Waiting for the tool's limit is bounded only by the deadline, not the tool timeout
+            tool_semaphore = self._get_semaphore(tool_call["name"])
+            if tool_semaphore is not None:
+                try:
+                    await asyncio.wait_for(tool_semaphore.acquire(), timeout=clamp_timeout(None, config))
+                except asyncio.TimeoutError:
+                    logger.warning(f"Tool {tool_call['name']} was still queued at the deadline")
+                    self._record(tool_call, None)
+                    return queued_message(tool_call)
+            timeout = self.timeout_for(tool_call["name"], config)
+            try:
+                call = self.tools_by_name[tool_call["name"]].ainvoke(tool_call, config)
+                message = await asyncio.wait_for(call, timeout=timeout)
+                self._record(tool_call, False)
+                return self._remember(tool_call, message)
+            except asyncio.TimeoutError:
+                self._record(tool_call, self._timed_out(tool_call, timeout))
+                return timeout_message(tool_call, timeout)
+            except Exception as e:
+                logger.error(f"Tool {tool_call['name']} failed: {e}", exc_info=True)
+                self._record(tool_call, _is_dependency_failure(e))
+                return error_message(tool_call, e)
+            finally:
+                if tool_semaphore is not None:
+                    tool_semaphore.release()
+
+    async def ainvoke(self, state, config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+        """Async counterpart of invoke; all tool calls are awaited concurrently."""
+        tool_calls = self._tool_calls(state)
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._arun_one(tool_call, config) for tool_call in tool_calls)
+        )
+        if self.governor is not None:
+            question = self._question(state)
+            results = await asyncio.gather(
+                *(
+                    self.governor.agovern(message, question, clamp_timeout(None, config))
+                    for message in results
+                )
+            )
+        logger.info(
+            f"Executed {len(tool_calls)} tool calls in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return {"messages": list(results)}
+
+
+def build_tool_executor(
+    tools: Sequence[BaseTool], breakers: Optional[CircuitBreakerRegistry] = None
+) -> ToolExecutor:
+    """Build a ToolExecutor configured from the tool registry's metadata and ToolSettings."""
+    return ToolExecutor(
+        tools,
+        max_concurrency=tool_settings.tool_max_concurrency,
+        default_timeout=tool_settings.tool_default_timeout_seconds,
+        timeouts=tool_registry.timeouts(),
+        cache=build_tool_cache(),
+        breakers=breakers,
+        concurrency_limits=tool_registry.concurrency_limits(),
+        governor=build_tool_output_governor(),
+    )
@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+from TARS.config.config import hedge_settings
+from TARS.graphs.utils.context import count_messages_tokens, count_text_tokens
+from TARS.graphs.utils.events import HEDGE_CONTENDER, HEDGE_ID, content_text
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """The pct-th percentile of samples, interpolating linearly between ranks."""
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _contender_config(hedge_id: str, label: str) -> Dict[str, Any]:
+    """Tag a contender's model run so streamed tokens of the loser can be told apart."""
+    return {"metadata": {HEDGE_ID: hedge_id, HEDGE_CONTENDER: label}}
+
+
+class _Race:
+    """Shared state of one hedged request: which contender produced a token first."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.winner: Optional[str] = None
+        self.running: set = set()
+
+    def start(self, label: str) -> None:
+        with self.condition:
+            self.running.add(label)
+
+    def first_token(self, label: str) -> bool:
+        """Record a token from label; return False if another contender already won."""
+        with self.condition:
+            if self.winner is None:
+                self.winner = label
+                self.condition.notify_all()
+            return self.winner == label
+
+    def finish(self, label: str) -> None:
+        with self.condition:
+            self.running.discard(label)
+            self.condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait until a contender wins or all contenders finish; return the winner."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.winner or not self.running, timeout)
+            return self.winner
+
+
+class HedgedModelCaller:
+    """
+    Hedge chat model calls against a secondary model to cut tail latency.
+
+    The primary model is streamed; if it has not produced its first chunk
+    within the hedge delay, the same request is sent to the secondary model.
+    Whichever produces a chunk first wins and the other is cancelled. The
+    hedge delay tracks a percentile of the primary's recent time-to-first-token,
+    so hedges fire only for the slowest requests.
+
+    A losing sync request cannot be interrupted until it yields its first
+    chunk, which graph streaming would pass on as a token. Each contender's
+    run is therefore tagged with the hedge ID and its label in its metadata,
+    and AgentEventTranslator streams only the winner's tokens.
+
+    A guard puts the secondary behind its provider's own limits: the hedge
+    fires only if guard.admit() returns True, and guard.done(failed,
+    used_tokens) reports how the secondary request ended (failed is None
+    when it was cancelled before answering; used_tokens counts what it
+    consumed, including a loser's wasted tokens). Only the first done()
+    call of a hedge counts.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.5,
+        max_delay: float = 10.0,
+        window_size: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 16,
+    ):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._pool = ContextThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tars-hedge")
+        self.requests = 0
+        self.hedges = 0
+        self.secondary_wins = 0
+        self.wasted_input_tokens = 0
+        self.wasted_output_tokens = 0
+
+    def hedge_delay(self) -> float:
+        """The delay, in seconds, after which a request is hedged."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial_delay
+            delay = percentile(self._samples, self.percentile)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def _record(self, label: str, started: float) -> None:
+        # Only the primary's time-to-first-token drives the hedge delay
+        if label == PRIMARY:
+            with self._lock:
+                self._samples.append(time.perf_counter() - started)
+
+    def _record_waste(self, messages: Sequence[BaseMessage], chunks) -> int:
+        """Count a losing request's tokens as wasted; return them."""
+        input_tokens = count_messages_tokens(messages)
+        output_tokens = count_text_tokens(content_text(chunks.content)) if chunks is not None else 0
+        with self._lock:
+            self.wasted_input_tokens += input_tokens
+            self.wasted_output_tokens += output_tokens
+        return input_tokens + output_tokens
+
+    @staticmethod
+    def _used_tokens(chunks) -> Optional[int]:
+        """The tokens a finished request reported, if any."""
+        usage = getattr(chunks, "usage_metadata", None) or {}
+        return usage.get("total_tokens")
+
+    def _record_outcome(self, hedged: bool, winner: Optional[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            if hedged:
+                self.hedges += 1
+                self.secondary_wins += winner == SECONDARY
+        if hedged:
+            logger.info(f"Hedged model request won by the {winner} model")
+
+    def _consume(self, model, messages, race: _Race, label: str, started: float, hedge_id: str, guard=None):
+        chunks = None
+        try:
+            for chunk in model.stream(messages, config=_contender_config(hedge_id, label)):
+                if chunks is None:
+                    self._record(label, started)
+                    if not race.first_token(label):
+                        # Lost the race: stop reading, which closes the provider stream
+                        wasted = self._record_waste(messages, chunk)
+                        if guard is not None:
+                            guard.done(False, wasted)
+                        return None
+                chunks = chunk if chunks is None else chunks + chunk
+            race.first_token(label)
+            if guard is not None:
+                guard.done(False, self._used_tokens(chunks))
+            return chunks
+        except Exception:
+            if guard is not None:
+                guard.done(True, None)
+            raise
+        finally:
+            race.finish(label)
+
+    def invoke(self, primary, secondary, messages: List[BaseMessage], guard=None):
+        """
+        Call the primary model, hedging to the secondary if it stalls.
+
+        Args:
+            primary: The (tool-bound) primary chat model.
+            secondary: The (tool-bound) secondary chat model, or None to disable hedging.
+            messages: The prompt messages.
+            guard (optional): Admits the hedge and is told how the secondary request ended.
+
+        Returns:
+            AIMessage: The winning response.
+        """
+        delay = self.hedge_delay()
+        started = time.perf_counter()
+        hedge_id = str(uuid.uuid4())
+        race = _Race()
+        futures = {}
+        race.start(PRIMARY)
+        futures[PRIMARY] = self._pool.submit(self._consume, primary, messages, race, PRIMARY, started, hedge_id)
+
+        winner = race.wait(delay)
+        hedged = (
+            winner is None
+            and secondary is not None
+            and bool(race.running)
+            and (guard is None or guard.admit())
+        )
+        if hedged:
+            logger.info(f"Primary model silent after {delay:.2f}s; hedging to secondary")
+            race.start(SECONDARY)
+            futures[SECONDARY] = self._pool.submit(
+                self._consume, secondary, messages, race, SECONDARY, time.perf_counter(), hedge_id, guard
+            )
+            winner = race.wait()
+        elif winner is None:
+            winner = race.wait()
+
+        self._record_outcome(hedged, winner)
+        if winner is None:
+            # Every contender failed before producing a token
+            return message_chunk_to_message(futures[PRIMARY].result())
+        return message_chunk_to_message(futures[winner].result())
+
+    async def _aconsume(self, model, messages, race: Dict[str, Any], label: str, started: float, guard=None):
+        chunks = None
+        try:
+            async for chunk in model.astream(messages, config=_contender_config(race["id"], label)):
+                if chunks is None:
+                    self._record(label, started)
+                    if not self._aclaim(race, label):
+                        wasted = self._record_waste(messages, chunk)
+                        if guard is not None:
+                            guard.done(False, wasted)
+                        return None
+                chunks = chunk if chunks is None else chunks + chunk
+            self._aclaim(race, label)
+            if guard is not None:
+                guard.done(False, self._used_tokens(chunks))
+            return chunks
+        except asyncio.CancelledError:
+            wasted = self._record_waste(messages, chunks)
+            if guard is not None:
+                guard.done(None, wasted)
+            raise
+        except Exception:
+            if guard is not None:
+                guard.done(True, None)
+            raise
+
+    @staticmethod
+    def _aclaim(race: Dict[str, Any], label: str) -> bool:
+        if race["winner"] is None:
+            race["winner"] = label
+            race["decided"].set()
+        return race["winner"] == label
+
+    async def ainvoke(self, primary, secondary, messages: List[BaseMessage], guard=None):
+        """Async counterpart of invoke; the losing request's task is cancelled."""
+        delay = self.hedge_delay()
+        race = {"id": str(uuid.uuid4()), "winner": None, "decided": asyncio.Event()}
+        tasks = {
+            PRIMARY: asyncio.ensure_future(
+                self._aconsume(primary, messages, race, PRIMARY, time.perf_counter())
+            )
+        }
+        decided = asyncio.ensure_future(race["decided"].wait())
+        try:
+            done, _ = await asyncio.wait(
+                {decided, tasks[PRIMARY]}, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            hedged = (
+                not done
+                and secondary is not None
+                and (guard is None or await asyncio.to_thread(guard.admit))
+            )
+            if hedged:
+                logger.info(f"Primary model silent after {delay:.2f}s; hedging to secondary")
+                tasks[SECONDARY] = asyncio.ensure_future(
+                    self._aconsume(secondary, messages, race, SECONDARY, time.perf_counter(), guard)
+                )
+            # Wait for a winner; a contender that fails before any chunk leaves the race
+            while not race["decided"].is_set():
+                running = [task for task in tasks.values() if not task.done()]
+                if not running:
+                    break
+                await asyncio.wait({decided, *running}, return_when=asyncio.FIRST_COMPLETED)
+
+            winner = race["winner"] or PRIMARY
+            for label, task in tasks.items():
+                if label != winner and not task.done():
+                    task.cancel()
+            self._record_outcome(hedged, race["winner"])
+            return message_chunk_to_message(await tasks[winner])
+        finally:
+            decided.cancel()
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            secondary_task = tasks.get(SECONDARY)
+            if guard is not None and secondary_task is not None:
+                # Covers a task cancelled before it started; a guard counts only the first done()
+                secondary_task.add_done_callback(lambda _: guard.done(None, None))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedge counts, wasted tokens and the current hedge delay."""
+        with self._lock:
+            samples = list(self._samples)
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "secondary_wins": self.secondary_wins,
+            "wasted_input_tokens": self.wasted_input_tokens,
+            "wasted_output_tokens": self.wasted_output_tokens,
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "primary_ttft_p50_ms": round(percentile(samples, 50) * 1000, 1) if samples else None,
+        }
+
+
+def build_hedger() -> Optional[HedgedModelCaller]:
+    """
+    Build the hedged model caller from HedgeSettings.
+
+    Returns:
+        HedgedModelCaller: The shared caller, or None when hedging is disabled.
+    """
+    if not hedge_settings.hedge_enabled:
+        return None
+    logger.info(f"Hedged model requests enabled (secondary: {hedge_settings.hedge_secondary_model_name})")
+    return HedgedModelCaller(
+        percentile=hedge_settings.hedge_percentile,
+        initial_delay=hedge_settings.hedge_initial_delay_seconds,
+        min_delay=hedge_settings.hedge_min_delay_seconds,
+        max_delay=hedge_settings.hedge_max_delay_seconds,
+        window_size=hedge_settings.hedge_window_size,
+        min_samples=hedge_settings.hedge_min_samples,
+    )
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+from TARS.config.config import llm_cache_settings, storage_settings
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+CACHE_HIT_TAG = "llm_cache_hit"
+
+
+def _model_identity(model) -> Tuple[str, Any, Any]:
+    """Return (model id, temperature, bound kwargs) for a model or a tool-bound model."""
+    bound = getattr(model, "bound", model)
+    name = getattr(bound, "model_name", None) or getattr(bound, "model", None)
+    model_id = f"{type(bound).__name__}:{name}"
+    return model_id, getattr(bound, "temperature", None), getattr(model, "kwargs", {})
+
+
+def _message_payload(message: BaseMessage) -> dict:
+    # Message ids and response metadata differ between replays of the same prompt
+    return {
+        "type": message.type,
+        "content": message.content,
+        "name": message.name,
+        "tool_calls": getattr(message, "tool_calls", None),
+        "tool_call_id": getattr(message, "tool_call_id", None),
+    }
+
+
+def make_llm_cache_key(
+    model_id: str, bound_kwargs: Any, temperature: Any, messages: Sequence[BaseMessage]
+) -> str:
+    """
+    Build the cache key for a model call.
+
+    Args:
+        model_id (str): The provider class and model name.
+        bound_kwargs: The kwargs bound to the model, including tool schemas.
+        temperature: The sampling temperature.
+        messages: The prompt messages.
+
+    Returns:
+        str: A stable hex digest.
+    """
+    payload = json.dumps(
+        [model_id, bound_kwargs, temperature, [_message_payload(m) for m in messages]],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLLMCacheBackend:
+    """An in-process LRU store of serialized responses."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteLLMCacheBackend:
+    """
+    A SQLite store of serialized responses, shared across processes and restarts.
+
+    Entries beyond max_entries are evicted oldest-written first.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_responses_created ON llm_responses (created_at)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, created_at, value) VALUES (?, ?, ?)",
+                (key, time.time(), value),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self.evictions += max(0, evicted)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+def _tag_trace(key: str) -> None:
+    """Tag the current LangSmith run, if any, as served from the cache."""
+    try:
+        from langsmith.run_helpers import get_current_run_tree
+
+        run_tree = get_current_run_tree()
+        if run_tree is not None:
+            run_tree.add_tags([CACHE_HIT_TAG])
+            run_tree.add_metadata({"llm_cache_key": key})
+    except Exception as e:
+        logger.debug(f"Could not tag trace with cache hit: {e}")
+
+
+class LLMResponseCache:
+    """
+    An exact-match cache of model responses.
+
+    The key covers the model id, the bound kwargs (tool schemas, tool_choice),
+    the temperature and the prompt messages. Calls whose temperature is unset
+    or above max_temperature bypass the cache, since their output is not
+    meant to be reproducible.
+    """
+
+    def __init__(self, backend, max_temperature: float = 0.0):
+        self.backend = backend
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def lookup(self, model, messages: Sequence[BaseMessage]) -> Tuple[Optional[str], Optional[AIMessage]]:
+        """
+        Look up the response for a model call.
+
+        Args:
+            model: The (tool-bound) chat model about to be invoked.
+            messages: The prompt messages.
+
+        Returns:
+            tuple: (key, cached response). The key is None when the call
+            bypasses the cache; the response is None on a miss.
+        """
+        model_id, temperature, bound_kwargs = _model_identity(model)
+        if temperature is None or temperature > self.max_temperature:
+            self.bypassed += 1
+            return None, None
+
+        key = make_llm_cache_key(model_id, bound_kwargs, temperature, messages)
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return key, None
+
+        self.hits += 1
+        response = messages_from_dict([json.loads(value)])[0]
+        response.response_metadata = {**response.response_metadata, "cache_hit": True}
+        logger.info(f"LLM cache hit for {model_id}")
+        _tag_trace(key)
+        return key, response
+
+    def store(self, key: Optional[str], response: BaseMessage) -> None:
+        """Cache a response under a key returned by lookup."""
+        if key is None:
+            return
+        data = message_to_dict(response)
+        # A fresh id is assigned on every hit so replays never replace each other in state
+        data["data"]["id"] = None
+        self.backend.set(key, json.dumps(data, default=str))
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of stored responses."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "entries": len(self.backend),
+        }
+
+
+def build_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Build the LLM response cache from LLMCacheSettings.
+
+    Returns:
+        LLMResponseCache: The shared cache, or None when disabled.
+    """
+    if not llm_cache_settings.llm_cache_enabled:
+        return None
+    if llm_cache_settings.llm_cache_backend == "sqlite":
+        backend = SQLiteLLMCacheBackend(
+            os.path.join(storage_settings.data_dir, llm_cache_settings.llm_cache_db_file),
+            max_entries=llm_cache_settings.llm_cache_max_entries,
+        )
+    elif llm_cache_settings.llm_cache_backend == "memory":
+        backend = MemoryLLMCacheBackend(max_entries=llm_cache_settings.llm_cache_max_entries)
+    else:
+        raise ValueError(f"Unsupported LLM cache backend: {llm_cache_settings.llm_cache_backend}")
+    logger.info(f"LLM response cache enabled ({llm_cache_settings.llm_cache_backend} backend)")
+    return LLMResponseCache(backend, max_temperature=llm_cache_settings.llm_cache_max_temperature)
@@ -0,0 +1,204 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from TARS.config.config import (
+    anthropic_settings,
+    google_ai_settings,
+    graph_config,
+    openai_settings,
+)
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("openai", "anthropic", "google")
+
+
+def _build_openai(model: str):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(temperature=openai_settings.openai_temperature, model_name=model)
+
+
+def _build_anthropic(model: str):
+    from langchain_anthropic import ChatAnthropic
+
+    return ChatAnthropic(temperature=anthropic_settings.anthropic_temperature, model_name=model)
+
+
+def _build_google(model: str):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(temperature=google_ai_settings.google_ai_temperature, model=model)
+
+
+_BUILDERS = {
+    "openai": _build_openai,
+    "anthropic": _build_anthropic,
+    "google": _build_google,
+}
+
+
+def _default_model(provider: str) -> Optional[str]:
+    return {
+        "openai": openai_settings.openai_model,
+        "anthropic": anthropic_settings.anthropic_model,
+        "google": google_ai_settings.google_ai_model,
+    }[provider]
+
+
+def resolve_model_name(model_name: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Resolve a requested model name into (provider, model).
+
+    Accepts a provider ("anthropic"), which uses the provider's configured
+    model, or "provider:model" ("openai:gpt-4o-mini"). None falls back to
+    GraphConfig.agent_model_name.
+
+    Args:
+        model_name (str, optional): The requested model name.
+
+    Returns:
+        tuple: (provider, model).
+
+    Raises:
+        ValueError: If the provider is not supported.
+    """
+    model_name = model_name or graph_config.agent_model_name
+    provider, _, model = model_name.partition(":")
+    provider = provider.strip().lower()
+    if provider not in _BUILDERS:
+        raise ValueError(f"Unsupported model type: {provider}")
+    return provider, model.strip() or _default_model(provider)
+
+
+def is_requestable(model_name: str) -> bool:
+    """
+    Check that a request may pick a model.
+
+    Only the models in GraphConfig.requestable_models (by default
+    agent_model_name and model_pool) may be requested, so clients cannot pick
+    arbitrary (and arbitrarily expensive) models, and the registry only ever
+    builds a bounded set of clients.
+
+    Args:
+        model_name (str): A provider or "provider:model".
+
+    Returns:
+        bool: True if the model may be requested.
+    """
+    allowed = graph_config.requestable_models or [graph_config.agent_model_name, *graph_config.model_pool]
+    try:
+        return resolve_model_name(model_name) in {resolve_model_name(name) for name in allowed if name}
+    except ValueError:
+        return False
+
+
+class ModelRegistry:
+    """
+    A pool of chat models, built once per (provider, model) and bound to
+    tools once per (provider, model, tool set).
+
+    Building a provider client and converting tool schemas is done at most
+    once per key, so requests can pick any model via configurable.model_name
+    without paying construction cost on the hot path. Per-turn tool subsets
+    create more bound variants, so the least recently used are evicted
+    beyond max_bound_variants.
+    """
+
+    def __init__(self, max_bound_variants: int = 64):
+        self.max_bound_variants = max_bound_variants
+        self._base: Dict[Tuple[str, Optional[str]], Any] = {}
+        self._bound: "OrderedDict[Tuple[str, Optional[str], Tuple[str, ...]], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_base(self, model_name: Optional[str] = None):
+        """
+        Return the unbound chat model for a model name, building it on first use.
+
+        Args:
+            model_name (str, optional): A provider or "provider:model".
+
+        Returns:
+            BaseChatModel: The chat model.
+        """
+        key = resolve_model_name(model_name)
+        model = self._base.get(key)
+        if model is None:
+            with self._lock:
+                model = self._base.get(key)
+                if model is None:
+                    logger.info(f"Initializing {key[0]} model {key[1]}")
+                    model = self._base[key] = _BUILDERS[key[0]](key[1])
+        return model
+
+    def get_bound(self, model_name: Optional[str], tools: Sequence):
+        """
+        Return the chat model for a model name with the given tools bound.
+
+        Args:
+            model_name (str, optional): A provider or "provider:model".
+            tools: The tools to bind.
+
+        Returns:
+            Runnable: The tool-bound chat model.
+        """
+        provider, model = resolve_model_name(model_name)
+        key = (provider, model, tuple(tool.name for tool in tools))
+        bound = self._bound.get(key)
+        if bound is None:
+            base = self.get_base(f"{provider}:{model}" if model else provider)
+            with self._lock:
+                bound = self._bound.get(key)
+                if bound is None:
+                    logger.info(f"Binding {len(tools)} tools to {provider} model {model}")
+                    bound = self._bound[key] = base.bind_tools(list(tools))
+                    while len(self._bound) > self.max_bound_variants:
+                        self._bound.popitem(last=False)
+        else:
+            with self._lock:
+                if key in self._bound:
+                    self._bound.move_to_end(key)
+        return bound
+
+    def warm(self, model_names: Sequence[str], tools: Sequence) -> List[str]:
+        """
+        Build and bind the given models ahead of traffic.
+
+        Models that fail to build (e.g. a missing API key) are logged and
+        skipped, so one misconfigured provider does not block startup.
+
+        Args:
+            model_names: Providers or "provider:model" names.
+            tools: The tools to bind.
+
+        Returns:
+            List[str]: The model names that were warmed.
+        """
+        warmed = []
+        for model_name in model_names:
+            try:
+                self.get_bound(model_name, tools)
+                warmed.append(model_name)
+            except Exception as e:
+                logger.warning(f"Could not warm model {model_name}: {e}")
+        return warmed
+
+    def pool(self) -> List[Dict[str, Any]]:
+        """Describe the models currently built and the tool sets bound to them."""
+        return [
+            {"provider": provider, "model": model, "tools": list(tool_names)}
+            for provider, model, tool_names in list(self._bound)
+        ]
+
+    def clear(self) -> None:
+        """Drop every built model."""
+        with self._lock:
+            self._base.clear()
+            self._bound.clear()
+
+
+# Shared registry used by the agent nodes
+model_registry = ModelRegistry()
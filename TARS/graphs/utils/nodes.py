@@ -1,56 +1,327 @@
-from datetime import datetime
-from functools import lru_cache
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+import asyncio
 import logging
+import threading
+import time
 
 from TARS.config.config import (
-    anthropic_settings,
-    google_ai_settings,
+    circuit_breaker_settings,
     graph_config,
-    openai_settings,
+    hedge_settings,
+    rate_limit_settings,
+    router_settings,
 )
-from TARS.graphs.utils.tools import tools
-from langchain_anthropic import ChatAnthropic
-from langchain_community.vectorstores import Chroma
-from langchain_core.messages import SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langgraph.prebuilt import ToolNode
-from pydantic import BaseModel
+from TARS.graphs.utils.budget import (
+    BUDGET_EXHAUSTED,
+    DEADLINE,
+    BudgetExceeded,
+    acall_with_timeout,
+    call_with_timeout,
+    clamp_timeout,
+    current_turn,
+    exhausted,
+)
+from TARS.graphs.utils.checkpointer import answer_dangling_tool_calls
+from TARS.graphs.utils.circuit_breaker import CircuitOpenError, OPEN, build_circuit_breakers
+from TARS.graphs.utils.context import (
+    build_summary_prompt,
+    count_messages_tokens,
+    count_text_tokens,
+    plan_summarization,
+)
+from TARS.graphs.utils.events import content_text
+from TARS.graphs.utils.executor import build_tool_executor
+from TARS.graphs.utils.hedging import build_hedger
+from TARS.graphs.utils.llm_cache import build_llm_cache
+from TARS.graphs.utils.models import model_registry, resolve_model_name
+from TARS.graphs.utils.rate_limiter import RateLimitTimeout, rate_limiter
+from TARS.graphs.utils.router import (
+    AGENT,
+    CLASSIFIER_PROMPT,
+    FAST,
+    classify_heuristic,
+    parse_classifier_reply,
+    router_stats,
+)
+from TARS.graphs.utils.tool_selector import build_tool_selector
+from TARS.graphs.utils.tools import tool_registry
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Only the enabled tools are imported and constructed
+tools = tool_registry.enabled_tools()
 
-@lru_cache(maxsize=4)
-def _get_model(model_name: str):
-    logger.info(f"Getting model for model_name: {model_name}")
-    logger.info(f"Graph config agent_model_name: {graph_config.agent_model_name}")
-    
-    if graph_config.agent_model_name == "openai":
-        logger.info("Initializing OpenAI model")
-        model = ChatOpenAI(temperature=0, model_name=openai_settings.openai_model)
-    elif graph_config.agent_model_name == "anthropic":
-        logger.info("Initializing Anthropic model")
-        model = ChatAnthropic(
-            temperature=0, model_name=anthropic_settings.anthropic_model
-        )
-    elif graph_config.agent_model_name == "google":
-        logger.info("Initializing Google AI model")
-        model = ChatGoogleGenerativeAI(
-            temperature=0, model_name=google_ai_settings.google_ai_model
-        )
-    else:
-        logger.error(f"Unsupported model type: {graph_config.agent_model_name}")
-        raise ValueError(f"Unsupported model type: {graph_config.agent_model_name}")
+# Exact-match response cache for deterministic model calls (None when disabled)
+llm_cache = build_llm_cache()
+
+# Hedges stalled model calls to a secondary provider (None when disabled)
+hedger = build_hedger()
+
+# Per-provider and per-tool circuit breakers, shared by every thread in this process
+circuit_breakers = build_circuit_breakers()
+
+# Picks the tools bound for each model call (None binds every tool)
+tool_selector = build_tool_selector(tools)
+
+
+def _get_base_model(model_name: str = None):
+    """Return the unbound chat model for a provider or "provider:model" name."""
+    return model_registry.get_base(model_name)
+
+
+def _get_model(model_name: str = None, selected_tools: List = None):
+    """Return the chat model for a provider or "provider:model" name, bound to selected_tools (default: all tools)."""
+    return model_registry.get_bound(model_name, tools if selected_tools is None else selected_tools)
+
+
+def _select_tools(messages: List) -> List:
+    """The tools worth binding for a model call over these messages."""
+    if tool_selector is None:
+        return tools
+    try:
+        return tool_selector.select(messages)
+    except Exception as e:
+        logger.warning(f"Tool selection failed, binding every tool: {e}")
+        return tools
+
+
+def _model_name(config) -> str:
+    """The model requested via configurable.model_name, or the configured default."""
+    return config.get("configurable", {}).get("model_name") or graph_config.agent_model_name
+
+
+def _get_hedge_model(model_name: str, selected_tools: List = None):
+    """
+    Return the tool-bound secondary model to hedge a call to model_name with.
+
+    Returns:
+        The secondary model, or None when hedging is disabled, the secondary
+        is the same provider, or it cannot be built.
+    """
+    if hedger is None:
+        return None
+    try:
+        secondary_name = hedge_settings.hedge_secondary_model_name
+        provider = resolve_model_name(secondary_name)[0]
+        if provider == resolve_model_name(model_name)[0]:
+            return None
+        breaker = circuit_breakers.get(f"model:{provider}")
+        if breaker is not None and breaker.state == OPEN:
+            return None
+        return _get_model(secondary_name, selected_tools)
+    except Exception as e:
+        logger.warning(f"Hedging disabled for this call: {e}")
+        return None
+
+
+class _HedgeGuard:
+    """
+    Puts a hedge to the secondary provider behind that provider's own rate
+    limit and circuit breaker, as _invoke_model does for the primary.
+
+    The hedge fires only if the breaker admits it and the rate limit has
+    capacity right now (a hedge that has to queue is too late to help).
+    """
+
+    def __init__(self, provider: str, messages: List):
+        self.provider = provider
+        self.breaker = circuit_breakers.get(f"model:{provider}")
+        self.reserved = _reserved_tokens(messages)
+        self._done = False
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        """Take the secondary's breaker slot and rate-limit capacity; False to skip the hedge."""
+        if self.breaker is not None and not self.breaker.allow():
+            logger.info(f"Circuit model:{self.provider} open; not hedging")
+            return False
+        try:
+            if rate_limiter is not None:
+                rate_limiter.reserve(self.provider, self.reserved, max_wait=0.0)
+        except Exception as e:
+            if self.breaker is not None:
+                self.breaker.release()
+            logger.info(f"Not hedging to {self.provider}: {e}")
+            return False
+        return True
+
+    def done(self, failed: Optional[bool], used_tokens: Optional[int]) -> None:
+        """Record how the secondary request ended; only the first call counts."""
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        if self.breaker is not None:
+            if failed is None:
+                self.breaker.release()
+            elif failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if rate_limiter is not None:
+            rate_limiter.settle(self.provider, self.reserved, used_tokens)
+
+
+def _hedge_guard(messages: List) -> _HedgeGuard:
+    """The guard for a hedge of this prompt to the configured secondary model."""
+    return _HedgeGuard(resolve_model_name(hedge_settings.hedge_secondary_model_name)[0], messages)
+
+
+def _select_model(model_name: str):
+    """
+    Pick the requested model, or the fallback model while its provider's breaker is open.
+
+    Returns:
+        tuple: (model name, circuit breaker or None).
 
-    logger.info("Binding tools to model")
-    model = model.bind_tools(tools)
-    logger.info("Model initialization complete")
-    return model
+    Raises:
+        CircuitOpenError: If every candidate provider's breaker is open.
+    """
+    candidates = [model_name]
+    fallback = circuit_breaker_settings.circuit_fallback_model_name
+    if fallback and resolve_model_name(fallback)[0] != resolve_model_name(model_name)[0]:
+        candidates.append(fallback)
 
+    refused = None
+    for candidate in candidates:
+        name = f"model:{resolve_model_name(candidate)[0]}"
+        breaker = circuit_breakers.get(name)
+        if breaker is None or breaker.allow():
+            if refused is not None:
+                logger.warning(f"Circuit {refused.name} open; rerouting to {candidate}")
+            return candidate, breaker
+        refused = CircuitOpenError(name, breaker.retry_after())
+    raise refused
 
-def should_continue(state):
+
+def _reserved_tokens(messages: List) -> int:
+    """The tokens reserved against the provider's rate limit for one call."""
+    return count_messages_tokens(messages) + rate_limit_settings.rate_limit_output_token_estimate
+
+
+def _after_wait(timeout: Optional[float], waited: float) -> Optional[float]:
+    """The time left for a call once it has queued for waited seconds."""
+    return None if timeout is None else max(0.0, timeout - waited)
+
+
+def _settle_usage(provider: str, reserved: int, response) -> None:
+    if rate_limiter is not None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        rate_limiter.settle(provider, reserved, usage.get("total_tokens"))
+
+
+def _invoke_model(
+    model_name: str,
+    messages: List,
+    bind_tools: bool = True,
+    selected_tools: List = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Invoke the model for model_name behind its provider's rate limit and circuit breaker.
+
+    Calls queue while the provider's shared rate limit is exhausted, for no
+    longer than timeout; the call itself gets what is left of it.
+
+    Args:
+        model_name (str): A provider or "provider:model".
+        messages: The prompt messages.
+        bind_tools (bool): Use the tool-bound model (and hedging) rather than the bare model.
+        selected_tools: The tools to bind (default: all tools).
+        timeout (float, optional): Seconds left in the request's budget.
+
+    Returns:
+        tuple: (response, name of the model that produced it).
+
+    Raises:
+        BudgetExceeded: If the call does not finish within timeout.
+    """
+    selected, breaker = _select_model(model_name)
+    provider = resolve_model_name(selected)[0]
+    reserved = _reserved_tokens(messages)
+    try:
+        if rate_limiter is not None:
+            waited = rate_limiter.acquire(provider, reserved, max_wait=timeout)
+            timeout = _after_wait(timeout, waited)
+    except RateLimitTimeout:
+        if breaker is not None:
+            breaker.release()
+        raise
+    try:
+        if bind_tools:
+            model = _get_model(selected, selected_tools)
+            secondary = _get_hedge_model(selected, selected_tools)
+        else:
+            model, secondary = _get_base_model(selected), None
+        if secondary is not None:
+            guard = _hedge_guard(messages)
+            response = call_with_timeout(lambda: hedger.invoke(model, secondary, messages, guard), timeout)
+        else:
+            response = call_with_timeout(lambda: model.invoke(messages), timeout)
+    except BudgetExceeded:
+        # Running out of the request's time says nothing about the provider's health
+        if breaker is not None:
+            breaker.release()
+        raise
+    except Exception:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    if breaker is not None:
+        breaker.record_success()
+    _settle_usage(provider, reserved, response)
+    return response, selected
+
+
+async def _ainvoke_model(
+    model_name: str,
+    messages: List,
+    bind_tools: bool = True,
+    selected_tools: List = None,
+    timeout: Optional[float] = None,
+):
+    """Async counterpart of _invoke_model."""
+    selected, breaker = _select_model(model_name)
+    provider = resolve_model_name(selected)[0]
+    reserved = _reserved_tokens(messages)
+    try:
+        if rate_limiter is not None:
+            waited = await rate_limiter.aacquire(provider, reserved, max_wait=timeout)
+            timeout = _after_wait(timeout, waited)
+    except (RateLimitTimeout, asyncio.CancelledError):
+        if breaker is not None:
+            breaker.release()
+        raise
+    try:
+        if bind_tools:
+            model = _get_model(selected, selected_tools)
+            secondary = _get_hedge_model(selected, selected_tools)
+        else:
+            model, secondary = _get_base_model(selected), None
+        if secondary is not None:
+            response = await acall_with_timeout(
+                hedger.ainvoke(model, secondary, messages, _hedge_guard(messages)), timeout
+            )
+        else:
+            response = await acall_with_timeout(model.ainvoke(messages), timeout)
+    except (BudgetExceeded, asyncio.CancelledError):
+        if breaker is not None:
+            breaker.release()
+        raise
+    except Exception:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    if breaker is not None:
+        breaker.record_success()
+    _settle_usage(provider, reserved, response)
+    return response, selected
+
+
+def should_continue(state, config=None):
     logger.info(f"should_continue called with state: {state}")
     messages = state["messages"]
     last_message = messages[-1]
@@ -60,46 +331,177 @@ def should_continue(state):
     if not last_message.tool_calls:
         logger.info("No tool calls, returning 'end'")
         return "end"
+    spent = exhausted(messages, config)
+    if spent is not None:
+        logger.warning(f"Request {spent} budget spent, returning 'finalize'")
+        return "finalize"
     logger.info("Has tool calls, returning 'continue'")
     return "continue"
 
 
+def after_tools(state, config=None) -> str:
+    """Conditional edge after the tools: back to the agent, or answer now if the budget is spent."""
+    spent = exhausted(state["messages"], config, check_steps=False)
+    if spent is not None:
+        logger.warning(f"Request {spent} budget spent after tools, returning 'finalize'")
+        return "finalize"
+    return "agent"
+
+
 system_prompt = """You are TARS, an AI assistant with an edgy, sarcastic, geeky sense of humor. 
 Use the provided context and memory to maintain consistent, personalized interactions."""
 
 
+def _system_content(user_name: str, summary: str = None) -> str:
+    """Build the system prompt, including the rolling summary of older turns."""
+    content = f"{system_prompt}\n\nContext: {user_name}"
+    if summary:
+        content += f"\n\nSummary of the earlier conversation:\n{summary}"
+    return content
+
+
+def _plan_context(state, config):
+    """
+    Decide which old messages to fold into the summary for the current model budget.
+
+    Returns:
+        The messages to summarize (possibly empty).
+    """
+    messages = [msg for msg in state["messages"] if not isinstance(msg, SystemMessage)]
+    user_name = config.get("configurable", {}).get("thread_id", "default_user")
+    provider, _ = resolve_model_name(_model_name(config))
+    budget = graph_config.context_token_budgets.get(
+        provider, graph_config.context_default_token_budget
+    )
+    fixed_tokens = count_text_tokens(_system_content(user_name, state.get("summary")))
+    return plan_summarization(
+        messages, budget, graph_config.context_keep_recent_turns, fixed_tokens
+    )
+
+
+def _context_update(state, to_summarize, summary_message) -> Dict[str, Any]:
+    """Replace the summarized messages with the updated rolling summary."""
+    logger.info(f"Folded {len(to_summarize)} messages into the conversation summary")
+    return {
+        "summary": content_text(summary_message.content),
+        "messages": [RemoveMessage(id=msg.id) for msg in to_summarize],
+    }
+
+
+def manage_context(state, config):
+    """
+    Keep the prompt within the model's token budget.
+
+    When the conversation exceeds the budget configured in GraphConfig, the
+    oldest turns are folded into a rolling summary kept in AgentState and
+    removed from the message list; recent turns stay verbatim. The summary
+    call goes through the same rate limit, circuit breaker and deadline as
+    the agent's own model calls.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        dict: The state update (empty when within budget).
+    """
+    to_summarize = _plan_context(state, config)
+    if not to_summarize:
+        return {}
+    try:
+        prompt = build_summary_prompt(state.get("summary"), to_summarize)
+        summary_message, _ = _invoke_model(
+            _model_name(config),
+            [HumanMessage(content=prompt)],
+            bind_tools=False,
+            timeout=clamp_timeout(None, config),
+        )
+        return _context_update(state, to_summarize, summary_message)
+    except Exception as e:
+        # A failed summary should never fail the turn; retry on the next one
+        logger.error(f"Error summarizing context: {str(e)}", exc_info=True)
+        return {}
+
+
+async def amanage_context(state, config):
+    """Async counterpart of manage_context."""
+    to_summarize = _plan_context(state, config)
+    if not to_summarize:
+        return {}
+    try:
+        prompt = build_summary_prompt(state.get("summary"), to_summarize)
+        summary_message, _ = await _ainvoke_model(
+            _model_name(config),
+            [HumanMessage(content=prompt)],
+            bind_tools=False,
+            timeout=clamp_timeout(None, config),
+        )
+        return _context_update(state, to_summarize, summary_message)
+    except Exception as e:
+        logger.error(f"Error summarizing context: {str(e)}", exc_info=True)
+        return {}
+
+
+def _prepare_messages(state, config) -> List:
+    """
+    Build the message list sent to the model for the current agent step.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        The system message followed by every non-system message in state.
+    """
+    messages = state["messages"]
+    user_name = config.get("configurable", {}).get("thread_id", "default_user")
+    logger.info(f"Processing for user_name: {user_name}")
+    logger.info(f"Number of messages: {len(messages)}")
+
+    # Filter out any existing system messages, and answer tool calls an earlier turn left dangling
+    non_system_messages = answer_dangling_tool_calls(
+        [msg for msg in messages if not isinstance(msg, SystemMessage)]
+    )
+    logger.info(f"Non-system messages count: {len(non_system_messages)}")
+
+    # Create a single system message with combined context
+    full_messages = [
+        SystemMessage(content=_system_content(user_name, state.get("summary")))
+    ] + non_system_messages
+    logger.info(f"Created {len(full_messages)} full messages")
+    return full_messages
+
+
 def call_model(state, config):
     logger.info("=== CALL MODEL START ===")
     logger.info(f"Input state: {state}")
     logger.info(f"Input config: {config}")
     
     try:
-        messages = state["messages"]
-        user_name = config.get("configurable", {}).get("thread_id", "default_user")
-        logger.info(f"Processing for user_name: {user_name}")
-        logger.info(f"Number of messages: {len(messages)}")
-
-        # Filter out any existing system messages
-        non_system_messages = [
-            msg for msg in messages if not isinstance(msg, SystemMessage)
-        ]
-        logger.info(f"Non-system messages count: {len(non_system_messages)}")
-
-        # Create a single system message with combined context
-        full_messages = [
-            SystemMessage(content=f"{system_prompt}\n\nContext: {user_name}")
-        ] + non_system_messages
-        logger.info(f"Created {len(full_messages)} full messages")
-
-        model_name = config.get("configurable", {}).get("model_name", "anthropic")
+        full_messages = _prepare_messages(state, config)
+
+        model_name = _model_name(config)
         logger.info(f"Using model_name: {model_name}")
         
         logger.info("Getting model...")
-        model = _get_model(model_name)
+        selected_tools = _select_tools(full_messages)
+        model = _get_model(model_name, selected_tools)
         logger.info("Model retrieved successfully")
         
-        logger.info("Invoking model...")
-        response = model.invoke(full_messages)
+        cache_key, response = llm_cache.lookup(model, full_messages) if llm_cache else (None, None)
+        if response is None:
+            logger.info("Invoking model...")
+            started = time.perf_counter()
+            response, used_model_name = _invoke_model(
+                model_name,
+                full_messages,
+                selected_tools=selected_tools,
+                timeout=clamp_timeout(None, config),
+            )
+            router_stats.record_agent_call((time.perf_counter() - started) * 1000)
+            # A response from the fallback model is not cached under the requested model
+            if llm_cache and used_model_name == model_name:
+                llm_cache.store(cache_key, response)
         logger.info(f"Model response: {response}")
         logger.info(f"Model response content: {response.content}")
 
@@ -108,12 +510,408 @@ def call_model(state, config):
         logger.info(f"Returning result: {result}")
         logger.info("=== CALL MODEL SUCCESS ===")
         return result
-        
+
+    except BudgetExceeded as e:
+        logger.warning(f"call_model: {e}")
+        return {"messages": [best_effort_answer(state["messages"], DEADLINE)]}
     except Exception as e:
         logger.error(f"Error in call_model: {str(e)}", exc_info=True)
         logger.info("=== CALL MODEL ERROR ===")
         raise
 
 
-# Define the function to execute tools
-tool_node = ToolNode(tools)
+async def acall_model(state, config):
+    """
+    Async counterpart of call_model, used when the graph runs via astream/ainvoke.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        dict: The state update containing the model response.
+    """
+    logger.info("=== ASYNC CALL MODEL START ===")
+
+    try:
+        full_messages = _prepare_messages(state, config)
+
+        model_name = _model_name(config)
+        logger.info(f"Using model_name: {model_name}")
+
+        selected_tools = _select_tools(full_messages)
+        model = _get_model(model_name, selected_tools)
+
+        cache_key, response = llm_cache.lookup(model, full_messages) if llm_cache else (None, None)
+        if response is None:
+            logger.info("Invoking model asynchronously...")
+            started = time.perf_counter()
+            response, used_model_name = await _ainvoke_model(
+                model_name,
+                full_messages,
+                selected_tools=selected_tools,
+                timeout=clamp_timeout(None, config),
+            )
+            router_stats.record_agent_call((time.perf_counter() - started) * 1000)
+            if llm_cache and used_model_name == model_name:
+                llm_cache.store(cache_key, response)
+        logger.info(f"Model response content: {response.content}")
+
+        logger.info("=== ASYNC CALL MODEL SUCCESS ===")
+        return {"messages": [response]}
+
+    except BudgetExceeded as e:
+        logger.warning(f"acall_model: {e}")
+        return {"messages": [best_effort_answer(state["messages"], DEADLINE)]}
+    except Exception as e:
+        logger.error(f"Error in acall_model: {str(e)}", exc_info=True)
+        logger.info("=== ASYNC CALL MODEL ERROR ===")
+        raise
+
+
+def _fast_model_name(config) -> str:
+    """The model used for fast-path replies and classification."""
+    return router_settings.router_fast_model_name or _model_name(config)
+
+
+def _latest_user_text(state) -> str:
+    """The text of the message that started this turn, or "" if the turn has moved on."""
+    messages = state["messages"]
+    if not messages or not isinstance(messages[-1], HumanMessage):
+        return ""
+    return content_text(messages[-1].content)
+
+
+def _heuristic_route(state):
+    """
+    Return (route, method) from the cheap checks, or (None, None) if they are unsure.
+    """
+    if not router_settings.router_enabled:
+        return AGENT, "disabled"
+    text = _latest_user_text(state)
+    if not text:
+        return AGENT, "default"
+    route = classify_heuristic(text, router_settings.router_max_fast_words)
+    if route is not None:
+        return route, "heuristic"
+    if not router_settings.router_classifier_enabled:
+        return AGENT, "default"
+    return None, None
+
+
+def _log_route(route: str, method: str, started: float) -> Dict[str, Any]:
+    router_stats.record_decision(route, method)
+    logger.info(
+        f"Router chose {route} ({method}) in {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+    return {"route": route}
+
+
+def route_request(state, config):
+    """
+    Decide whether this turn needs the tool-bound agent or the fast path.
+
+    Heuristics decide first; only when they are unsure and the classifier is
+    enabled is the fast model asked. Any classifier failure routes to the agent.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        dict: The state update with the chosen route.
+    """
+    started = time.perf_counter()
+    route, method = _heuristic_route(state)
+    if route is None:
+        prompt = [HumanMessage(content=CLASSIFIER_PROMPT.format(message=_latest_user_text(state)))]
+        try:
+            reply, _ = _invoke_model(_fast_model_name(config), prompt, bind_tools=False, timeout=clamp_timeout(None, config))
+            route, method = parse_classifier_reply(content_text(reply.content)), "classifier"
+        except Exception as e:
+            logger.warning(f"Router classifier failed, using the agent: {e}")
+            route, method = AGENT, "classifier_error"
+    return _log_route(route, method, started)
+
+
+async def aroute_request(state, config):
+    """Async counterpart of route_request."""
+    started = time.perf_counter()
+    route, method = _heuristic_route(state)
+    if route is None:
+        prompt = [HumanMessage(content=CLASSIFIER_PROMPT.format(message=_latest_user_text(state)))]
+        try:
+            reply, _ = await _ainvoke_model(_fast_model_name(config), prompt, bind_tools=False, timeout=clamp_timeout(None, config))
+            route, method = parse_classifier_reply(content_text(reply.content)), "classifier"
+        except Exception as e:
+            logger.warning(f"Router classifier failed, using the agent: {e}")
+            route, method = AGENT, "classifier_error"
+    return _log_route(route, method, started)
+
+
+def select_route(state) -> str:
+    """Conditional edge after the router."""
+    return state.get("route") or AGENT
+
+
+def _prepare_fast_messages(state, config) -> List:
+    """
+    The agent prompt without tool traffic, which an unbound model cannot accept.
+    """
+    return [
+        msg for msg in _prepare_messages(state, config)
+        if isinstance(msg, (SystemMessage, HumanMessage))
+        or (isinstance(msg, AIMessage) and not msg.tool_calls)
+    ]
+
+
+def _log_fast_reply(started: float) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    saved_ms = router_stats.record_fast_reply(elapsed_ms)
+    logger.info(f"Fast path answered in {elapsed_ms:.0f} ms (saved ~{saved_ms:.0f} ms)")
+
+
+def fast_reply(state, config):
+    """
+    Answer a trivial turn in one shot with the unbound fast model.
+
+    If the fast model fails, the turn falls back to the full agent so the
+    user still gets an answer.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        dict: The state update containing the model response.
+    """
+    started = time.perf_counter()
+    try:
+        response, _ = _invoke_model(
+            _fast_model_name(config),
+            _prepare_fast_messages(state, config),
+            bind_tools=False,
+            timeout=clamp_timeout(None, config),
+        )
+    except Exception as e:
+        logger.warning(f"Fast path failed, falling back to the agent: {e}")
+        return call_model(state, config)
+    _log_fast_reply(started)
+    return {"messages": [response]}
+
+
+async def afast_reply(state, config):
+    """Async counterpart of fast_reply."""
+    started = time.perf_counter()
+    try:
+        response, _ = await _ainvoke_model(
+            _fast_model_name(config),
+            _prepare_fast_messages(state, config),
+            bind_tools=False,
+            timeout=clamp_timeout(None, config),
+        )
+    except Exception as e:
+        logger.warning(f"Fast path failed, falling back to the agent: {e}")
+        return await acall_model(state, config)
+    _log_fast_reply(started)
+    return {"messages": [response]}
+
+
+# Appended to the prompt (not the state) once the request's budget is spent
+FINALIZE_PROMPT = """You have run out of {reason} for this request and cannot call any more tools.
+Answer my last message now, as well as you can, using only the information gathered so far.
+Say briefly what you could not finish."""
+
+
+def _skipped_tool_results(messages: List, reason: str) -> List[ToolMessage]:
+    """
+    Results for the tool calls the budget prevented, so every tool call in
+    the conversation has a result, as the providers require.
+    """
+    last_message = messages[-1] if messages else None
+    if not isinstance(last_message, AIMessage):
+        return []
+    return [
+        ToolMessage(
+            content=f"Not run: the {reason} budget for this request is spent.",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+            artifact={"budget_exhausted": reason},
+        )
+        for tool_call in last_message.tool_calls
+    ]
+
+
+def best_effort_answer(messages: List, reason: str) -> AIMessage:
+    """
+    The answer given when not even a final model call fits the budget: the
+    latest tool result of the turn, if any.
+    """
+    results = [
+        content_text(msg.content)
+        for msg in current_turn(messages)
+        if isinstance(msg, ToolMessage) and msg.status != "error"
+    ]
+    content = f"I ran out of {reason} before I could finish this request."
+    if results:
+        content += f" The latest result I found was:\n\n{results[-1][:2000]}"
+    else:
+        content += " Please try again, perhaps with a narrower request."
+    return AIMessage(content=content, response_metadata={BUDGET_EXHAUSTED: reason})
+
+
+def _mark_budget_exhausted(message: AIMessage, reason: str) -> AIMessage:
+    """Flag an answer cut short by the budget, so it is never cached."""
+    return message.model_copy(
+        update={"response_metadata": {**message.response_metadata, BUDGET_EXHAUSTED: reason}}
+    )
+
+
+def _prepare_finalize(state, config):
+    """Return (reason, skipped tool results, prompt) for the final answer."""
+    messages = state["messages"]
+    reason = exhausted(messages, config) or DEADLINE
+    skipped = _skipped_tool_results(messages, reason)
+    prompt = _prepare_messages({**state, "messages": list(messages) + skipped}, config)
+    prompt.append(HumanMessage(content=FINALIZE_PROMPT.format(reason=reason)))
+    return reason, skipped, prompt
+
+
+def _final_message(response, messages: List, reason: str) -> AIMessage:
+    """The model's answer, without any further tool calls it asked for."""
+    if not response.tool_calls:
+        return _mark_budget_exhausted(response, reason)
+    text = content_text(response.content)
+    if not text.strip():
+        return best_effort_answer(messages, reason)
+    return AIMessage(content=text, id=response.id, response_metadata={BUDGET_EXHAUSTED: reason})
+
+
+def finalize_answer(state, config):
+    """
+    Answer with the best result so far once the request's budget is spent.
+
+    Pending tool calls are answered as skipped, and the model is asked for a
+    final answer without tools, within GraphConfig.agent_finalize_seconds.
+    If that fails too, the latest tool result of the turn is returned.
+
+    Args:
+        state: The current agent state.
+        config: The runnable config for this run.
+
+    Returns:
+        dict: The state update with the skipped tool results and the final answer.
+    """
+    reason, skipped, prompt = _prepare_finalize(state, config)
+    try:
+        response, _ = _invoke_model(
+            _model_name(config),
+            prompt,
+            selected_tools=_select_tools(prompt),
+            timeout=graph_config.agent_finalize_seconds,
+        )
+        answer = _final_message(response, list(state["messages"]) + skipped, reason)
+    except Exception as e:
+        logger.warning(f"Final answer after the {reason} budget failed: {e}")
+        answer = best_effort_answer(list(state["messages"]) + skipped, reason)
+    return {"messages": skipped + [answer]}
+
+
+async def afinalize_answer(state, config):
+    """Async counterpart of finalize_answer."""
+    reason, skipped, prompt = _prepare_finalize(state, config)
+    try:
+        response, _ = await _ainvoke_model(
+            _model_name(config),
+            prompt,
+            selected_tools=_select_tools(prompt),
+            timeout=graph_config.agent_finalize_seconds,
+        )
+        answer = _final_message(response, list(state["messages"]) + skipped, reason)
+    except Exception as e:
+        logger.warning(f"Final answer after the {reason} budget failed: {e}")
+        answer = best_effort_answer(list(state["messages"]) + skipped, reason)
+    return {"messages": skipped + [answer]}
+
+
+def warm_models() -> List[str]:
+    """
+    Build and bind the configured model pool ahead of traffic.
+
+    Not run at import: building the clients imports the provider SDKs, which
+    dominates cold start. Surfaces call this in the background once they are
+    up (see core_agent.start_warmup); until then the first request builds
+    what it needs. The fast-path model is built unbound as well.
+
+    Returns:
+        List[str]: The model names that were warmed.
+    """
+    started = time.perf_counter()
+    warmed = model_registry.warm(graph_config.model_pool or [graph_config.agent_model_name], tools)
+    if router_settings.router_enabled and router_settings.router_fast_model_name:
+        _get_base_model(router_settings.router_fast_model_name)
+    logger.info(f"Warmed models {warmed} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return warmed
+
+
+# Smallest useful request; only sent to open each provider's connection pool
+PING_PROMPT = "Reply with the single word: ok"
+
+
+def ping_models(model_names: List[str]) -> List[str]:
+    """
+    Send one tiny request to each model, so the HTTP connection pool and TLS
+    session exist before the first user request.
+
+    Args:
+        model_names: Providers or "provider:model" names.
+
+    Returns:
+        List[str]: The model names that answered.
+    """
+    answered = []
+    for model_name in model_names:
+        try:
+            _get_base_model(model_name).invoke([HumanMessage(content=PING_PROMPT)])
+            answered.append(model_name)
+        except Exception as e:
+            logger.warning(f"Could not ping model {model_name}: {e}")
+    return answered
+
+
+async def aping_models(model_names: List[str]) -> List[str]:
+    """
+    Async counterpart of ping_models. Async clients pool connections per
+    event loop, so this must run on the loop that serves requests.
+    """
+
+    async def ping(model_name: str) -> bool:
+        try:
+            await _get_base_model(model_name).ainvoke([HumanMessage(content=PING_PROMPT)])
+            return True
+        except Exception as e:
+            logger.warning(f"Could not ping model {model_name}: {e}")
+            return False
+
+    results = await asyncio.gather(*(ping(model_name) for model_name in model_names))
+    return [model_name for model_name, ok in zip(model_names, results) if ok]
+
+
+# Agent node usable from both graph.stream and graph.astream
+agent_node = RunnableLambda(call_model, afunc=acall_model, name="agent")
+
+# Context budget node that runs before the agent at the start of each turn
+context_node = RunnableLambda(manage_context, afunc=amanage_context, name="context")
+
+# Router in front of the agent, and the tool-free fast path for trivial turns
+router_node = RunnableLambda(route_request, afunc=aroute_request, name="router")
+fast_node = RunnableLambda(fast_reply, afunc=afast_reply, name="fast_reply")
+
+# Best answer so far, once the request's time, step or token budget is spent
+finalize_node = RunnableLambda(finalize_answer, afunc=afinalize_answer, name="finalize")
+
+
+# Define the function to execute tools: all calls of a turn run concurrently with per-tool timeouts
+tool_executor = build_tool_executor(tools, breakers=circuit_breakers)
+tool_node = RunnableLambda(tool_executor.invoke, afunc=tool_executor.ainvoke, name="action")
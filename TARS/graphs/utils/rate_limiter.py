@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from TARS.config.config import rate_limit_settings, storage_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request would have to queue longer than the limiter's max wait."""
+
+
+class SQLiteRateLimiter:
+    """
+    Token-bucket rate limits for provider requests and tokens, shared by every
+    process on the host through one SQLite file.
+
+    Each provider has a requests-per-minute and a tokens-per-minute bucket.
+    acquire() reserves capacity atomically and returns how long the caller
+    must wait for it: a bucket may go into debt, so concurrent callers queue
+    behind each other in reservation order instead of failing or polling.
+    Only a wait longer than max_wait (or the caller's own, shorter, max_wait)
+    raises.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        limits: Dict[str, Dict[str, float]],
+        max_wait: float = 60.0,
+    ):
+        self.db_path = db_path
+        self.limits = limits
+        self.max_wait = max_wait
+        self._conn = None
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, timeout=30, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _buckets(self, provider: str, tokens: int):
+        limits = self.limits.get(provider, {})
+        buckets = []
+        for kind, amount in (("requests_per_minute", 1), ("tokens_per_minute", tokens)):
+            capacity = limits.get(kind)
+            if capacity and amount > 0:
+                # A single call larger than the bucket waits for a full bucket
+                buckets.append((f"{provider}:{kind}", float(capacity), min(float(amount), capacity)))
+        return buckets
+
+    def reserve(self, provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        Reserve one request and the given tokens for a provider.
+
+        Args:
+            provider (str): The provider ("anthropic", "openai", "google").
+            tokens (int): The tokens the call is expected to use.
+            max_wait (float, optional): The longest this caller may wait, e.g. the
+                time left before its request's deadline; never more than the limiter's.
+
+        Returns:
+            float: Seconds to wait before making the call.
+
+        Raises:
+            RateLimitTimeout: If the wait would exceed max_wait; nothing is reserved.
+        """
+        buckets = self._buckets(provider, tokens)
+        if not buckets:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                updates = []
+                wait = 0.0
+                for name, capacity, amount in buckets:
+                    rate = capacity / 60.0
+                    row = conn.execute(
+                        "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                    ).fetchone()
+                    available = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                    remaining = available - amount
+                    wait = max(wait, -remaining / rate if remaining < 0 else 0.0)
+                    updates.append((name, remaining))
+                if wait > max_wait:
+                    conn.execute("ROLLBACK")
+                    raise RateLimitTimeout(
+                        f"{provider} rate limit would queue this call for {wait:.1f}s"
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    [(name, remaining, now) for name, remaining in updates],
+                )
+                conn.execute("COMMIT")
+            except RateLimitTimeout:
+                raise
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if wait > 0:
+            self.waits += 1
+            self.waited_seconds += wait
+            logger.info(f"Rate limit for {provider}: queueing call for {wait:.2f}s")
+        return wait
+
+    def acquire(self, provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """Reserve capacity and block until it is available; return the time waited."""
+        wait = self.reserve(provider, tokens, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, provider: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """Async counterpart of acquire; waits without blocking the event loop."""
+        wait = await asyncio.to_thread(self.reserve, provider, tokens, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, provider: str, reserved_tokens: int, used_tokens: Optional[int]) -> None:
+        """
+        Correct a token reservation once the actual usage is known.
+
+        Args:
+            provider (str): The provider.
+            reserved_tokens (int): The tokens passed to acquire.
+            used_tokens (int, optional): The tokens the call actually used.
+        """
+        capacity = self.limits.get(provider, {}).get("tokens_per_minute")
+        if not capacity or used_tokens is None or used_tokens == reserved_tokens:
+            return
+        delta = min(reserved_tokens, capacity) - used_tokens
+        name = f"{provider}:tokens_per_minute"
+        with self._lock:
+            self._connection().execute(
+                "UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE name = ?",
+                (capacity, delta, name),
+            )
+
+    def snapshot(self) -> Dict[str, Tuple[float, float]]:
+        """Return the stored (tokens, updated_at) of every bucket."""
+        with self._lock:
+            rows = self._connection().execute("SELECT name, tokens, updated_at FROM buckets").fetchall()
+        return {name: (tokens, updated_at) for name, tokens, updated_at in rows}
+
+
+def build_rate_limiter() -> Optional[SQLiteRateLimiter]:
+    """
+    Build the cross-process rate limiter from RateLimitSettings.
+
+    Returns:
+        SQLiteRateLimiter: The limiter, or None when rate limiting is disabled.
+    """
+    if not rate_limit_settings.rate_limit_enabled:
+        return None
+    return SQLiteRateLimiter(
+        os.path.join(storage_settings.data_dir, rate_limit_settings.rate_limit_db_file),
+        rate_limit_settings.rate_limits,
+        max_wait=rate_limit_settings.rate_limit_max_wait_seconds,
+    )
+
+
+# Shared by the agent nodes and the LLM-backed tools of this process
+rate_limiter = build_rate_limiter()
@@ -0,0 +1,107 @@
+import logging
+import re
+import threading
+from typing import Dict, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+AGENT = "agent"
+
+# Whole-message greetings, thanks and acknowledgements that never need a tool
+_TRIVIAL = re.compile(
+    r"^\s*(?:(?:hi|hello|hey|yo|hiya|howdy|sup|good (?:morning|afternoon|evening|night)|"
+    r"thanks?(?: you)?(?: so much| a lot)?|thx|ty|cheers|ok(?:ay)?|k|cool|nice|great|awesome|"
+    r"perfect|got it|sounds good|makes sense|lol|haha|bye|goodbye|see (?:you|ya)|"
+    r"how are you(?: doing)?|what'?s up|who are you|are you there)"
+    r"[\s,]*(?:tars|buddy|man|mate)?[\s!.?,:)(]*)+$",
+    re.IGNORECASE,
+)
+
+# Words that suggest a tool, fresh data or personal data is needed
+_TOOL_WORTHY = re.compile(
+    r"\b(?:search|google|look ?up|find|latest|news|today|tonight|tomorrow|yesterday|"
+    r"this week|current|weather|price|stock|score|email|emails|e-mail|gmail|inbox|"
+    r"unread|calendar|meeting|meetings|schedule|event|events|slack|dm|dms|message|"
+    r"messages|youtube|video|videos|image|picture|photo|screenshot|link|url|http|www)\b",
+    re.IGNORECASE,
+)
+
+CLASSIFIER_PROMPT = (
+    "Decide whether an assistant needs tools (web search, YouTube, email, calendar, "
+    "Slack, images) or fresh information to answer the user's message. Reply with "
+    "exactly one word: TOOLS or DIRECT.\n\nMessage: {message}"
+)
+
+
+def classify_heuristic(text: str, max_fast_words: int = 12) -> Optional[str]:
+    """
+    Classify a user message with cheap heuristics.
+
+    Args:
+        text (str): The latest user message.
+        max_fast_words (int): Longer messages are never treated as trivial.
+
+    Returns:
+        str: FAST for trivial turns, AGENT for tool-worthy ones, or None if unsure.
+    """
+    if _TOOL_WORTHY.search(text):
+        return AGENT
+    if len(text.split()) <= max_fast_words and _TRIVIAL.match(text):
+        return FAST
+    return None
+
+
+def parse_classifier_reply(reply: str) -> str:
+    """Map the small model's one-word reply to a route; anything unclear goes to the agent."""
+    return FAST if reply.strip().upper().startswith("DIRECT") else AGENT
+
+
+class RouterStats:
+    """
+    Counts routing decisions and estimates the latency the fast path saves.
+
+    Savings are estimated against a moving average of tool-bound agent model
+    calls, since the latency of the path not taken cannot be measured.
+    """
+
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self.decisions: Dict[str, int] = {FAST: 0, AGENT: 0}
+        self.by_method: Dict[str, int] = {}
+        self.agent_call_ms: Optional[float] = None
+        self.latency_saved_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record_decision(self, route: str, method: str) -> None:
+        with self._lock:
+            self.decisions[route] += 1
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+
+    def record_agent_call(self, elapsed_ms: float) -> None:
+        with self._lock:
+            if self.agent_call_ms is None:
+                self.agent_call_ms = elapsed_ms
+            else:
+                self.agent_call_ms += self.smoothing * (elapsed_ms - self.agent_call_ms)
+
+    def record_fast_reply(self, elapsed_ms: float) -> float:
+        """Record a fast-path reply; return the estimated latency saved, in ms."""
+        with self._lock:
+            saved = max(0.0, (self.agent_call_ms or elapsed_ms) - elapsed_ms)
+            self.latency_saved_ms += saved
+            return saved
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "decisions": dict(self.decisions),
+                "by_method": dict(self.by_method),
+                "avg_agent_call_ms": round(self.agent_call_ms or 0.0, 1),
+                "latency_saved_ms": round(self.latency_saved_ms, 1),
+            }
+
+
+# Shared by the router and fast-path nodes of this process
+router_stats = RouterStats()
@@ -0,0 +1,285 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from TARS.config.config import semantic_cache_settings
+from TARS.graphs.utils.tools import tool_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A final answer served from the semantic cache."""
+
+    question: str
+    answer: str
+    similarity: float
+    age_seconds: float
+    saved_ms: float  # how long the original agent run took
+
+
+class _UserAnswers:
+    """The answers cached for one user, with their unit-norm embeddings in one matrix."""
+
+    def __init__(self, dimensions: int):
+        self.vectors = np.empty((0, dimensions), dtype=np.float32)
+        self.expires_at = np.empty(0, dtype=np.float64)
+        self.created_at: List[float] = []
+        self.questions: List[str] = []
+        self.answers: List[str] = []
+        self.tools: List[frozenset] = []
+        self.run_ms: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def add(self, vector, question, answer, tools, run_ms, created_at, expires_at):
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.expires_at = np.append(self.expires_at, expires_at)
+        self.created_at.append(created_at)
+        self.questions.append(question)
+        self.answers.append(answer)
+        self.tools.append(tools)
+        self.run_ms.append(run_ms)
+
+    def keep(self, mask: np.ndarray) -> int:
+        """Keep only the entries where mask is True; return how many were dropped."""
+        dropped = int(len(mask) - mask.sum())
+        if dropped:
+            self.vectors = self.vectors[mask]
+            self.expires_at = self.expires_at[mask]
+            for name in ("created_at", "questions", "answers", "tools", "run_ms"):
+                values = getattr(self, name)
+                setattr(self, name, [v for v, kept in zip(values, mask) if kept])
+        return dropped
+
+
+class SemanticAnswerCache:
+    """
+    A per-user cache of final agent answers, looked up by question similarity.
+
+    Questions are embedded once and compared by cosine similarity against the
+    user's cached questions with a brute-force matrix product, which stays in
+    the microsecond range for the few hundred entries kept per user. An answer
+    is only served while fresh: the freshness window is the shorter of
+    ttl_seconds and the cache TTL of every tool the answer depended on, and
+    answers that used a tool without a TTL (e.g. side-effecting tools) are
+    never stored.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], Sequence[float]],
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600.0,
+        max_entries_per_user: int = 256,
+        min_words: int = 3,
+        tool_ttls: Optional[Dict[str, float]] = None,
+        invalidated_by: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_user = max_entries_per_user
+        self.min_words = min_words
+        self.tool_ttls = dict(tool_ttls or {})
+        self.invalidated_by = {k: set(v) for k, v in (invalidated_by or {}).items()}
+        self._users: Dict[str, _UserAnswers] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.latency_saved_ms = 0.0
+        self.lookup_ms_total = 0.0
+
+    def is_cacheable_question(self, question: str) -> bool:
+        """
+        Short follow-ups ("yes", "tell me more") depend on context and are never
+        cached; longer follow-ups are kept out by the caller, which only looks
+        up questions that open a conversation.
+        """
+        return len(question.split()) >= self.min_words
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, user_name: str, question: str) -> Tuple[Optional[np.ndarray], Optional[CachedAnswer]]:
+        """
+        Find a fresh cached answer to a question similar to this one.
+
+        Args:
+            user_name (str): The user asking.
+            question (str): The question.
+
+        Returns:
+            tuple: (question embedding, cached answer). The embedding is None
+            when the question is not cacheable; the answer is None on a miss.
+        """
+        if not self.is_cacheable_question(question):
+            return None, None
+        started = time.perf_counter()
+        vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            answers = self._users.get(user_name)
+            hit = None
+            if answers is not None and len(answers) and answers.vectors.shape[1] == vector.shape[0]:
+                scores = answers.vectors @ vector
+                scores[answers.expires_at <= now] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    hit = CachedAnswer(
+                        question=answers.questions[best],
+                        answer=answers.answers[best],
+                        similarity=float(scores[best]),
+                        age_seconds=now - answers.created_at[best],
+                        saved_ms=answers.run_ms[best],
+                    )
+            self.lookup_ms_total += (time.perf_counter() - started) * 1000
+            if hit is None:
+                self.misses += 1
+                return vector, None
+            self.hits += 1
+            self.latency_saved_ms += hit.saved_ms
+        logger.info(f"Semantic cache hit for {user_name} (similarity {hit.similarity:.3f})")
+        return vector, hit
+
+    def store(
+        self,
+        user_name: str,
+        question: str,
+        answer: str,
+        tools_used: Iterable[str] = (),
+        run_ms: float = 0.0,
+        vector: Optional[np.ndarray] = None,
+    ) -> bool:
+        """
+        Cache the final answer of an agent run.
+
+        Args:
+            user_name (str): The user who asked.
+            question (str): The question.
+            answer (str): The final answer.
+            tools_used: Names of the tools the run called.
+            run_ms (float): How long the run took.
+            vector: The question embedding returned by lookup, if any.
+
+        Returns:
+            bool: True if the answer was stored.
+        """
+        tools_used = frozenset(tools_used)
+        if not answer or not self.is_cacheable_question(question):
+            return False
+        if any(tool not in self.tool_ttls for tool in tools_used):
+            logger.info(f"Not caching answer that depends on uncacheable tools: {sorted(tools_used)}")
+            return False
+        ttl = min([self.ttl_seconds] + [self.tool_ttls[tool] for tool in tools_used])
+        if vector is None:
+            vector = self._embed(question)
+        now = time.time()
+        with self._lock:
+            answers = self._users.get(user_name)
+            if answers is None or answers.vectors.shape[1] != vector.shape[0]:
+                answers = self._users[user_name] = _UserAnswers(vector.shape[0])
+            # Drop expired entries, then the oldest ones beyond the per-user bound
+            answers.keep(answers.expires_at > now)
+            overflow = len(answers) + 1 - self.max_entries_per_user
+            if overflow > 0:
+                answers.keep(np.arange(len(answers)) >= overflow)
+            answers.add(vector, question, answer, tools_used, run_ms, now, now + ttl)
+        return True
+
+    def invalidate(self, user_name: Optional[str] = None, tool_name: Optional[str] = None) -> int:
+        """
+        Drop cached answers for a user, answers that depend on a tool, or both.
+
+        Args:
+            user_name (str, optional): Only drop this user's answers.
+            tool_name (str, optional): Only drop answers that used this tool.
+
+        Returns:
+            int: The number of answers dropped.
+        """
+        dropped = 0
+        with self._lock:
+            users = [user_name] if user_name is not None else list(self._users)
+            for name in users:
+                answers = self._users.get(name)
+                if answers is None:
+                    continue
+                if tool_name is None:
+                    dropped += len(answers)
+                    del self._users[name]
+                else:
+                    mask = np.array([tool_name not in tools for tools in answers.tools], dtype=bool)
+                    dropped += answers.keep(mask)
+            self.invalidations += dropped
+        return dropped
+
+    def notify_tool_run(self, user_name: str, tool_name: str) -> int:
+        """
+        Invalidation hook called after a tool runs for a user.
+
+        Tools that change external state (e.g. marking mail read) invalidate
+        that user's answers built from the tools listed for them in
+        invalidated_by.
+
+        Returns:
+            int: The number of answers dropped.
+        """
+        dropped = 0
+        for dependent in self.invalidated_by.get(tool_name, ()):
+            dropped += self.invalidate(user_name=user_name, tool_name=dependent)
+        if dropped:
+            logger.info(f"{tool_name} invalidated {dropped} cached answers for {user_name}")
+        return dropped
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit rate, latency saved and lookup cost."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_ms": round(self.latency_saved_ms, 2),
+            "avg_lookup_ms": round(self.lookup_ms_total / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": sum(len(answers) for answers in self._users.values()),
+        }
+
+
+def build_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Build the semantic answer cache from SemanticCacheSettings.
+
+    Returns:
+        SemanticAnswerCache: The shared cache, or None when disabled.
+    """
+    if not semantic_cache_settings.semantic_cache_enabled:
+        return None
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(model=semantic_cache_settings.semantic_cache_embedding_model)
+    side_effecting = tool_registry.side_effecting()
+    logger.info("Semantic answer cache enabled")
+    return SemanticAnswerCache(
+        embeddings.embed_query,
+        threshold=semantic_cache_settings.semantic_cache_threshold,
+        ttl_seconds=semantic_cache_settings.semantic_cache_ttl_seconds,
+        max_entries_per_user=semantic_cache_settings.semantic_cache_max_entries_per_user,
+        min_words=semantic_cache_settings.semantic_cache_min_words,
+        tool_ttls={
+            name: ttl
+            for name, ttl in tool_registry.cache_ttls().items()
+            if name not in side_effecting
+        },
+        invalidated_by=semantic_cache_settings.semantic_cache_invalidated_by,
+    )
@@ -4,3 +4,5 @@ from typing import TypedDict, Annotated, Sequence
 
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    summary: str  # rolling summary of turns folded out of messages
+    route: str  # "fast" or "agent", chosen by the router for the current turn
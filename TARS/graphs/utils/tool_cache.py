@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from TARS.config.config import storage_settings, tool_settings
+from TARS.graphs.utils.tools import tool_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize tool arguments so trivially different calls share a cache entry."""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def make_cache_key(tool_name: str, args: Dict[str, Any]) -> str:
+    """
+    Build the cache key for a tool call from its name and normalized arguments.
+
+    Args:
+        tool_name (str): The name of the tool.
+        args (dict): The tool call arguments.
+
+    Returns:
+        str: A stable hex digest.
+    """
+    payload = json.dumps(
+        [tool_name, _normalize(args)], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolResultCache:
+    """
+    A TTL + LRU cache for the results of read-only tool calls.
+
+    Only tools with a TTL in ttls are cached, and tools listed as
+    side-effecting are never cached even if a TTL is configured for them.
+    The memory tier is bounded by entry count and by approximate size; an
+    optional SQLite tier keeps results across restarts and processes.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        side_effecting: Iterable[str] = (),
+        max_entries: int = 1024,
+        max_bytes: int = 32 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+    ):
+        self.side_effecting = set(side_effecting)
+        self.ttls = {
+            name: ttl for name, ttl in ttls.items() if name not in self.side_effecting
+        }
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                "key TEXT PRIMARY KEY, tool TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        """Return True if results of the given tool may be cached."""
+        return tool_name in self.ttls
+
+    def get(self, tool_name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            tool_name (str): The name of the tool.
+            args (dict): The tool call arguments.
+
+        Returns:
+            dict: The cached {"content", "artifact"} payload, or None on a miss.
+        """
+        if not self.is_cacheable(tool_name):
+            return None
+        key = make_cache_key(tool_name, args)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, value FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    value = json.loads(row[1])
+                    self._store(key, row[0], value, len(row[1]))
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, tool_name: str, args: Dict[str, Any], content: Any, artifact: Any = None) -> None:
+        """
+        Cache the result of a successful tool call.
+
+        Args:
+            tool_name (str): The name of the tool.
+            args (dict): The tool call arguments.
+            content: The ToolMessage content.
+            artifact: The ToolMessage artifact, if any.
+        """
+        if not self.is_cacheable(tool_name):
+            return
+        key = make_cache_key(tool_name, args)
+        value = {"content": content, "artifact": artifact}
+        serialized = json.dumps(value, default=str)
+        expires_at = time.time() + self.ttls[tool_name]
+        with self._lock:
+            self._store(key, expires_at, value, len(serialized))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tool_results (key, tool, expires_at, value) VALUES (?, ?, ?, ?)",
+                    (key, tool_name, expires_at, serialized),
+                )
+                self._conn.execute("DELETE FROM tool_results WHERE expires_at < ?", (time.time(),))
+                self._conn.commit()
+
+    def _store(self, key: str, expires_at: float, value: Dict[str, Any], size: int) -> None:
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Drop every cached result from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_results")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size of the memory tier."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+def build_tool_cache() -> Optional[ToolResultCache]:
+    """
+    Build the tool result cache from the tool registry's metadata and ToolSettings.
+
+    Returns:
+        ToolResultCache: The shared cache, or None when disabled.
+    """
+    if not tool_settings.tool_cache_enabled:
+        return None
+    disk_path = (
+        os.path.join(storage_settings.data_dir, tool_settings.tool_cache_disk_file)
+        if tool_settings.tool_cache_disk_enabled
+        else None
+    )
+    return ToolResultCache(
+        tool_registry.cache_ttls(),
+        side_effecting=tool_registry.side_effecting(),
+        max_entries=tool_settings.tool_cache_max_entries,
+        max_bytes=tool_settings.tool_cache_max_bytes,
+        disk_path=disk_path,
+    )
@@ -0,0 +1,309 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from TARS.config.config import tool_settings
+from TARS.graphs.utils.budget import acall_with_timeout, call_with_timeout
+from TARS.graphs.utils.context import count_text_tokens
+from TARS.graphs.utils.events import content_text
+from TARS.graphs.utils.models import model_registry, resolve_model_name
+from TARS.graphs.utils.rate_limiter import rate_limiter
+from TARS.graphs.utils.tools import tool_registry
+from langchain_core.messages import HumanMessage, ToolMessage
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# The most of an oversized result handed to the summarizer
+SUMMARY_INPUT_TOKENS = 12_000
+
+# Room left under the cap for the note saying what was removed
+NOTE_TOKENS = 16
+
+SUMMARY_PROMPT = """A tool called {tool_name} returned the output below while answering this request:
+{question}
+
+Rewrite the output in at most {max_tokens} tokens, keeping only what helps answer the request.
+Keep names, senders, subjects, dates, numbers and links exactly as written. Do not add anything.
+
+Output:
+{output}"""
+
+
+def _parse_items(content: str) -> Tuple[Optional[List[Any]], bool]:
+    """
+    Return (items, single): the JSON items of a list result, or a JSON object
+    as a single item. items is None for results that are not JSON.
+    """
+    try:
+        parsed = json.loads(content)
+    except (TypeError, ValueError):
+        return None, False
+    if isinstance(parsed, list):
+        return parsed, False
+    if isinstance(parsed, dict):
+        return [parsed], True
+    return None, False
+
+
+def _dedupe(items: List[Any]) -> Tuple[List[Any], int]:
+    """Drop repeated items (ignoring whitespace differences); return the rest and the count dropped."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = " ".join(json.dumps(item, sort_keys=True, default=str).split())
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+    return unique, len(items) - len(unique)
+
+
+def _truncate_value(value: Any, max_chars: int) -> Any:
+    """
+    Cut long strings to max_chars, keeping short fields (senders, subjects,
+    timestamps) whole, so each item keeps its header and the start of its body.
+    """
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return value[:max_chars].rstrip() + f"… [{len(value) - max_chars} more chars]"
+    if isinstance(value, dict):
+        return {key: _truncate_value(item, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_truncate_value(item, max_chars) for item in value]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _fit_items(items: List[Any], max_tokens: int) -> Tuple[List[Any], int]:
+    """Keep the leading items that fit in max_tokens; return them and the count omitted."""
+    kept = []
+    used = 2  # the enclosing brackets
+    for item in items:
+        cost = count_text_tokens(_dumps(item)) + 1
+        if kept and used + cost > max_tokens:
+            break
+        kept.append(item)
+        used += cost
+    return kept, len(items) - len(kept)
+
+
+def _truncate_text(text: str, max_tokens: int) -> str:
+    """The head of text that fits in max_tokens."""
+    tokens = count_text_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    chars = int(len(text) * max_tokens / tokens)
+    while chars > 0 and count_text_tokens(text[:chars]) > max_tokens:
+        chars = int(chars * 0.9)
+    return text[:chars].rstrip()
+
+
+class ToolOutputStats:
+    """Counts tool results per tool and the prompt tokens the governor saved."""
+
+    def __init__(self):
+        self._by_tool: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tool_name: str, tokens_before: int, tokens_after: int) -> None:
+        with self._lock:
+            stats = self._by_tool.setdefault(
+                tool_name, {"calls": 0, "governed": 0, "tokens_before": 0, "tokens_after": 0}
+            )
+            stats["calls"] += 1
+            stats["governed"] += tokens_after < tokens_before
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                tool_name: {**stats, "tokens_saved": stats["tokens_before"] - stats["tokens_after"]}
+                for tool_name, stats in self._by_tool.items()
+            }
+
+
+class ToolOutputGovernor:
+    """
+    Caps the tokens each tool result adds to the prompt.
+
+    Tool results stay in the conversation and are resent on every later model
+    call, so oversized ones are shrunk once, before they enter the state:
+    repeated items are dropped, long fields of each item are cut to their
+    first item_chars characters (short fields such as senders, subjects and
+    timestamps are kept whole), and trailing items that do not fit the cap
+    are omitted with a note. Results that are not JSON keep their head.
+
+    With a summary model, results over the cap are instead rewritten by that
+    model, falling back to truncation if it fails or is too slow.
+    """
+
+    def __init__(
+        self,
+        caps: Dict[str, int],
+        default_cap: int = 2000,
+        item_chars: int = 400,
+        summary_model_name: Optional[str] = None,
+        summary_timeout: float = 15.0,
+    ):
+        self.caps = dict(caps)
+        self.default_cap = default_cap
+        self.item_chars = item_chars
+        self.summary_model_name = summary_model_name
+        self.summary_timeout = summary_timeout
+        self.stats = ToolOutputStats()
+
+    def cap_for(self, tool_name: str) -> int:
+        """The token cap for a tool's results (0: unlimited)."""
+        return self.caps.get(tool_name, self.default_cap)
+
+    def truncate(self, content: str, max_tokens: int) -> Tuple[str, Dict[str, Any]]:
+        """
+        Shrink content to max_tokens without a model.
+
+        Returns:
+            tuple: (the shrunk content, details of what was removed).
+        """
+        max_tokens = max(1, max_tokens - NOTE_TOKENS)
+        items, single = _parse_items(content)
+        if items is None:
+            text = _truncate_text(content, max_tokens)
+            return text + "\n[output truncated]", {"method": "truncate"}
+
+        items, duplicates = _dedupe(items)
+        items = [_truncate_value(item, self.item_chars) for item in items]
+        if single:
+            text = _truncate_text(_dumps(items[0]), max_tokens)
+            return text, {"method": "truncate", "duplicates": 0, "omitted": 0}
+        kept, omitted = _fit_items(items, max_tokens)
+        text = _truncate_text(_dumps(kept), max_tokens)
+        notes = []
+        if omitted:
+            notes.append(f"{omitted} more items omitted")
+        if duplicates:
+            notes.append(f"{duplicates} duplicate items removed")
+        if notes:
+            text += f"\n[{'; '.join(notes)}]"
+        return text, {"method": "truncate", "duplicates": duplicates, "omitted": omitted}
+
+    def _summary_prompt(self, tool_name: str, content: str, question: str, max_tokens: int) -> List:
+        items, _ = _parse_items(content)
+        if items is not None:
+            content = _dumps(_truncate_value(_dedupe(items)[0], self.item_chars * 4))
+        output = _truncate_text(content, SUMMARY_INPUT_TOKENS)
+        prompt = SUMMARY_PROMPT.format(
+            tool_name=tool_name, question=question or "(unknown)", max_tokens=max_tokens, output=output
+        )
+        return [HumanMessage(content=prompt)]
+
+    def _reservation(self, prompt: List, max_tokens: int) -> Tuple[str, int]:
+        """The provider and tokens a summary takes from the shared rate limit."""
+        provider = resolve_model_name(self.summary_model_name)[0]
+        return provider, count_text_tokens(prompt[0].content) + max_tokens
+
+    def _settle(self, provider: str, reserved: int, response) -> None:
+        if rate_limiter is not None:
+            usage = getattr(response, "usage_metadata", None) or {}
+            rate_limiter.settle(provider, reserved, usage.get("total_tokens"))
+
+    def _finish(self, message: ToolMessage, content: str, before: int, details: Dict[str, Any]) -> ToolMessage:
+        after = count_text_tokens(content)
+        self.stats.record(message.name, before, after)
+        details = {**details, "tokens_before": before, "tokens_after": after}
+        logger.info(f"Governed {message.name} output: {before} -> {after} tokens ({details})")
+        return message.model_copy(
+            update={
+                "content": content,
+                "response_metadata": {**message.response_metadata, "output_governor": details},
+            }
+        )
+
+    def _oversized(self, message: ToolMessage) -> Optional[Tuple[str, int, int]]:
+        """Return (content, tokens, cap) if the message exceeds its tool's cap, else None."""
+        if message.status == "error" or not isinstance(message.content, str):
+            return None
+        cap = self.cap_for(message.name)
+        before = count_text_tokens(message.content)
+        if not cap or before <= cap:
+            self.stats.record(message.name, before, before)
+            return None
+        return message.content, before, cap
+
+    def govern(self, message: ToolMessage, question: str = "", timeout: Optional[float] = None) -> ToolMessage:
+        """
+        Return the message with its content within its tool's token cap.
+
+        Args:
+            message (ToolMessage): The tool result.
+            question (str): The user's request, for the summarizer.
+            timeout (float, optional): Time left in the request's budget.
+
+        Returns:
+            ToolMessage: The message, unchanged if it is within the cap.
+        """
+        oversized = self._oversized(message)
+        if oversized is None:
+            return message
+        content, before, cap = oversized
+        if self.summary_model_name:
+            try:
+                prompt = self._summary_prompt(message.name, content, question, cap)
+                provider, reserved = self._reservation(prompt, cap)
+                limit = self.summary_timeout if timeout is None else min(self.summary_timeout, timeout)
+                if rate_limiter is not None:
+                    limit = max(0.0, limit - rate_limiter.acquire(provider, reserved, max_wait=limit))
+                model = model_registry.get_base(self.summary_model_name)
+                response = call_with_timeout(lambda: model.invoke(prompt), limit)
+                self._settle(provider, reserved, response)
+                summary = _truncate_text(content_text(response.content), cap)
+                return self._finish(message, summary, before, {"method": "summarize"})
+            except Exception as e:
+                logger.warning(f"Summarizing {message.name} output failed, truncating: {e}")
+        text, details = self.truncate(content, cap)
+        return self._finish(message, text, before, details)
+
+    async def agovern(self, message: ToolMessage, question: str = "", timeout: Optional[float] = None) -> ToolMessage:
+        """Async counterpart of govern."""
+        oversized = self._oversized(message)
+        if oversized is None:
+            return message
+        content, before, cap = oversized
+        if self.summary_model_name:
+            try:
+                prompt = self._summary_prompt(message.name, content, question, cap)
+                provider, reserved = self._reservation(prompt, cap)
+                limit = self.summary_timeout if timeout is None else min(self.summary_timeout, timeout)
+                if rate_limiter is not None:
+                    limit = max(0.0, limit - await rate_limiter.aacquire(provider, reserved, max_wait=limit))
+                model = model_registry.get_base(self.summary_model_name)
+                response = await acall_with_timeout(model.ainvoke(prompt), limit)
+                self._settle(provider, reserved, response)
+                summary = _truncate_text(content_text(response.content), cap)
+                return self._finish(message, summary, before, {"method": "summarize"})
+            except Exception as e:
+                logger.warning(f"Summarizing {message.name} output failed, truncating: {e}")
+        text, details = self.truncate(content, cap)
+        return self._finish(message, text, before, details)
+
+
+def build_tool_output_governor() -> Optional[ToolOutputGovernor]:
+    """Build the governor from the tool registry's caps and ToolSettings, or None when disabled."""
+    if not tool_settings.tool_output_governor_enabled:
+        return None
+    return ToolOutputGovernor(
+        caps=tool_registry.output_token_caps(),
+        default_cap=tool_settings.tool_output_max_tokens,
+        item_chars=tool_settings.tool_output_item_chars,
+        summary_model_name=(
+            tool_settings.tool_output_summary_model_name
+            if tool_settings.tool_output_summarize_enabled
+            else None
+        ),
+        summary_timeout=tool_settings.tool_output_summary_timeout_seconds,
+    )
@@ -0,0 +1,198 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from TARS.config.config import tool_settings
+from TARS.graphs.utils.events import content_text
+from TARS.graphs.utils.tools import tool_registry
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a about an and any are as at be by can do for from get how i in is it just me my of "
+    "on or the to use used useful when what with you your this that".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text, without numbers or stopwords and with a naive plural strip."""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) < 2 or word in _STOPWORDS or word.isdigit():
+            continue
+        if len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def tool_document(tool, keywords: Sequence[str] = ()) -> str:
+    """The text a tool is indexed by: its name, description, argument names and hints."""
+    args = " ".join(getattr(tool, "args", {}) or {})
+    return " ".join([tool.name.replace("_", " "), tool.description or "", args, *keywords])
+
+
+class ToolSelector:
+    """
+    Pick the tools worth binding for the current turn.
+
+    Tools are scored against the recent user messages with an IDF-weighted
+    keyword index over tool names, descriptions, argument names and
+    configured hint words, optionally blended with embedding similarity over
+    the tool descriptions. At most top_k tools scoring at least
+    min_relative_score of the best score are bound, which keeps tool schemas
+    out of prompts that do not need them. Ties go to the cheaper tool, by the
+    sort keys in costs.
+
+    The selection is returned in registration order so the same subset
+    always maps to the same cached bound model.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence,
+        top_k: int = 4,
+        always_include: Sequence[str] = (),
+        keywords: Optional[Dict[str, List[str]]] = None,
+        history_messages: int = 3,
+        min_relative_score: float = 0.4,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        embedding_weight: float = 1.0,
+        costs: Optional[Dict[str, Any]] = None,
+    ):
+        self.tools = list(tools)
+        self.top_k = top_k
+        self.always_include = set(always_include)
+        self.history_messages = history_messages
+        self.min_relative_score = min_relative_score
+        self.embed = embed
+        self.embedding_weight = embedding_weight
+        self.costs = costs or {}
+        keywords = keywords or {}
+
+        self._terms = [Counter(tokenize(tool_document(tool, keywords.get(tool.name, ())))) for tool in self.tools]
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        count = len(self.tools)
+        self._idf = {
+            term: math.log(1 + count / frequency) for term, frequency in document_frequency.items()
+        }
+        self._tool_vectors = None
+        self._last_query = (None, None)
+        self._lock = threading.Lock()
+        self.selections = 0
+        self.fallbacks = 0
+
+    def _query_text(self, messages: Sequence[BaseMessage]) -> str:
+        recent = [msg for msg in messages if isinstance(msg, HumanMessage)][-self.history_messages:]
+        return " ".join(content_text(msg.content) for msg in recent)
+
+    def _keyword_scores(self, query: str) -> List[float]:
+        words = set(tokenize(query))
+        scores = [sum(self._idf[word] for word in words if word in terms) for terms in self._terms]
+        top = max(scores, default=0.0)
+        return [score / top for score in scores] if top > 0 else scores
+
+    def _embedding_scores(self, query: str) -> List[float]:
+        # numpy is only needed once embeddings are enabled
+        import numpy as np
+
+        if self._tool_vectors is None:
+            with self._lock:
+                if self._tool_vectors is None:
+                    vectors = np.array([self.embed(tool_document(tool)) for tool in self.tools], dtype=float)
+                    self._tool_vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Every step of an agent loop scores the same query
+        cached_query, vector = self._last_query
+        if cached_query != query:
+            vector = np.array(self.embed(query), dtype=float)
+            vector /= np.linalg.norm(vector)
+            self._last_query = (query, vector)
+        return np.clip(self._tool_vectors @ vector, 0.0, None).tolist()
+
+    def scores(self, messages: Sequence[BaseMessage]) -> Dict[str, float]:
+        """Score every tool against the recent user messages."""
+        query = self._query_text(messages)
+        scores = self._keyword_scores(query)
+        if self.embed is not None and query.strip():
+            try:
+                similarities = self._embedding_scores(query)
+                scores = [score + self.embedding_weight * similarity for score, similarity in zip(scores, similarities)]
+            except Exception as e:
+                logger.warning(f"Tool embedding scores unavailable, using keywords only: {e}")
+        return {tool.name: score for tool, score in zip(self.tools, scores)}
+
+    def select(self, messages: Sequence[BaseMessage]) -> List:
+        """
+        Return the tools to bind for a model call over these messages.
+
+        Tools already called in the conversation stay bound, since providers
+        reject tool calls in the history for tools that are not defined.
+        When no tool matches at all, every tool is bound rather than guessing.
+
+        Args:
+            messages: The messages about to be sent to the model.
+
+        Returns:
+            list: The selected tools, in registration order.
+        """
+        if len(self.tools) <= self.top_k:
+            return self.tools
+        self.selections += 1
+        scores = self.scores(messages)
+        best = max(scores.values())
+        if best <= 0:
+            self.fallbacks += 1
+            return self.tools
+        cutoff = best * self.min_relative_score
+        ranked = sorted(
+            (name for name, score in scores.items() if score >= cutoff),
+            key=lambda name: (-scores[name], self.costs.get(name, ())),
+        )
+
+        chosen = set(ranked[: self.top_k]) | self.always_include
+        for message in messages:
+            if isinstance(message, AIMessage):
+                chosen.update(call["name"] for call in message.tool_calls)
+        selected = [tool for tool in self.tools if tool.name in chosen]
+        logger.info(f"Selected {len(selected)}/{len(self.tools)} tools: {[tool.name for tool in selected]}")
+        return selected
+
+    def stats(self) -> Dict[str, int]:
+        return {"selections": self.selections, "fallbacks": self.fallbacks}
+
+
+def build_tool_selector(tools: Sequence) -> Optional[ToolSelector]:
+    """
+    Build the tool selector from the tool registry's metadata and ToolSettings.
+
+    Args:
+        tools: Every tool the agent can call.
+
+    Returns:
+        ToolSelector: The selector, or None when selection is disabled.
+    """
+    if not tool_settings.tool_selection_enabled:
+        return None
+    embed = None
+    if tool_settings.tool_selection_embeddings_enabled:
+        from langchain_openai import OpenAIEmbeddings
+
+        embed = OpenAIEmbeddings(model=tool_settings.tool_selection_embedding_model).embed_query
+    return ToolSelector(
+        tools,
+        top_k=tool_settings.tool_selection_top_k,
+        always_include=tool_settings.tool_selection_always_include,
+        keywords=tool_registry.keywords(),
+        history_messages=tool_settings.tool_selection_history_messages,
+        min_relative_score=tool_settings.tool_selection_min_relative_score,
+        embed=embed,
+        costs=tool_registry.costs(),
+    )
@@ -1,11 +1,19 @@
 import asyncio
-from typing import Annotated, Type
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type
 
-from langchain.tools import BaseTool
-from langchain_community.tools import YouTubeSearchTool
-from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from TARS.config.config import tool_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
 
 class MultiplyInput(BaseModel):
     a: Annotated[float, Field(description="The first number to multiply")]
@@ -26,7 +34,228 @@ class MultiplyTool(BaseTool):
         return await asyncio.to_thread(self._run, a, b)
 
 
-multiply_tool = MultiplyTool()
+# Cost classes, cheapest first; selection prefers cheaper tools on equal relevance
+COST_CLASSES = ("free", "low", "high")
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """
+    Declarative metadata for a tool. The tool itself is only imported and
+    constructed when it is first enabled or called.
+
+    import_path is "module:attribute", where the attribute is either a tool
+    instance or a tool class / factory called with kwargs.
+    """
+
+    name: str
+    import_path: str
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+    keywords: Tuple[str, ...] = ()  # hint words for relevance-based selection
+    cache_ttl_seconds: Optional[float] = None  # None: results are never cached
+    side_effecting: bool = False  # changes external state; never cached or replayed
+    expected_latency_seconds: float = 1.0
+    timeout_seconds: Optional[float] = None  # None: ToolSettings.tool_default_timeout_seconds
+    cost_class: str = "free"
+    max_concurrency: Optional[int] = None  # concurrent calls of this tool per process
+    max_output_tokens: Optional[int] = None  # None: ToolSettings.tool_output_max_tokens
+
+
+TOOL_SPECS: List[ToolSpec] = [
+    ToolSpec(
+        name="tavily_search_results_json",
+        import_path="langchain_community.tools.tavily_search:TavilySearchResults",
+        kwargs={"max_results": 1},
+        keywords=("web", "search", "google", "look", "find", "latest", "news", "weather", "price", "who", "today"),
+        cache_ttl_seconds=300.0,
+        expected_latency_seconds=2.0,
+        timeout_seconds=15.0,
+        cost_class="low",
+        max_concurrency=4,
+    ),
+    ToolSpec(
+        name="youtube_search",
+        import_path="langchain_community.tools:YouTubeSearchTool",
+        kwargs={"max_results": 3},
+        keywords=("youtube", "video", "watch", "channel"),
+        cache_ttl_seconds=3600.0,
+        expected_latency_seconds=2.0,
+        timeout_seconds=15.0,
+    ),
+    ToolSpec(
+        name="multiply",
+        import_path="TARS.graphs.utils.tools:MultiplyTool",
+        keywords=("multiply", "times", "product"),
+        cache_ttl_seconds=86400.0,
+        expected_latency_seconds=0.0,
+    ),
+    ToolSpec(
+        name="get_word_length",
+        import_path="TARS.graphs.tools.custom_tools:get_word_length",
+        keywords=("word", "length", "letter", "character", "count", "long"),
+        cache_ttl_seconds=86400.0,
+        expected_latency_seconds=0.0,
+    ),
+    ToolSpec(
+        name="handle_all_unread_gmail",
+        import_path="TARS.graphs.tools.custom_tools:handle_all_unread_gmail",
+        keywords=("email", "mail", "gmail", "inbox", "unread", "triage"),
+        side_effecting=True,
+        expected_latency_seconds=20.0,
+        timeout_seconds=120.0,
+        cost_class="high",
+        max_concurrency=1,
+        max_output_tokens=1500,
+    ),
+    ToolSpec(
+        name="fetch_emails_by_sender_name",
+        import_path="TARS.graphs.tools.custom_tools:fetch_emails_by_sender_name",
+        keywords=("email", "mail", "gmail", "inbox", "sent", "from"),
+        cache_ttl_seconds=120.0,
+        expected_latency_seconds=3.0,
+        max_output_tokens=1500,
+    ),
+    ToolSpec(
+        name="read_image_tool",
+        import_path="TARS.graphs.tools.custom_tools:read_image_tool",
+        keywords=("image", "picture", "photo", "screenshot", "look", "see"),
+        cache_ttl_seconds=3600.0,
+        expected_latency_seconds=8.0,
+        timeout_seconds=60.0,
+        cost_class="high",
+        max_concurrency=2,
+    ),
+    ToolSpec(
+        name="fetch_dms_last_x_hours",
+        import_path="TARS.graphs.tools.custom_tools:fetch_dms_last_x_hours",
+        keywords=("slack", "dm", "direct", "message", "chat"),
+        cache_ttl_seconds=60.0,
+        expected_latency_seconds=3.0,
+        max_output_tokens=1500,
+    ),
+    ToolSpec(
+        name="fetch_calendar_events_for_x_days",
+        import_path="TARS.graphs.tools.custom_tools:fetch_calendar_events_for_x_days",
+        keywords=("calendar", "meeting", "event", "schedule", "busy", "free", "tomorrow", "week"),
+        cache_ttl_seconds=300.0,
+        expected_latency_seconds=2.0,
+        max_output_tokens=1000,
+    ),
+]
+
+
+def load_tool(spec: ToolSpec) -> BaseTool:
+    """
+    Import and construct the tool a spec points at.
+
+    Args:
+        spec (ToolSpec): The tool's metadata.
+
+    Returns:
+        BaseTool: The tool.
+    """
+    module_name, _, attribute = spec.import_path.partition(":")
+    target = getattr(importlib.import_module(module_name), attribute)
+    tool = target if isinstance(target, BaseTool) else target(**spec.kwargs)
+    if tool.name != spec.name:
+        logger.warning(f"Tool spec {spec.name} loaded a tool named {tool.name}")
+    return tool
+
+
+class ToolRegistry:
+    """
+    Tools declared by ToolSpec, imported and constructed on first use.
+
+    The metadata (cacheability, side effects, timeouts, concurrency limits,
+    selection hints and cost) is available without importing anything, and
+    drives the executor, the caches and tool selection. ToolSettings entries
+    override the declared values.
+    """
+
+    def __init__(self, specs: Sequence[ToolSpec], enabled: Sequence[str]):
+        self._specs: Dict[str, ToolSpec] = {spec.name: spec for spec in specs}
+        unknown = [name for name in enabled if name not in self._specs]
+        if unknown:
+            logger.warning(f"Ignoring unknown enabled tools: {unknown}")
+        self.enabled = [name for name in enabled if name in self._specs]
+        self._tools: Dict[str, BaseTool] = {}
+        self._lock = threading.Lock()
+
+    def spec(self, name: str) -> ToolSpec:
+        return self._specs[name]
+
+    def specs(self) -> List[ToolSpec]:
+        return list(self._specs.values())
+
+    def get(self, name: str) -> BaseTool:
+        """
+        Return a tool, importing and constructing it on first use.
+
+        Raises:
+            KeyError: If no tool with this name is declared.
+        """
+        tool = self._tools.get(name)
+        if tool is None:
+            spec = self._specs[name]
+            with self._lock:
+                tool = self._tools.get(name)
+                if tool is None:
+                    started = time.perf_counter()
+                    tool = self._tools[name] = load_tool(spec)
+                    logger.info(f"Loaded tool {name} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return tool
+
+    def enabled_tools(self) -> List[BaseTool]:
+        """Load and return the enabled tools, skipping any that fail to load."""
+        tools = []
+        for name in self.enabled:
+            try:
+                tools.append(self.get(name))
+            except Exception as e:
+                logger.error(f"Could not load tool {name}: {e}")
+        return tools
+
+    def loaded(self) -> List[str]:
+        """Names of the tools imported so far."""
+        return list(self._tools)
+
+    def timeouts(self) -> Dict[str, float]:
+        declared = {spec.name: spec.timeout_seconds for spec in self._specs.values() if spec.timeout_seconds}
+        return {**declared, **tool_settings.tool_timeouts}
+
+    def cache_ttls(self) -> Dict[str, float]:
+        declared = {
+            spec.name: spec.cache_ttl_seconds
+            for spec in self._specs.values()
+            if spec.cache_ttl_seconds is not None
+        }
+        return {**declared, **tool_settings.tool_cache_ttls}
+
+    def side_effecting(self) -> List[str]:
+        declared = [spec.name for spec in self._specs.values() if spec.side_effecting]
+        return declared + [name for name in tool_settings.tool_side_effecting if name not in declared]
+
+    def concurrency_limits(self) -> Dict[str, int]:
+        declared = {spec.name: spec.max_concurrency for spec in self._specs.values() if spec.max_concurrency}
+        return {**declared, **tool_settings.tool_concurrency_limits}
+
+    def output_token_caps(self) -> Dict[str, int]:
+        declared = {spec.name: spec.max_output_tokens for spec in self._specs.values() if spec.max_output_tokens}
+        return {**declared, **tool_settings.tool_output_token_caps}
+
+    def keywords(self) -> Dict[str, List[str]]:
+        return {
+            spec.name: list(spec.keywords) + tool_settings.tool_selection_keywords.get(spec.name, [])
+            for spec in self._specs.values()
+        }
+
+    def costs(self) -> Dict[str, Tuple[int, float]]:
+        """(cost class rank, expected latency) per tool, cheapest and fastest first."""
+        return {
+            spec.name: (COST_CLASSES.index(spec.cost_class), spec.expected_latency_seconds)
+            for spec in self._specs.values()
+        }
 
 
-tools = [TavilySearchResults(max_results=1), YouTubeSearchTool(max_results=3)]
+# Shared registry; only the tools in ToolSettings.tools_enabled are loaded by the agent
+tool_registry = ToolRegistry(TOOL_SPECS, tool_settings.tools_enabled)
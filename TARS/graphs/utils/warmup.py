@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+
+
+class WarmupStatus:
+    """
+    Tracks startup warmup, for readiness probes.
+
+    Warmup is best-effort: a failed step is logged and recorded but does not
+    keep the process out of rotation, and neither does a warmup that runs
+    past timeout_seconds. Until then, ready is False so the load balancer
+    keeps sending traffic to warm processes.
+    """
+
+    def __init__(self, timeout_seconds: float = 60.0):
+        self.timeout_seconds = timeout_seconds
+        self.state = PENDING
+        self.steps: List[Dict[str, object]] = []
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def begin(self) -> bool:
+        """Mark warmup as started; False if it already ran or is running."""
+        with self._lock:
+            if self.state != PENDING:
+                return False
+            self.state = WARMING
+            self._started = time.monotonic()
+            return True
+
+    def finish(self) -> None:
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._finished = time.monotonic()
+            self.state = READY
+        logger.info(f"Warmup finished in {self.elapsed_ms():.0f} ms: {self.steps}")
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a warmup step, recording (not raising) any error."""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"Warmup step {name} failed: {e}")
+        finally:
+            record = {"step": name, "ms": round((time.perf_counter() - started) * 1000, 1)}
+            if error is not None:
+                record["error"] = error
+            with self._lock:
+                self.steps.append(record)
+
+    def elapsed_ms(self) -> float:
+        with self._lock:
+            if self._started is None:
+                return 0.0
+            return ((self._finished or time.monotonic()) - self._started) * 1000
+
+    @property
+    def timed_out(self) -> bool:
+        return self.state == WARMING and self.elapsed_ms() > self.timeout_seconds * 1000
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY or self.timed_out
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "timed_out": self.timed_out,
+            "elapsed_ms": round(self.elapsed_ms(), 1),
+            "steps": steps,
+        }
@@ -1,13 +1,17 @@
-import uvicorn
 from multiprocessing import Process
 import subprocess
-from surfaces.API.api import app as api_app
-from surfaces.slack.slack_app import SlackBot
 
+# Each process imports only its own surface, so the parent stays light and
+# no agent state (e.g. the checkpoint database connection) is shared across fork
 def run_api():
+    import uvicorn
+    from surfaces.API.api import app as api_app
+
     uvicorn.run(api_app, host="0.0.0.0", port=8000)
 
 def run_slack_bot():
+    from surfaces.slack.slack_app import SlackBot
+
     bot = SlackBot()
     bot.start()
 
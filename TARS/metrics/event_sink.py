@@ -0,0 +1,231 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from TARS.config.config import event_sink_settings, storage_settings
+from pydantic import BaseModel
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# What emit() does when the buffer is full
+DROP_NEWEST = "drop_newest"  # discard the new event
+DROP_OLDEST = "drop_oldest"  # discard the oldest buffered event
+BLOCK = "block"  # wait up to block_timeout for room, then discard the new event (never on an event loop)
+OVERFLOW_POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+
+def _on_event_loop() -> bool:
+    """True when called from a thread running an asyncio event loop, which must never block."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class JSONLEventWriter:
+    """
+    Appends events as JSON lines to size-rotated files in a directory.
+
+    Each process writes its own files ({prefix}-{start time}-{pid}.jsonl),
+    so workers sharing the directory never interleave lines; a new file is
+    started once the current one reaches max_bytes.
+    """
+
+    def __init__(self, directory: str, prefix: str = "events", max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.path: Optional[str] = None
+        self._file = None
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self.path = os.path.join(self.directory, f"{self.prefix}-{started}-{os.getpid()}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, events: List[BaseModel]) -> None:
+        if self._file is None or (self.max_bytes and self._file.tell() >= self.max_bytes):
+            self.close()
+            self._open()
+        self._file.write("".join(event.model_dump_json() + "\n" for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BufferedEventSink:
+    """
+    Buffers instrumentation events in memory and writes them in batches off
+    the request path.
+
+    emit() only appends the event to a bounded buffer; a background thread
+    serializes and writes batches of up to batch_size events whenever a
+    batch is full or flush_interval seconds have passed. When the buffer is
+    full, the overflow policy decides which event is dropped (or whether
+    emit waits for room; emit called on an event loop drops the new event
+    instead of waiting). close() writes whatever is buffered; it also runs
+    at interpreter exit.
+
+    The writer is any object with write(events) and close(), e.g. JSONLEventWriter.
+    """
+
+    def __init__(
+        self,
+        writer: Any,
+        max_buffer: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = DROP_NEWEST,
+        block_timeout: float = 0.05,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported event sink overflow policy: {overflow}")
+        self.writer = writer
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {"emitted": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0}
+
+    def emit(self, event: BaseModel) -> bool:
+        """
+        Queue an event for writing, without blocking on I/O.
+
+        Returns:
+            bool: False if the event was dropped (the buffer was full or the sink is closed).
+        """
+        with self._lock:
+            if self._closed:
+                self._stats["dropped"] += 1
+                return False
+            if self._thread is None:
+                self._start()
+            if len(self._buffer) >= self.max_buffer:
+                if self.overflow == DROP_OLDEST:
+                    self._buffer.popleft()
+                    self._stats["dropped"] += 1
+                elif self.overflow != BLOCK or _on_event_loop() or not self._not_full.wait_for(
+                    lambda: len(self._buffer) < self.max_buffer, self.block_timeout
+                ):
+                    self._stats["dropped"] += 1
+                    return False
+            self._buffer.append(event)
+            self._stats["emitted"] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._not_empty.notify()
+        return True
+
+    def _start(self) -> None:
+        """Start the writer thread (caller holds the lock)."""
+        self._thread = threading.Thread(target=self._run, name="tars-events", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _take(self) -> List[BaseModel]:
+        """Remove and return up to batch_size buffered events (caller holds the lock)."""
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if batch:
+            self._not_full.notify_all()
+        return batch
+
+    def _write(self, batch: List[BaseModel]) -> None:
+        try:
+            with self._write_lock:
+                self.writer.write(batch)
+        except Exception as e:
+            with self._lock:
+                self._stats["write_errors"] += 1
+                self._stats["dropped"] += len(batch)
+            logger.error(f"Writing {len(batch)} events failed: {e}")
+            return
+        with self._lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                self._not_empty.wait_for(
+                    lambda: self._closed or len(self._buffer) >= self.batch_size, self.flush_interval
+                )
+                if self._closed:
+                    return
+                batch = self._take()
+            if batch:
+                self._write(batch)
+
+    def flush(self) -> int:
+        """Write everything buffered now; returns the number of events written."""
+        written = 0
+        while True:
+            with self._lock:
+                batch = self._take()
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread and write what is still buffered."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+        with self._write_lock:
+            self.writer.close()
+        logger.info(f"Event sink closed: {self.snapshot()}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "buffered": len(self._buffer)}
+
+
+def build_event_sink() -> Optional[BufferedEventSink]:
+    """
+    Build the user event sink from EventSinkSettings.
+
+    Returns:
+        BufferedEventSink: The sink, writing JSONL files under the data dir, or None when disabled.
+    """
+    if not event_sink_settings.event_sink_enabled:
+        return None
+    writer = JSONLEventWriter(
+        os.path.join(storage_settings.data_dir, event_sink_settings.event_sink_dir),
+        max_bytes=event_sink_settings.event_sink_max_file_bytes,
+    )
+    return BufferedEventSink(
+        writer,
+        max_buffer=event_sink_settings.event_sink_buffer_size,
+        batch_size=event_sink_settings.event_sink_batch_size,
+        flush_interval=event_sink_settings.event_sink_flush_interval_seconds,
+        overflow=event_sink_settings.event_sink_overflow,
+        block_timeout=event_sink_settings.event_sink_block_timeout_seconds,
+    )
+
+
+# Shared by the API and the Slack bot of this process
+event_sink = build_event_sink()
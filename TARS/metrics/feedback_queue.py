@@ -0,0 +1,265 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from TARS.config.config import feedback_settings, storage_settings
+from langsmith.utils import LangSmithConflictError
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# How long a worker owns the rows it took, so another worker retries them if it dies mid-flush
+CLAIM_SECONDS = 120.0
+
+
+class FeedbackQueue:
+    """
+    Accepts feedback at once and submits it to LangSmith in the background.
+
+    Feedback is written to a SQLite spool file before submit() returns, so it
+    survives restarts and LangSmith outages. A worker thread takes batches
+    from the spool and sends them; failed items are retried with exponential
+    backoff and dropped (with an error log) after max_attempts. Every worker
+    on the host may share the spool: rows are claimed before they are sent.
+    Each item carries its own feedback ID, so a retry of a submission that
+    did reach LangSmith is not recorded twice.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        spool_path: str,
+        batch_size: int = 20,
+        flush_interval: float = 2.0,
+        max_attempts: int = 8,
+        retry_base: float = 2.0,
+        retry_max: float = 300.0,
+    ):
+        self.client = client
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"submitted": 0, "sent": 0, "failed": 0, "dropped": 0, "flushes": 0}
+        self._flush_ms_total = 0.0
+        self._last_flush_ms = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+            conn = sqlite3.connect(self.spool_path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                "id TEXT PRIMARY KEY, run_id TEXT NOT NULL, key TEXT NOT NULL, score REAL, comment TEXT, "
+                "created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, claimed_until REAL NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS feedback_due ON feedback (next_attempt_at)")
+            self._conn = conn
+        return self._conn
+
+    def submit(self, run_id: str, key: str, score: Optional[float], comment: Optional[str] = None) -> str:
+        """
+        Spool feedback for a run; it is sent to LangSmith in the background.
+
+        Args:
+            run_id (str): The LangSmith run the feedback is about.
+            key (str): The feedback key, e.g. "user_satisfaction".
+            score (float, optional): The score.
+            comment (str, optional): A comment.
+
+        Returns:
+            str: The ID the feedback will have in LangSmith.
+        """
+        feedback_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO feedback (id, run_id, key, score, comment, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (feedback_id, str(run_id), key, score, comment, now, now),
+            )
+            self._stats["submitted"] += 1
+        self._wake.set()
+        return feedback_id
+
+    def _claim(self) -> List[Tuple]:
+        """Take up to batch_size due items, so no other worker sends them meanwhile."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, run_id, key, score, comment, attempts FROM feedback "
+                    "WHERE next_attempt_at <= ? AND claimed_until <= ? ORDER BY next_attempt_at LIMIT ?",
+                    (now, now, self.batch_size),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE feedback SET claimed_until = ? WHERE id = ?",
+                    [(now + CLAIM_SECONDS, row[0]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _send(self, row: Tuple) -> None:
+        feedback_id, run_id, key, score, comment, _ = row
+        try:
+            # Retries are ours, with backoff across flushes
+            self.client.create_feedback(
+                run_id=run_id,
+                key=key,
+                score=score,
+                comment=comment,
+                feedback_id=feedback_id,
+                stop_after_attempt=1,
+            )
+        except LangSmithConflictError:
+            pass  # an earlier attempt was recorded
+
+    def _retry_delay(self, attempts: int) -> float:
+        return min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+
+    def flush(self) -> int:
+        """
+        Send one batch of due feedback.
+
+        Sending stops at the first failure, so an outage costs one request
+        per flush; the unsent rest of the batch is released for the next one.
+
+        Returns:
+            int: The number of items sent.
+        """
+        rows = self._claim()
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        sent = []
+        failed = None
+        for row in rows:
+            try:
+                self._send(row)
+                sent.append(row[0])
+            except Exception as e:
+                failed = (row, e)
+                break
+
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("DELETE FROM feedback WHERE id = ?", [(feedback_id,) for feedback_id in sent])
+            self._stats["sent"] += len(sent)
+            if failed is not None:
+                (feedback_id, run_id, *_, attempts), error = failed
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    conn.execute("DELETE FROM feedback WHERE id = ?", (feedback_id,))
+                    self._stats["dropped"] += 1
+                    logger.error(f"Dropping feedback {feedback_id} for run {run_id} after {attempts} attempts: {error}")
+                else:
+                    delay = self._retry_delay(attempts)
+                    conn.execute(
+                        "UPDATE feedback SET attempts = ?, next_attempt_at = ?, claimed_until = 0 WHERE id = ?",
+                        (attempts, time.time() + delay, feedback_id),
+                    )
+                    logger.warning(f"Sending feedback {feedback_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+                self._stats["failed"] += 1
+                unsent = [(row[0],) for row in rows[len(sent) + 1:]]
+                conn.executemany("UPDATE feedback SET claimed_until = 0 WHERE id = ?", unsent)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stats["flushes"] += 1
+            self._flush_ms_total += elapsed_ms
+            self._last_flush_ms = elapsed_ms
+        logger.info(f"Flushed {len(sent)}/{len(rows)} feedback items to LangSmith in {elapsed_ms:.0f} ms")
+        return len(sent)
+
+    def depth(self) -> int:
+        """Feedback waiting in the spool (including items another worker is sending)."""
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Keep going while full batches are sent, otherwise wait for new feedback
+                if self.flush() == self.batch_size:
+                    continue
+            except Exception as e:
+                logger.error(f"Feedback flush failed: {e}", exc_info=True)
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start the background worker (once)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tars-feedback", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the worker, sending what is due for up to timeout seconds.
+
+        Anything still unsent stays in the spool for the next start.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline and self.flush():
+                pass
+        except Exception as e:
+            logger.warning(f"Final feedback flush failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        depth = self.depth()
+        with self._lock:
+            flushes = self._stats["flushes"]
+            return {
+                **self._stats,
+                "depth": depth,
+                "last_flush_ms": round(self._last_flush_ms, 1),
+                "avg_flush_ms": round(self._flush_ms_total / flushes, 1) if flushes else 0.0,
+            }
+
+
+def build_feedback_queue(client: Any) -> Optional[FeedbackQueue]:
+    """
+    Build the background feedback queue from FeedbackSettings.
+
+    Args:
+        client: The LangSmith client feedback is sent with.
+
+    Returns:
+        FeedbackQueue: The queue (not yet started), or None when feedback is sent inline.
+    """
+    if not feedback_settings.feedback_queue_enabled:
+        return None
+    return FeedbackQueue(
+        client,
+        os.path.join(storage_settings.data_dir, feedback_settings.feedback_spool_file),
+        batch_size=feedback_settings.feedback_batch_size,
+        flush_interval=feedback_settings.feedback_flush_interval_seconds,
+        max_attempts=feedback_settings.feedback_max_attempts,
+        retry_base=feedback_settings.feedback_retry_base_seconds,
+        retry_max=feedback_settings.feedback_retry_max_seconds,
+    )
@@ -0,0 +1,231 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from TARS.config.config import run_index_settings, storage_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class RunRecord(NamedTuple):
+    run_id: str
+    user_id: str
+    surface: str  # "API" or "Slack"
+    created_at: float
+    channel: Optional[str] = None
+    message_ts: Optional[str] = None  # the Slack message holding the answer
+
+
+class RunIndex:
+    """
+    Maps agent runs to the users and Slack messages they answered, so feedback
+    can be attached to the right LangSmith run.
+
+    Records are keyed by run_id, with lookups by (surface, user) for the
+    user's latest run and by Slack message ts. A bounded in-memory tier (LRU,
+    expiring after ttl seconds) serves this process; with a db_path, records
+    are also written to a SQLite file shared by every worker on the host, so
+    feedback sent to one worker finds runs served by another. Rows older than
+    ttl are purged from the file at most once a minute.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 4096, ttl: float = 7 * 24 * 3600.0):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._runs: "OrderedDict[str, RunRecord]" = OrderedDict()
+        self._latest: Dict[Tuple[str, str], str] = {}
+        self._by_message: Dict[str, str] = {}
+        self._conn = None
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, surface TEXT NOT NULL, "
+                "created_at REAL NOT NULL, channel TEXT, message_ts TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_user ON runs (surface, user_id, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_message ON runs (message_ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _expired(self, record: RunRecord) -> bool:
+        return bool(self.ttl) and record.created_at <= time.time() - self.ttl
+
+    def _remember(self, record: RunRecord) -> None:
+        """Add a record to the memory tier (caller holds the lock)."""
+        self._runs[record.run_id] = record
+        self._runs.move_to_end(record.run_id)
+        latest = self._runs.get(self._latest.get((record.surface, record.user_id)))
+        if latest is None or latest.created_at <= record.created_at:
+            self._latest[(record.surface, record.user_id)] = record.run_id
+        if record.message_ts:
+            self._by_message[record.message_ts] = record.run_id
+        while len(self._runs) > self.max_entries:
+            self._forget(next(iter(self._runs)))
+
+    def _forget(self, run_id: str) -> None:
+        """Drop a record and the lookups pointing at it (caller holds the lock)."""
+        record = self._runs.pop(run_id, None)
+        if record is None:
+            return
+        if self._latest.get((record.surface, record.user_id)) == run_id:
+            del self._latest[(record.surface, record.user_id)]
+        if record.message_ts and self._by_message.get(record.message_ts) == run_id:
+            del self._by_message[record.message_ts]
+
+    def _cached(self, run_id: Optional[str]) -> Optional[RunRecord]:
+        """A live record from the memory tier (caller holds the lock)."""
+        record = self._runs.get(run_id) if run_id else None
+        if record is None:
+            return None
+        if self._expired(record):
+            self._forget(run_id)
+            return None
+        self._runs.move_to_end(run_id)
+        return record
+
+    def _select(self, where: str, params: tuple) -> Optional[RunRecord]:
+        """The newest live row matching where, cached in memory (caller holds the lock)."""
+        row = self._connection().execute(
+            "SELECT run_id, user_id, surface, created_at, channel, message_ts FROM runs "
+            f"WHERE {where} AND created_at > ? ORDER BY created_at DESC LIMIT 1",
+            (*params, time.time() - self.ttl if self.ttl else 0.0),
+        ).fetchone()
+        if row is None:
+            return None
+        record = RunRecord(*row)
+        self._remember(record)
+        return record
+
+    def record(
+        self,
+        run_id: str,
+        user_id: str,
+        surface: str,
+        channel: Optional[str] = None,
+        message_ts: Optional[str] = None,
+    ) -> RunRecord:
+        """
+        Record a run, making it the user's latest on that surface.
+
+        Args:
+            run_id (str): The LangSmith run ID.
+            user_id (str): The user the run answered.
+            surface (str): Where the request came from ("API" or "Slack").
+            channel (str, optional): The Slack channel of the answer.
+            message_ts (str, optional): The ts of the Slack message holding the answer.
+
+        Returns:
+            RunRecord: The stored record.
+        """
+        record = RunRecord(str(run_id), user_id, surface, time.time(), channel, message_ts)
+        with self._lock:
+            self._remember(record)
+            if self.db_path:
+                self._connection().execute(
+                    "INSERT OR REPLACE INTO runs (run_id, user_id, surface, created_at, channel, message_ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    record,
+                )
+                self._maybe_purge()
+        return record
+
+    def attach_message(self, run_id: str, channel: str, message_ts: str) -> Optional[RunRecord]:
+        """
+        Link a recorded run to the Slack message that shows its answer.
+
+        Returns:
+            RunRecord: The updated record, or None if the run is unknown.
+        """
+        with self._lock:
+            record = self._cached(str(run_id))
+            if record is None and self.db_path:
+                record = self._select("run_id = ?", (str(run_id),))
+            if record is None:
+                return None
+            record = record._replace(channel=channel, message_ts=message_ts)
+            self._remember(record)
+            if self.db_path:
+                self._connection().execute(
+                    "UPDATE runs SET channel = ?, message_ts = ? WHERE run_id = ?",
+                    (channel, message_ts, record.run_id),
+                )
+        return record
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        """The record of a run, or None if it is unknown or expired."""
+        with self._lock:
+            record = self._cached(str(run_id))
+            if record is None and self.db_path:
+                record = self._select("run_id = ?", (str(run_id),))
+        return record
+
+    def latest_for_user(self, user_id: str, surface: str) -> Optional[RunRecord]:
+        """
+        The user's most recent run on a surface.
+
+        With a shared file, the file is authoritative: another worker may have
+        served the user's latest run.
+        """
+        with self._lock:
+            if self.db_path:
+                return self._select("surface = ? AND user_id = ?", (surface, user_id))
+            return self._cached(self._latest.get((surface, user_id)))
+
+    def by_message_ts(self, message_ts: str) -> Optional[RunRecord]:
+        """The run whose answer is the Slack message with this ts."""
+        with self._lock:
+            record = self._cached(self._by_message.get(message_ts))
+            if record is None and self.db_path:
+                record = self._select("message_ts = ?", (message_ts,))
+        return record
+
+    def _maybe_purge(self) -> None:
+        now = time.time()
+        if not self.ttl or now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        purged = self._connection().execute(
+            "DELETE FROM runs WHERE created_at <= ?", (now - self.ttl,)
+        ).rowcount
+        if purged:
+            logger.info(f"Purged {purged} expired runs from the run index")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"cached": len(self._runs), "users": len(self._latest), "messages": len(self._by_message)}
+
+
+def build_run_index() -> RunIndex:
+    """
+    Build the run index from RunIndexSettings.
+
+    Returns:
+        RunIndex: The index, shared through a SQLite file unless the backend is "memory".
+    """
+    backend = run_index_settings.run_index_backend
+    if backend == "sqlite":
+        db_path = os.path.join(storage_settings.data_dir, run_index_settings.run_index_db_file)
+    elif backend == "memory":
+        db_path = None
+    else:
+        raise ValueError(f"Unsupported run index backend: {backend}")
+    return RunIndex(
+        db_path,
+        max_entries=run_index_settings.run_index_max_entries,
+        ttl=run_index_settings.run_index_ttl_seconds,
+    )
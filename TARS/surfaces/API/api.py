@@ -1,18 +1,27 @@
+import asyncio
+import json
 import logging
+import time
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timezone
 import uuid
+from typing import Optional
 
-import aiohttp
-import requests
-from TARS.config.config import github_oauth_settings
+import httpx
+from TARS.config.config import github_api_settings, github_oauth_settings
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, Header, HTTPException, Request
-from TARS.graphs.core_agent import run_core_agent
+from TARS.graphs.core_agent import arun_core_agent, awarm_up, warmup_status
+from TARS.graphs.utils.models import is_requestable
 from langsmith import traceable, Client
 from langsmith.run_helpers import get_current_run_tree
 from TARS.metrics.event_instrumentation import IncomingUserEvent
-from pydantic import BaseModel
-from starlette.responses import Response
+from TARS.metrics.event_sink import event_sink
+from TARS.metrics.feedback_queue import build_feedback_queue
+from TARS.metrics.run_index import build_run_index
+from TARS.surfaces.API.github_auth import build_http_client, build_token_verifier
+from pydantic import BaseModel, Field
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,18 +33,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-
-# Global storage for user run IDs (in production, use a proper database)
-user_run_ids = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start serving immediately and warm up in the background on the serving
+    event loop; /readyz reports ready once warmup is done.
+    """
+    warmup_task = asyncio.create_task(awarm_up())
+    app.state.http_client = build_http_client()
+    if feedback_queue is not None:
+        feedback_queue.start()
+    yield
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+    await app.state.http_client.aclose()
+    if feedback_queue is not None:
+        # Send what LangSmith will take now; the rest stays spooled for the next start
+        await asyncio.to_thread(feedback_queue.stop)
+    if event_sink is not None:
+        await asyncio.to_thread(event_sink.close)
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Each user's runs, shared with the other workers so feedback finds the right run
+run_index = build_run_index()
+
+# Verified GitHub tokens, cached by hash so most requests skip the GitHub round-trip
+github_token_verifier = build_token_verifier()
 langsmith_client = Client()
 
+# Feedback is spooled and sent to LangSmith in the background, off the request path
+feedback_queue = build_feedback_queue(langsmith_client)
+
 def setup_routes():
     """Setup all API routes and their handlers."""
     app.post("/chat")(handle_chat_request)
+    app.post("/chat/stream")(handle_chat_stream_request)
     app.post("/chat_github")(handle_github_chat_request)
     app.post("/feedback")(handle_feedback_request)
     app.get("/test")(handle_test_request)
+    app.get("/healthz")(handle_health_request)
+    app.get("/readyz")(handle_ready_request)
     app.get("/auth/github/callback")(handle_github_oauth_callback)
 
 
@@ -46,6 +86,8 @@ class ChatRequest(BaseModel):
 
     message: str
     user_name: str = "Unknown User"
+    model_name: Optional[str] = None  # provider or "provider:model"; defaults to agent_model_name
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)  # defaults to agent_deadline_seconds
 
 
 class FeedbackRequest(BaseModel):
@@ -61,12 +103,26 @@ def log_user_event(event: IncomingUserEvent):
     """
     Log the user event for metrics and analysis.
 
+    The event is buffered and written to the event files in the background.
+
     Args:
         event: The IncomingUserEvent to be logged.
     """
-    # Here you would implement the actual logging logic
-    # This could involve sending the event to a database, logging service, etc.
-    logger.info(f"User Event Logged: {event.model_dump()}")
+    if event_sink is not None:
+        event_sink.emit(event)
+    else:
+        logger.info(f"User Event Logged: {event.model_dump()}")
+
+
+def check_model_name(request: ChatRequest) -> None:
+    """
+    Reject requests for a model that is not in the configured set.
+
+    Raises:
+        HTTPException: 400 if model_name is not a requestable model.
+    """
+    if request.model_name and not is_requestable(request.model_name):
+        raise HTTPException(status_code=400, detail=f"Model not available: {request.model_name}")
 
 
 @traceable(name="API Chat Endpoint")
@@ -81,14 +137,16 @@ async def handle_chat_request(request: ChatRequest):
         Response: The response from the core agent.
     """
     logger.info("=== API CHAT ENDPOINT START ===")
+    check_model_name(request)
     
     try:
         logger.info(f"Received request: {request}")
 
         # Capture run ID for feedback tracking
         run_tree = get_current_run_tree()
-        run_id = run_tree.id if run_tree else str(uuid.uuid4())
-        user_run_ids[request.user_name] = run_id
+        run_id = str(run_tree.id) if run_tree else str(uuid.uuid4())
+        # The run index may wait on the shared SQLite file, so it is kept off the event loop
+        await asyncio.to_thread(run_index.record, run_id, request.user_name, "API")
         logger.info(f"Captured Run ID: {run_id} for user {request.user_name}")
 
         # Create and log the IncomingUserEvent
@@ -103,7 +161,7 @@ async def handle_chat_request(request: ChatRequest):
         logger.info(f"Created user event: {user_event}")
         log_user_event(user_event)
 
-        # Prepare input for run_core_agent
+        # Prepare input for arun_core_agent
         user_input = {
             "user_name": user_event.user_name,
             "message": request.message,
@@ -111,22 +169,26 @@ async def handle_chat_request(request: ChatRequest):
         
         logger.info(f"Prepared user input for core agent: {user_input}")
 
-        # Get the generator from run_core_agent
-        agent_response_generator = run_core_agent(
+        # Get the async generator from arun_core_agent so the event loop stays free
+        agent_response_generator = arun_core_agent(
             user_name=user_input["user_name"],
-            message=user_input["message"]
+            message=user_input["message"],
+            model_name=request.model_name,
+            deadline_seconds=request.deadline_seconds,
         )
-        logger.info("Successfully got response generator from run_core_agent")
+        logger.info("Successfully got response generator from arun_core_agent")
 
-        # Collect all responses from the generator
+        # Only the final answer (or an error) is returned to the caller
         agent_response_text = ""
         response_count = 0
-        logger.info("Starting to iterate through response generator...")
+        logger.info("Starting to iterate through agent events...")
         
-        for response_part in agent_response_generator:
+        async for event in agent_response_generator:
+            if event.type not in ("final_answer", "error"):
+                continue
             response_count += 1
-            logger.info(f"Received response part #{response_count}: '{response_part}'")
-            agent_response_text += response_part
+            logger.info(f"Received {event.type} #{response_count}: '{event.content}'")
+            agent_response_text += event.content
 
         logger.info(f"Completed response collection. Total parts: {response_count}, Final response: '{agent_response_text}'")
         
@@ -143,106 +205,235 @@ async def handle_chat_request(request: ChatRequest):
         return {"response": f"An error occurred: {str(e)}"}
 
 
-async def verify_github_token(request: Request, x_github_token: str = Header(None)):
+def format_stream_event(event: dict, use_sse: bool) -> str:
     """
-    Verify the GitHub token provided in the request header.
+    Serialize a stream event as an SSE frame or an NDJSON line.
+
+    Args:
+        event (dict): The serialized agent event.
+        use_sse (bool): Whether to emit Server-Sent Events framing.
+
+    Returns:
+        str: The serialized event.
+    """
+    payload = json.dumps(event, default=str)
+    if use_sse:
+        return f"event: {event.get('type', 'message')}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+@traceable(name="API Chat Stream Endpoint")
+async def handle_chat_stream_request(request: ChatRequest, accept: str = Header(None)):
+    """
+    Handle chat requests and stream the agent's tokens back as they are produced.
+
+    Responds with Server-Sent Events when the client sends
+    "Accept: text/event-stream", and with NDJSON otherwise.
+
+    Args:
+        request (ChatRequest): The validated chat request object.
+        accept (str, optional): The Accept header of the request.
+
+    Returns:
+        StreamingResponse: The stream of agent events.
+    """
+    logger.info("=== API CHAT STREAM ENDPOINT START ===")
+    check_model_name(request)
+    logger.info(f"Received stream request: {request}")
+
+    run_tree = get_current_run_tree()
+    run_id = str(run_tree.id) if run_tree else str(uuid.uuid4())
+    await asyncio.to_thread(run_index.record, run_id, request.user_name, "API")
+    logger.info(f"Captured Run ID: {run_id} for user {request.user_name}")
+
+    user_event = IncomingUserEvent(
+        user_id=request.user_name,
+        user_name=request.user_name,
+        event_time=datetime.now(timezone.utc),
+        capability_invoked="TARS",
+        user_agent="API",
+        response_satisfaction="none",
+    )
+    log_user_event(user_event)
+
+    use_sse = accept is not None and "text/event-stream" in accept
+
+    async def event_stream():
+        yield format_stream_event({"type": "start", "run_id": run_id}, use_sse)
+        try:
+            async for event in arun_core_agent(
+                user_name=request.user_name,
+                message=request.message,
+                model_name=request.model_name,
+                deadline_seconds=request.deadline_seconds,
+            ):
+                if event.type == "user_echo":
+                    continue
+                yield format_stream_event(event.model_dump(exclude_none=True), use_sse)
+        except Exception as e:
+            logger.error(f"Error in chat stream endpoint: {str(e)}", exc_info=True)
+            yield format_stream_event(
+                {"type": "error", "content": f"An error occurred: {str(e)}"}, use_sse
+            )
+        yield format_stream_event({"type": "end", "run_id": run_id}, use_sse)
+        logger.info("=== API CHAT STREAM ENDPOINT END ===")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """
+    Return the shared HTTP client opened by the lifespan.
 
     Args:
         request (Request): The incoming request object.
+
+    Returns:
+        httpx.AsyncClient: The keep-alive client for outbound GitHub calls.
+    """
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
+        # Served without the lifespan (e.g. mounted in another app)
+        client = request.app.state.http_client = build_http_client()
+    return client
+
+
+async def read_json_body(request: Request) -> dict:
+    """
+    Parse the JSON body once per request; FastAPI shares the result with
+    every dependency and handler that asks for it.
+
+    Raises:
+        HTTPException: If the body is not valid JSON.
+    """
+    try:
+        return await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+
+
+async def verify_github_token(
+    x_github_token: str = Header(None),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Verify the GitHub token provided in the request header.
+
+    Args:
         x_github_token (str, optional): The GitHub token from the request header.
+        client (httpx.AsyncClient): The shared HTTP client.
 
     Returns:
         str: The verified GitHub token.
 
     Raises:
-        HTTPException: If the token is missing or invalid.
+        HTTPException: If the token is missing, invalid or belongs to another user.
     """
-    headers = dict(request.headers)
-    logging.info(f"Received API request to chat headers: {headers}")
-    body = await request.json()
-    logging.info(f"Received API request to chat: {body}")
     if x_github_token is None:
         raise HTTPException(status_code=400, detail="X-GitHub-Token header is missing")
 
-    # Validate that the token belongs to a particular username
-    response = requests.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"token {x_github_token}"},
-    )
-    response.raise_for_status()  # Raise exception if the request failed
-    user_data = response.json()
-    logging.info(f"GitHub user data: {user_data}")
-    if user_data["login"] not in [
-        "gpsandhu23",
-        "gsandhu_adobe",
-    ]:  # only limit this for my user for now
-        raise HTTPException(
-            status_code=403, detail="Token does not belong to the expected user"
-        )
-
+    # Validate that the token belongs to an allowed username
+    login = await github_token_verifier.verify(x_github_token, client)
+    logging.info(f"Verified GitHub token for {login}")
     return x_github_token
 
 
+COPILOT_CHAT_URL = "https://api.githubcopilot.com/chat/completions"
+
+
+def _copilot_request_body(body: dict) -> dict:
+    """Build the Copilot chat request from the most recent message of the incoming body."""
+    messages = body.get("messages", [])
+    if messages:
+        # Get the most recent message (the last one in the list)
+        message_content = messages[-1].get("content", "")
+        logging.info(f"Most recent message: {message_content}")
+    else:
+        message_content = ""
+        logging.info("No messages found")
+
+    return {
+        "stream": True,
+        "messages": [{"role": "user", "content": message_content}],
+        "max_tokens": 5000,
+        "temperature": 0.5,
+    }
+
+
 @traceable(name="API GitHub Chat Endpoint")
 async def handle_github_chat_request(
-    request: Request, github_token: str = Depends(verify_github_token)
+    body: dict = Depends(read_json_body),
+    github_token: str = Depends(verify_github_token),
+    client: httpx.AsyncClient = Depends(get_http_client),
 ):
     """
-    Handle chat requests and forward them to GitHub Copilot.
+    Handle chat requests and relay GitHub Copilot's streamed answer.
+
+    The Copilot request goes over the shared HTTP client, and its SSE chunks
+    are passed to the client as they arrive. Each chunk is only read from
+    Copilot once the previous one was sent, so a slow client slows the
+    upstream read instead of growing a buffer. If the client disconnects,
+    the upstream request is closed. Error responses are returned whole.
 
     Args:
-        request (Request): The incoming request object.
+        body (dict): The parsed request body.
         github_token (str): The verified GitHub token.
+        client (httpx.AsyncClient): The shared HTTP client.
 
     Returns:
-        Response: The response from GitHub Copilot.
+        Response: The streamed (or error) response from GitHub Copilot.
     """
-    async with aiohttp.ClientSession() as session:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {github_token}",
-        }
-        logging.info(f"Request headers: {headers}")
-        body = await request.json()
-        logging.info(f"Received API request to chat: {body}")
-
-        # Extract messages from the body
-        messages = body.get("messages", [])
-        if messages:
-            # Get the most recent message (the last one in the list)
-            recent_message = messages[-1]
-            message_content = recent_message.get("content", "")
-            logging.info(f"Most recent message: {message_content}")
-        else:
-            message_content = ""
-            logging.info("No messages found")
-
-        # Prepare the body for the API call to GitHub Copilot
-        request_body = {
-            "stream": True,
-            "messages": [{"role": "user", "content": message_content}],
-            "max_tokens": 5000,
-            "temperature": 0.5,
-        }
+    logging.info(f"Received API request to chat: {body}")
+    upstream_request = client.build_request(
+        "POST",
+        COPILOT_CHAT_URL,
+        headers={"Authorization": f"Bearer {github_token}"},
+        json=_copilot_request_body(body),
+        timeout=httpx.Timeout(
+            github_api_settings.api_timeout_seconds,
+            read=github_api_settings.copilot_read_timeout_seconds,
+        ),
+    )
+    started = time.perf_counter()
+    try:
+        upstream = await client.send(upstream_request, stream=True)
+    except httpx.HTTPError as e:
+        logging.error(f"Copilot request failed: {e!r}")
+        raise HTTPException(status_code=502, detail="Could not reach GitHub Copilot")
+    logging.info(f"Received API response status: {upstream.status_code}")
+
+    content_type = upstream.headers.get("content-type", "application/json")
+    if upstream.status_code != 200 or "text/event-stream" not in content_type:
+        try:
+            content = await upstream.aread()
+        finally:
+            await upstream.aclose()
+        return Response(content=content, media_type=content_type, status_code=upstream.status_code)
 
-        # Post the chat request to GitHub Copilot and log the response
-        async with session.post(
-            "https://api.githubcopilot.com/chat/completions",
-            headers=headers,
-            json=request_body,
-        ) as capi_response:
-            response_body = await capi_response.read()
-            logging.info(f"Received API response status: {capi_response.status}")
-            logging.info(f"Received API response headers: {capi_response.headers}")
-            logging.info(f"Received API response body: {response_body}")
-
-            # Return the response from GitHub Copilot directly to the client
-            return Response(
-                content=response_body,
-                media_type="application/json",
-                status_code=capi_response.status,
+    async def relay():
+        relayed = 0
+        try:
+            async for chunk in upstream.aiter_bytes():
+                relayed += len(chunk)
+                yield chunk
+        finally:
+            # Also runs when the client disconnects, which cancels the upstream request
+            await upstream.aclose()
+            logging.info(
+                f"Relayed {relayed} bytes from Copilot in {(time.perf_counter() - started) * 1000:.0f} ms"
             )
 
+    return StreamingResponse(
+        relay(),
+        status_code=upstream.status_code,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @traceable(name="API Test Endpoint")
 async def handle_test_request():
@@ -255,6 +446,29 @@ async def handle_test_request():
     return {"message": "Hola! Welcome to our API!"}
 
 
+# Probe endpoints are not traced: they are polled every few seconds
+async def handle_health_request():
+    """
+    Liveness probe: the process is up and serving requests.
+
+    Returns:
+        dict: The liveness status.
+    """
+    return {"status": "ok"}
+
+
+async def handle_ready_request():
+    """
+    Readiness probe: ready once startup warmup has finished (or timed out),
+    so the load balancer keeps cold processes out of rotation.
+
+    Returns:
+        JSONResponse: The warmup status, with 200 when ready and 503 otherwise.
+    """
+    status = warmup_status.snapshot()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @traceable(name="API GitHub OAuth Callback")
 async def handle_github_oauth_callback(request: Request):
     """
@@ -367,6 +581,9 @@ async def handle_feedback_request(request: FeedbackRequest):
     """
     Handle feedback requests and log them to LangSmith.
 
+    Feedback is queued and sent in the background, so the response does not
+    wait on LangSmith; with the queue disabled it is sent before responding.
+
     Args:
         request (FeedbackRequest): The validated feedback request object.
 
@@ -385,13 +602,13 @@ async def handle_feedback_request(request: FeedbackRequest):
                 detail="Satisfaction score must be between 0.0 and 1.0"
             )
         
-        # Get the run_id for this user
-        run_id = user_run_ids.get(request.user_name)
+        # Get the latest run_id for this user
+        run = await asyncio.to_thread(run_index.latest_for_user, request.user_name, "API")
+        run_id = run.run_id if run else None
         logger.info(f"Looking up run_id for user {request.user_name}: {run_id}")
         
         if not run_id:
             logger.warning(f"No run_id found for user {request.user_name}")
-            logger.info(f"Available user_run_ids: {list(user_run_ids.keys())}")
             raise HTTPException(
                 status_code=404,
                 detail="No recent conversation found for this user. Please send a message first."
@@ -401,6 +618,17 @@ async def handle_feedback_request(request: FeedbackRequest):
         
         logger.info(f"Creating feedback - key: {feedback_key}, score: {request.satisfaction_score}, run_id: {run_id}")
         
+        if feedback_queue is not None:
+            feedback_id = await asyncio.to_thread(
+                feedback_queue.submit, run_id, feedback_key, request.satisfaction_score, request.comment
+            )
+            logger.info(f"Feedback {feedback_id} queued for user {request.user_name}: {feedback_key}={request.satisfaction_score}")
+            return {
+                "status": "success",
+                "message": "Feedback accepted",
+                "feedback_id": feedback_id
+            }
+        
         try:
             # Create feedback in LangSmith
             logger.info(f"Calling langsmith_client.create_feedback with:")
@@ -409,7 +637,8 @@ async def handle_feedback_request(request: FeedbackRequest):
             logger.info(f"  - run_id: {run_id}")
             logger.info(f"  - comment: {request.comment}")
             
-            feedback_result = langsmith_client.create_feedback(
+            feedback_result = await asyncio.to_thread(
+                langsmith_client.create_feedback,
                 key=feedback_key,
                 score=request.satisfaction_score,
                 run_id=run_id,
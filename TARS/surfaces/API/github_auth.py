@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import httpx
+from fastapi import HTTPException
+
+from TARS.config.config import github_api_settings
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build the shared async HTTP client for outbound GitHub and Copilot calls.
+
+    One client per process keeps connections (and TLS sessions) alive across
+    requests; the API lifespan opens it and closes it on shutdown.
+    """
+    max_connections = github_api_settings.api_max_connections
+    return httpx.AsyncClient(
+        timeout=github_api_settings.api_timeout_seconds,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+
+def token_key(token: str) -> str:
+    """The cache key for a token, so raw tokens are never stored."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class _Verdict(NamedTuple):
+    expires_at: float
+    login: Optional[str]
+    status_code: int  # 200 when the token may be used, else the error to answer with
+    detail: str
+
+
+class GitHubTokenVerifier:
+    """
+    Verifies GitHub tokens against the GitHub user API, caching the verdict.
+
+    Verdicts are cached per token hash: accepted tokens for ttl seconds,
+    rejected ones (invalid, or belonging to another user) for negative_ttl
+    seconds, so repeated requests skip the GitHub round-trip. Concurrent
+    requests with the same uncached token share one call to GitHub. Errors
+    reaching GitHub are not cached.
+    """
+
+    def __init__(
+        self,
+        allowed_users: Sequence[str],
+        ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+        max_entries: int = 1024,
+    ):
+        self.allowed_users = set(allowed_users)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._verdicts: "OrderedDict[str, _Verdict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: str) -> Optional[_Verdict]:
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            return None
+        if verdict.expires_at <= time.monotonic():
+            del self._verdicts[key]
+            return None
+        self._verdicts.move_to_end(key)
+        return verdict
+
+    def _store(self, key: str, verdict: _Verdict) -> None:
+        self._verdicts[key] = verdict
+        self._verdicts.move_to_end(key)
+        while len(self._verdicts) > self.max_entries:
+            self._verdicts.popitem(last=False)
+
+    async def _fetch(self, token: str, client: httpx.AsyncClient) -> _Verdict:
+        started = time.perf_counter()
+        try:
+            response = await client.get(
+                f"{GITHUB_API_URL}/user",
+                headers={"Authorization": f"token {token}", "Accept": "application/vnd.github+json"},
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"GitHub token verification failed: {e!r}")
+            raise HTTPException(status_code=502, detail="Could not reach GitHub to verify the token")
+        logger.info(
+            f"GitHub token verification returned {response.status_code} in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+        now = time.monotonic()
+        if response.status_code == 401:
+            return _Verdict(now + self.negative_ttl, None, 401, "Invalid GitHub token")
+        if response.status_code != 200:
+            # Rate limits and GitHub outages say nothing about the token
+            raise HTTPException(status_code=502, detail="Could not verify the GitHub token")
+        login = response.json().get("login")
+        if login not in self.allowed_users:
+            return _Verdict(now + self.negative_ttl, login, 403, "Token does not belong to the expected user")
+        return _Verdict(now + self.ttl, login, 200, "")
+
+    async def verify(self, token: str, client: httpx.AsyncClient) -> str:
+        """
+        Check that a token is valid and belongs to an allowed user.
+
+        Args:
+            token (str): The GitHub token.
+            client (httpx.AsyncClient): The shared HTTP client.
+
+        Returns:
+            str: The GitHub login the token belongs to.
+
+        Raises:
+            HTTPException: 401 for an invalid token, 403 for a token of another
+                user, 502 if GitHub could not be reached.
+        """
+        key = token_key(token)
+        verdict = self._cached(key)
+        if verdict is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch(token, client))
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            verdict = await asyncio.shield(task)
+            self._store(key, verdict)
+
+        if verdict.status_code != 200:
+            raise HTTPException(status_code=verdict.status_code, detail=verdict.detail)
+        return verdict.login
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._verdicts)}
+
+
+def build_token_verifier() -> GitHubTokenVerifier:
+    """Build a GitHubTokenVerifier from GitHubAPISettings."""
+    return GitHubTokenVerifier(
+        github_api_settings.allowed_users,
+        ttl=github_api_settings.token_cache_ttl_seconds,
+        negative_ttl=github_api_settings.token_negative_cache_ttl_seconds,
+        max_entries=github_api_settings.token_cache_max_entries,
+    )
@@ -6,8 +6,11 @@ from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 from langsmith import traceable, Client
 from langsmith.run_helpers import get_current_run_tree
-from TARS.graphs.core_agent import run_core_agent
+from TARS.graphs.core_agent import run_core_agent, start_warmup
 from TARS.metrics.event_instrumentation import IncomingUserEvent
+from TARS.metrics.event_sink import event_sink
+from TARS.metrics.feedback_queue import build_feedback_queue
+from TARS.metrics.run_index import build_run_index
 from datetime import datetime, timezone
 import uuid
 
@@ -29,8 +32,9 @@ class SlackBot:
         self.chat_history: list = []
         # self.agent_manager: AgentManager = AgentManager()
         self.initialize_slack_app()
-        self.user_run_ids = {}  # user_id -> run_id
+        self.run_index = build_run_index()  # run_id -> user and answer message, shared across workers
         self.langsmith_client = Client()  # Initialize LangSmith client
+        self.feedback_queue = build_feedback_queue(self.langsmith_client)  # sends reactions in the background
 
     def setup_logging(self) -> None:
         """
@@ -124,11 +128,11 @@ class SlackBot:
         user_id, channel_id = event.get('user'), event.get('channel')
         if self.is_direct_message(event):
             run_tree = get_current_run_tree()
-            run_id = run_tree.id if run_tree else str(uuid.uuid4())
-            self.user_run_ids[user_id] = run_id
+            run_id = str(run_tree.id) if run_tree else str(uuid.uuid4())
+            self.run_index.record(run_id, user_id, "Slack", channel=channel_id)
             logging.info(f"Captured Run ID: {run_id} for user {user_id}")
             
-            response = self.handle_direct_message(event, client, user_id, channel_id)
+            response = self.handle_direct_message(event, client, user_id, channel_id, run_id=run_id)
 
             # Create and log the IncomingUserEvent
             user_event = IncomingUserEvent(
@@ -155,7 +159,9 @@ class SlackBot:
         """
         return 'channel_type' in event and event['channel_type'] == 'im' and 'bot_id' not in event
 
-    def handle_direct_message(self, event: Dict[str, Any], client: Any, user_id: str, channel_id: str) -> str:
+    def handle_direct_message(
+        self, event: Dict[str, Any], client: Any, user_id: str, channel_id: str, run_id: Optional[str] = None
+    ) -> str:
         """
         Handle a direct message sent to the bot.
 
@@ -164,26 +170,26 @@ class SlackBot:
             client: The Slack client object.
             user_id: The ID of the user who sent the message.
             channel_id: The ID of the channel where the message was sent.
+            run_id: The run answering the message, linked to the reply so reactions find it.
 
         Returns:
             The agent's response text.
         """
         response = client.chat_postMessage(channel=channel_id, text="Working on it...")
         ts = response.data['ts']
+        if run_id:
+            self.run_index.attach_message(run_id, channel_id, ts)
         user_info, user_real_name = self.fetch_user_info(client, user_id)
         agent_input = self.prepare_agent_input(event, user_real_name)
 
         # Get the generator from run_core_agent
         agent_response_generator = run_core_agent(user_name=user_real_name, message=agent_input['message'])
 
-        # Collect all responses from the generator
+        # Only the final answer (or an error) is posted, so each turn costs one Slack update
         agent_response_text = ""
-        for response_part in agent_response_generator:
-            # The agent now only yields content, not the run_id
-            agent_response_text += response_part
-            
-            # Optionally, you can update the message in real-time as parts come in
-            self.send_response(client, channel_id, ts, agent_response_text)
+        for agent_event in agent_response_generator:
+            if agent_event.type in ("final_answer", "error"):
+                agent_response_text += agent_event.content
 
         # Send the final complete response
         self.send_response(client, channel_id, ts, agent_response_text)
@@ -193,13 +199,15 @@ class SlackBot:
         """
         Log the user event for metrics and analysis.
 
+        The event is buffered and written to the event files in the background.
+
         Args:
             event: The IncomingUserEvent to be logged.
         """
-        # Here you would implement the actual logging logic
-        # This could involve sending the event to a database, logging service, etc.
-        logging.info(f"User Event Logged: {event.model_dump()}")
-        print(f"User Event Logged: {event.model_dump()}")
+        if event_sink is not None:
+            event_sink.emit(event)
+        else:
+            logging.info(f"User Event Logged: {event.model_dump()}")
 
     def update_user_event_satisfaction(self, user_id: str, satisfaction: str) -> None:
         """
@@ -427,24 +435,32 @@ class SlackBot:
         
         if score is None:
             logging.info(f"Reaction '{reaction}' not recognized, ignoring")
-            logging.info(f"Available user_run_ids: {list(self.user_run_ids.keys())}")
             return
             
         logging.info(f"Processing valid reaction: {reaction} with score: {score}")
         
-        # Get the run_id for this user
-        run_id = self.user_run_ids.get(user_id)
-        logging.info(f"Looking up run_id for user {user_id}: {run_id}")
+        # Get the run that produced the message reacted to, else the user's latest run
+        message_ts = event.get('item', {}).get('ts')
+        run = self.run_index.by_message_ts(message_ts) if message_ts else None
+        if run is None:
+            run = self.run_index.latest_for_user(user_id, "Slack")
+        run_id = run.run_id if run else None
+        logging.info(f"Looking up run_id for message {message_ts} from user {user_id}: {run_id}")
         
         if not run_id:
             logging.warning(f"No run_id found for user {user_id}")
-            logging.info(f"Available user_run_ids: {list(self.user_run_ids.keys())}")
             return
             
         feedback_key = "user_satisfaction"
         
         logging.info(f"Creating feedback - key: {feedback_key}, score: {score}, run_id: {run_id}")
         
+        if self.feedback_queue is not None:
+            feedback_id = self.feedback_queue.submit(run_id, feedback_key, score, f"User reacted with {reaction}")
+            logging.info(f"Feedback {feedback_id} queued for user {user_id}: {feedback_key}={score}")
+            logging.info("=== REACTION HANDLER END ===")
+            return
+        
         try:
             # Create feedback in LangSmith
             logging.info(f"Calling langsmith_client.create_feedback with:")
@@ -473,8 +489,17 @@ class SlackBot:
         """
         Start the Slack bot using SocketModeHandler.
         """
+        start_warmup()
+        if self.feedback_queue is not None:
+            self.feedback_queue.start()
         handler = SocketModeHandler(self.app, slack_settings.slack_app_token)
-        handler.start()
+        try:
+            handler.start()
+        finally:
+            if self.feedback_queue is not None:
+                self.feedback_queue.stop()
+            if event_sink is not None:
+                event_sink.close()
 
 if __name__ == "__main__":
     bot = SlackBot()
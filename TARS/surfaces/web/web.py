@@ -36,12 +36,13 @@ if st.button("Submit Task"):
 
         # Call the core agent with the user task and image (if any)
         response = run_core_agent(
-            user_id="streamlit_user", user_message=str(agent_input)
+            user_name="streamlit_user", message=str(agent_input)
         )
 
-        # Since run_core_agent returns a generator, we need to iterate through it
-        for response_part in response:
-            st.write(response_part)
+        # run_core_agent yields typed events; only show the answer
+        for event in response:
+            if event.type in ("final_answer", "error"):
+                st.write(event.content)
 
 # Display the uploaded image
 if uploaded_file is not None:
@@ -1 +1,17 @@
-# Tests package for TARS 
\ No newline at end of file
+# Tests package for TARS
+import atexit
+import os
+import shutil
+import tempfile
+
+# Keep the suite's local state (checkpoints, rate limits, run index, feedback spool,
+# event files) out of the repo's .tars/; set before any TARS settings are loaded
+_data_dir = tempfile.mkdtemp(prefix="tars-tests-")
+atexit.register(shutil.rmtree, _data_dir, ignore_errors=True)
+os.environ["TARS_DATA_DIR"] = _data_dir
+
+# No background workers sending feedback to LangSmith or writing events;
+# the tests of those components build their own instances
+os.environ["FEEDBACK_QUEUE_ENABLED"] = "false"
+os.environ["EVENT_SINK_ENABLED"] = "false"
+os.environ["RUN_INDEX_BACKEND"] = "memory"
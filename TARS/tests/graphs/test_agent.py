@@ -1,6 +1,18 @@
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
-from TARS.graphs.core_agent import run_core_agent
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from TARS.graphs.core_agent import _run_config, arun_core_agent, run_core_agent
+from TARS.graphs.utils.events import AgentEventTranslator
+
+
+async def async_iter(items):
+    for item in items:
+        yield item
+
+
+async def collect(async_generator):
+    return [item async for item in async_generator]
 
 
 class TestCoreAgent(unittest.TestCase):
@@ -11,7 +23,7 @@ class TestCoreAgent(unittest.TestCase):
     def test_run_core_agent_valid_input(self, mock_graph):
         # Mock the graph stream to return a simple response
         mock_events = [
-            {"messages": [MagicMock(content="Test response")]}
+            ("updates", {"agent": {"messages": [AIMessage(content="Test response")]}})
         ]
         mock_graph.stream.return_value = mock_events
         
@@ -26,9 +38,9 @@ class TestCoreAgent(unittest.TestCase):
         responses = list(response_generator)
         
         # Verify the response
-        self.assertTrue(len(responses) > 0)
-        self.assertIsInstance(responses[0], str)
-        self.assertEqual(responses[0], "Test response")
+        self.assertEqual([event.type for event in responses], ["user_echo", "final_answer"])
+        self.assertEqual(responses[0].content, message)
+        self.assertEqual(responses[-1].content, "Test response")
 
     def test_run_core_agent_invalid_input(self):
         # Test with None input
@@ -50,7 +62,7 @@ class TestCoreAgent(unittest.TestCase):
         responses = list(response_generator)
         
         # Should handle empty response gracefully
-        self.assertEqual(len(responses), 0)
+        self.assertEqual([event.type for event in responses], ["user_echo"])
 
     @patch('TARS.graphs.core_agent.graph')
     def test_run_core_agent_exception_handling(self, mock_graph):
@@ -67,5 +79,96 @@ class TestCoreAgent(unittest.TestCase):
         responses = list(response_generator)
         
         # Should return error message
-        self.assertTrue(len(responses) > 0)
-        self.assertIn("error", responses[0].lower())
+        self.assertEqual(responses[-1].type, "error")
+        self.assertIn("error", responses[-1].content.lower())
+
+
+    def test_anonymous_requests_do_not_share_a_thread(self):
+        first = _run_config("Unknown User", None)["configurable"]["thread_id"]
+        second = _run_config("Unknown User", None)["configurable"]["thread_id"]
+        self.assertNotEqual(first, second)
+        self.assertEqual(_run_config("alice", None)["configurable"]["thread_id"], "alice")
+
+    @patch('TARS.graphs.core_agent.graph')
+    def test_anonymous_thread_is_deleted_after_the_run(self, mock_graph):
+        mock_graph.stream.return_value = [("updates", {"agent": {"messages": [AIMessage(content="Hi")]}})]
+        list(run_core_agent("Unknown User", "Hello"))
+        thread_id = mock_graph.stream.call_args.kwargs["config"]["configurable"]["thread_id"]
+        mock_graph.checkpointer.delete_thread.assert_called_once_with(thread_id)
+
+        list(run_core_agent("alice", "Hello"))
+        mock_graph.checkpointer.delete_thread.assert_called_once()
+
+
+class TestAsyncCoreAgent(unittest.TestCase):
+    @patch('TARS.graphs.core_agent.graph')
+    def test_arun_core_agent_valid_input(self, mock_graph):
+        mock_graph.astream.return_value = async_iter(
+            [("updates", {"agent": {"messages": [AIMessage(content="Test response")]}})]
+        )
+
+        responses = asyncio.run(collect(arun_core_agent("test_user_123", "Hi")))
+
+        self.assertEqual([event.type for event in responses], ["user_echo", "final_answer"])
+        self.assertEqual(responses[-1].content, "Test response")
+        mock_graph.astream.assert_called_once()
+        mock_graph.stream.assert_not_called()
+
+    def test_arun_core_agent_invalid_input(self):
+        with self.assertRaises(ValueError):
+            arun_core_agent(None, "test_user")
+        with self.assertRaises(ValueError):
+            arun_core_agent("test_user", None)
+
+    @patch('TARS.graphs.core_agent.graph')
+    def test_arun_core_agent_exception_handling(self, mock_graph):
+        mock_graph.astream.side_effect = Exception("Test error")
+
+        responses = asyncio.run(collect(arun_core_agent("test_user_123", "Hi")))
+
+        self.assertEqual(responses[-1].type, "error")
+        self.assertIn("error", responses[-1].content.lower())
+
+
+class TestAgentEventTranslator(unittest.TestCase):
+    def test_tool_loop_events(self):
+        translator = AgentEventTranslator()
+        tool_call = {"name": "tavily_search_results_json", "args": {"query": "x"}, "id": "call_1"}
+        chunks = [
+            ("messages", (AIMessageChunk(content="Let me check"), {"langgraph_node": "agent"})),
+            ("updates", {"agent": {"messages": [AIMessage(content="", tool_calls=[tool_call])]}}),
+            ("updates", {"action": {"messages": [ToolMessage(content="result", name="tavily_search_results_json", tool_call_id="call_1")]}}),
+            ("updates", {"agent": {"messages": [AIMessage(content=[{"type": "text", "text": "Done"}])]}}),
+        ]
+
+        events = [event for mode, chunk in chunks for event in translator.translate(mode, chunk)]
+
+        self.assertEqual(
+            [event.type for event in events],
+            ["model_delta", "tool_start", "tool_end", "final_answer"],
+        )
+        self.assertEqual(events[1].tool_name, "tavily_search_results_json")
+        self.assertEqual(events[2].tool_call_id, "call_1")
+        self.assertIsNotNone(events[2].duration_ms)
+        self.assertEqual(events[3].content, "Done")
+
+    def test_streams_only_the_winning_hedge_contender(self):
+        translator = AgentEventTranslator()
+        secondary = {"langgraph_node": "agent", "hedge_id": "h1", "hedge_contender": "secondary"}
+        primary = {"langgraph_node": "agent", "hedge_id": "h1", "hedge_contender": "primary"}
+        chunks = [
+            (AIMessageChunk(content="from "), secondary),
+            (AIMessageChunk(content="late"), primary),  # the loser's first chunk
+            (AIMessageChunk(content="secondary"), secondary),
+        ]
+
+        events = [event for chunk in chunks for event in translator.translate("messages", chunk)]
+
+        self.assertEqual("".join(event.content for event in events), "from secondary")
+
+    def test_ignores_tokens_from_other_nodes(self):
+        translator = AgentEventTranslator()
+        events = translator.translate(
+            "messages", (AIMessageChunk(content="hi"), {"langgraph_node": "summarize"})
+        )
+        self.assertEqual(events, [])
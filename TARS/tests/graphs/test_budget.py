@@ -0,0 +1,148 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from TARS.graphs.core_agent import run_core_agent
+from TARS.graphs.utils.budget import (
+    BUDGET_EXHAUSTED,
+    DEADLINE,
+    STEPS,
+    TOKENS,
+    BudgetExceeded,
+    acall_with_timeout,
+    call_with_timeout,
+    clamp_timeout,
+    exhausted,
+    steps_used,
+    tokens_used,
+)
+from TARS.graphs.utils.executor import ToolExecutor
+from TARS.graphs.utils.nodes import after_tools, best_effort_answer, finalize_answer, should_continue
+from TARS.graphs.utils.semantic_cache import SemanticAnswerCache
+
+
+def tool_step(index, total_tokens=0):
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "search", "args": {"query": f"q{index}"}, "id": f"call_{index}"}],
+            usage_metadata={"input_tokens": total_tokens, "output_tokens": 0, "total_tokens": total_tokens},
+        ),
+        ToolMessage(content=f"result {index}", name="search", tool_call_id=f"call_{index}"),
+    ]
+
+
+def turn(steps, total_tokens=0):
+    messages = [HumanMessage(content="earlier"), *tool_step(99, 500), HumanMessage(content="now")]
+    for index in range(steps):
+        messages += tool_step(index, total_tokens)
+    return messages
+
+
+def budget(deadline_in=60.0, max_steps=3, max_tokens=1000):
+    return {"configurable": {"deadline": time.time() + deadline_in, "max_steps": max_steps, "max_tokens": max_tokens}}
+
+
+class TestBudget(unittest.TestCase):
+    def test_usage_counts_only_the_current_turn(self):
+        messages = turn(2, total_tokens=100)
+        self.assertEqual(steps_used(messages), 2)
+        self.assertEqual(tokens_used(messages), 200)
+
+    def test_exhausted_budgets(self):
+        self.assertIsNone(exhausted(turn(3), budget()))
+        self.assertEqual(exhausted(turn(4), budget()), STEPS)
+        self.assertIsNone(exhausted(turn(4), budget(), check_steps=False))
+        self.assertEqual(exhausted(turn(2, total_tokens=500), budget()), TOKENS)
+        self.assertEqual(exhausted(turn(1), budget(deadline_in=-1)), DEADLINE)
+
+    def test_timeouts_are_capped_by_the_deadline(self):
+        self.assertEqual(clamp_timeout(30.0, {}), 30.0)
+        self.assertLessEqual(clamp_timeout(30.0, budget(deadline_in=5)), 5)
+        self.assertEqual(clamp_timeout(30.0, budget(deadline_in=-5)), 0.0)
+        self.assertLessEqual(clamp_timeout(None, budget(deadline_in=5)), 5)
+
+    def test_calls_are_cut_short_at_the_timeout(self):
+        self.assertEqual(call_with_timeout(lambda: "done", 1.0), "done")
+        with self.assertRaises(BudgetExceeded):
+            call_with_timeout(lambda: time.sleep(0.5), 0.05)
+        with self.assertRaises(BudgetExceeded):
+            asyncio.run(acall_with_timeout(asyncio.sleep(0.5), 0.05))
+
+    def test_tool_timeouts_respect_the_deadline(self):
+        executor = ToolExecutor([], default_timeout=30.0)
+        self.assertLessEqual(executor.timeout_for("search", budget(deadline_in=2)), 2)
+
+
+class TestAgentLoopBudget(unittest.TestCase):
+    def test_should_continue_finalizes_once_a_budget_is_spent(self):
+        self.assertEqual(should_continue({"messages": turn(3)[:-1]}, budget()), "continue")
+        self.assertEqual(should_continue({"messages": turn(4)[:-1]}, budget()), "finalize")
+        self.assertEqual(should_continue({"messages": turn(1)[:-1]}, budget(deadline_in=-1)), "finalize")
+        self.assertEqual(should_continue({"messages": turn(0) + [AIMessage(content="Hi")]}, budget()), "end")
+
+    def test_after_tools_finalizes_past_the_deadline(self):
+        self.assertEqual(after_tools({"messages": turn(1)}, budget()), "agent")
+        self.assertEqual(after_tools({"messages": turn(1)}, budget(deadline_in=-1)), "finalize")
+
+    @patch('TARS.graphs.utils.nodes._invoke_model')
+    def test_finalize_answers_pending_calls_and_drops_new_ones(self, mock_invoke):
+        mock_invoke.return_value = (
+            AIMessage(content="Best guess: sunny", tool_calls=[{"name": "search", "args": {}, "id": "again"}]),
+            "anthropic",
+        )
+        state = {"messages": turn(4)[:-1]}
+        result = finalize_answer(state, budget())
+
+        skipped, answer = result["messages"]
+        self.assertEqual(skipped.tool_call_id, "call_3")
+        self.assertEqual(skipped.status, "error")
+        self.assertEqual(answer.content, "Best guess: sunny")
+        self.assertEqual(answer.tool_calls, [])
+        prompt = mock_invoke.call_args[0][1]
+        self.assertIn("run out of steps", prompt[-1].content)
+
+    @patch('TARS.graphs.utils.nodes._invoke_model')
+    def test_finalize_falls_back_to_the_latest_tool_result(self, mock_invoke):
+        mock_invoke.side_effect = BudgetExceeded("too slow")
+        result = finalize_answer({"messages": turn(2)}, budget(deadline_in=-1))
+
+        answer = result["messages"][-1]
+        self.assertIn("ran out of time", answer.content)
+        self.assertIn("result 1", answer.content)
+
+    @patch('TARS.graphs.utils.nodes.llm_cache', None)
+    @patch('TARS.graphs.utils.nodes.rate_limiter', None)
+    @patch('TARS.graphs.utils.nodes._get_model')
+    def test_call_model_answers_with_what_it_has_at_the_deadline(self, mock_get_model):
+        from TARS.graphs.utils.nodes import call_model
+
+        slow = MagicMock()
+        slow.invoke.side_effect = lambda messages: time.sleep(0.5)
+        mock_get_model.return_value = slow
+        config = budget(deadline_in=0.05)
+        config["configurable"]["thread_id"] = "TestUser"
+
+        result = call_model({"messages": turn(1)}, config)
+        self.assertIn("result 0", result["messages"][0].content)
+
+        self.assertEqual(result["messages"][0].response_metadata[BUDGET_EXHAUSTED], DEADLINE)
+
+    @patch('TARS.graphs.core_agent.graph')
+    def test_answers_cut_short_by_the_budget_are_not_cached(self, mock_graph):
+        deadline_answer = best_effort_answer(turn(1), DEADLINE)
+        mock_graph.stream.return_value = [("updates", {"agent": {"messages": [deadline_answer]}})]
+        mock_graph.get_state.return_value.values = {}
+        cache = SemanticAnswerCache(lambda text: [1.0, 0.0])
+        with patch('TARS.graphs.core_agent.semantic_cache', cache):
+            events = list(run_core_agent("alice", "what is on my calendar tomorrow"))
+
+        self.assertEqual(events[-1].type, "final_answer")
+        self.assertEqual(events[-1].status, BUDGET_EXHAUSTED)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
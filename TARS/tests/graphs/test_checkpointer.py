@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from TARS.graphs.utils.checkpointer import SQLiteLRUCheckpointer, answer_dangling_tool_calls, trim_messages_to_cap
+from TARS.graphs.utils.nodes import _prepare_messages
+
+
+def make_checkpoint(messages, step):
+    checkpoint = create_checkpoint(empty_checkpoint(), None, step)
+    checkpoint["channel_values"] = {"messages": messages}
+    return checkpoint
+
+
+def thread_config(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+class TestSQLiteLRUCheckpointer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "checkpoints.sqlite")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def put(self, saver, thread_id, messages, step):
+        latest = saver.get_tuple(thread_config(thread_id))
+        parent = latest.config["configurable"]["checkpoint_id"] if latest else None
+        return saver.put(
+            thread_config(thread_id, parent), make_checkpoint(messages, step), {"step": step}, {}
+        )
+
+    def test_round_trip_and_pending_writes(self):
+        saver = SQLiteLRUCheckpointer(self.db_path)
+        config = self.put(saver, "alice", [HumanMessage(content="hi")], 1)
+        saver.put_writes(config, [("messages", AIMessage(content="hello"))], "task-1")
+
+        loaded = saver.get_tuple(thread_config("alice"))
+
+        self.assertEqual(loaded.checkpoint["channel_values"]["messages"][0].content, "hi")
+        self.assertEqual(loaded.metadata, {"step": 1})
+        self.assertEqual(loaded.pending_writes[0][0], "task-1")
+        self.assertIsNone(saver.get_tuple(thread_config("bob")))
+
+    def test_shared_across_processes(self):
+        api_saver = SQLiteLRUCheckpointer(self.db_path)
+        slack_saver = SQLiteLRUCheckpointer(self.db_path)
+
+        self.put(api_saver, "alice", [HumanMessage(content="first")], 1)
+        # Warm slack's hot tier, then let the "API process" move the thread forward
+        self.assertIsNotNone(slack_saver.get_tuple(thread_config("alice")))
+        self.put(api_saver, "alice", [HumanMessage(content="first"), AIMessage(content="second")], 2)
+
+        loaded = slack_saver.get_tuple(thread_config("alice"))
+        self.assertEqual(len(loaded.checkpoint["channel_values"]["messages"]), 2)
+
+    def test_history_is_bounded(self):
+        saver = SQLiteLRUCheckpointer(self.db_path, history_per_thread=2)
+        for step in range(5):
+            self.put(saver, "alice", [HumanMessage(content=str(step))], step)
+
+        self.assertEqual(len(list(saver.list(thread_config("alice")))), 2)
+
+    def test_message_cap_applied_on_write(self):
+        saver = SQLiteLRUCheckpointer(self.db_path, max_messages=3)
+        messages = [
+            HumanMessage(content="q1"),
+            AIMessage(content="a1"),
+            HumanMessage(content="q2"),
+            AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "1"}]),
+            ToolMessage(content="r", tool_call_id="1"),
+            AIMessage(content="a2"),
+        ]
+        self.put(saver, "alice", messages, 1)
+
+        stored = saver.get_tuple(thread_config("alice")).checkpoint["channel_values"]["messages"]
+        # The last 3 messages split a tool call, so the whole last user turn is kept
+        self.assertEqual([m.content for m in stored], ["q2", "", "r", "a2"])
+        self.assertEqual(len(messages), 6)
+
+    def test_hot_tier_is_bounded(self):
+        saver = SQLiteLRUCheckpointer(self.db_path, hot_threads=2)
+        for thread_id in ["a", "b", "c"]:
+            self.put(saver, thread_id, [HumanMessage(content=thread_id)], 1)
+
+        self.assertEqual(len(saver._hot), 2)
+        # Evicted threads are still served from SQLite
+        self.assertIsNotNone(saver.get_tuple(thread_config("a")))
+
+    def test_delete_and_purge_idle_threads(self):
+        saver = SQLiteLRUCheckpointer(self.db_path)
+        self.put(saver, "alice", [HumanMessage(content="hi")], 1)
+        self.put(saver, "bob", [HumanMessage(content="hi")], 1)
+
+        saver.delete_thread("alice")
+        self.assertIsNone(saver.get_tuple(thread_config("alice")))
+
+        self.assertEqual(saver.purge_idle_threads(-1), 1)
+        self.assertIsNone(saver.get_tuple(thread_config("bob")))
+
+
+class TestTrimMessagesToCap(unittest.TestCase):
+    def test_keeps_recent_turns_starting_at_user_message(self):
+        messages = [HumanMessage(content="q1"), AIMessage(content="a1"), HumanMessage(content="q2"), AIMessage(content="a2")]
+        self.assertEqual([m.content for m in trim_messages_to_cap(messages, 3)], ["q2", "a2"])
+
+    def test_disabled_cap(self):
+        messages = [HumanMessage(content="q1"), AIMessage(content="a1")]
+        self.assertEqual(trim_messages_to_cap(messages, 0), messages)
+
+
+
+class TestAnswerDanglingToolCalls(unittest.TestCase):
+    def interrupted_thread(self):
+        return [
+            HumanMessage(content="q1"),
+            AIMessage(content="", tool_calls=[
+                {"name": "search", "args": {}, "id": "call_1"},
+                {"name": "calendar", "args": {}, "id": "call_2"},
+            ]),
+            ToolMessage(content="r1", name="search", tool_call_id="call_1"),
+            # the turn ended here, before calendar returned
+            HumanMessage(content="q2"),
+        ]
+
+    def test_unanswered_calls_get_an_error_result_in_place(self):
+        repaired = answer_dangling_tool_calls(self.interrupted_thread())
+        self.assertEqual([type(m).__name__ for m in repaired],
+                         ["HumanMessage", "AIMessage", "ToolMessage", "ToolMessage", "HumanMessage"])
+        self.assertEqual((repaired[3].tool_call_id, repaired[3].status), ("call_2", "error"))
+
+    def test_answered_and_trailing_calls_are_left_alone(self):
+        messages = self.interrupted_thread()[:3]
+        messages[1] = AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "call_1"}])
+        self.assertEqual(answer_dangling_tool_calls(messages), messages)
+        trailing = messages + [AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "call_3"}])]
+        self.assertEqual(answer_dangling_tool_calls(trailing), trailing)
+
+    def test_model_prompt_is_repaired(self):
+        prompt = _prepare_messages({"messages": self.interrupted_thread()}, {"configurable": {"thread_id": "alice"}})
+        self.assertEqual([m.tool_call_id for m in prompt if isinstance(m, ToolMessage)], ["call_1", "call_2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+)
+from TARS.graphs.utils.executor import ToolExecutor
+from TARS.graphs.utils.nodes import acall_model, call_model
+
+calls = []
+
+
+@tool
+def flaky_search(query: str) -> str:
+    """Search a degraded backend."""
+    calls.append(query)
+    raise ConnectionError("backend down")
+
+
+@tool
+def counted_search(query: int) -> str:
+    """Search with a numeric query."""
+    calls.append(query)
+    return "ok"
+
+
+def state_with_call(name, query="tars"):
+    tool_calls = [{"name": name, "args": {"query": query}, "id": "call_0"}]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    @patch("TARS.graphs.utils.circuit_breaker.time.monotonic")
+    def test_closed_open_half_open_cycle(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        breaker = CircuitBreaker("tool:search", failure_threshold=2, recovery_seconds=30)
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        mock_monotonic.return_value = 131.0
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        # Only one probe at a time while half-open
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+
+        mock_monotonic.return_value = 162.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_success_resets_consecutive_failures(self):
+        breaker = CircuitBreaker("tool:search", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class TestToolBreakers(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        self.executor = ToolExecutor(
+            [flaky_search, counted_search],
+            breakers=CircuitBreakerRegistry(failure_threshold=2, recovery_seconds=60),
+        )
+
+    def test_open_breaker_returns_tool_unavailable_without_calling(self):
+        for _ in range(2):
+            self.executor.invoke(state_with_call("flaky_search"), {})
+        result = asyncio.run(self.executor.ainvoke(state_with_call("flaky_search"), {}))
+
+        message = result["messages"][0]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(message.status, "error")
+        self.assertTrue(message.artifact["tool_unavailable"])
+        self.assertGreater(message.artifact["retry_after_seconds"], 0)
+
+    def test_invalid_arguments_do_not_trip_the_breaker(self):
+        for _ in range(3):
+            self.executor.invoke(state_with_call("counted_search", query="not a number"), {})
+        self.assertEqual(self.executor.breakers.get("tool:counted_search").state, CLOSED)
+
+
+class TestModelBreakers(unittest.TestCase):
+    def setUp(self):
+        self.breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_seconds=60)
+        self.models = {
+            "anthropic": MagicMock(**{"invoke.return_value": AIMessage(content="from anthropic")}),
+            "openai": MagicMock(**{"invoke.return_value": AIMessage(content="from openai")}),
+        }
+        patchers = [
+            patch('TARS.graphs.utils.nodes.circuit_breakers', self.breakers),
+            patch('TARS.graphs.utils.nodes.llm_cache', None),
+            patch('TARS.graphs.utils.nodes.rate_limiter', None),
+            patch('TARS.graphs.utils.nodes._get_model', lambda name, selected_tools=None: self.models[name]),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.state = {"messages": [HumanMessage(content="Hello")]}
+        self.config = {"configurable": {"thread_id": "TestUser", "model_name": "anthropic"}}
+
+    def test_open_provider_reroutes_to_fallback_model(self):
+        self.models["anthropic"].invoke.side_effect = TimeoutError("stalled")
+        with self.assertRaises(TimeoutError):
+            call_model(self.state, self.config)
+
+        result = call_model(self.state, self.config)
+        self.assertEqual(result["messages"][0].content, "from openai")
+        self.assertEqual(self.models["anthropic"].invoke.call_count, 1)
+
+    def test_all_providers_open_fails_fast(self):
+        self.breakers.get("model:anthropic").record_failure()
+        self.breakers.get("model:openai").record_failure()
+        with self.assertRaises(CircuitOpenError):
+            asyncio.run(acall_model(self.state, self.config))
+
+
+if __name__ == '__main__':
+    unittest.main()
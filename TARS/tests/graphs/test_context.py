@@ -0,0 +1,98 @@
+import unittest
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from TARS.graphs.utils import context
+from TARS.graphs.utils.nodes import manage_context
+
+
+def conversation(turns, words=50):
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"question {turn} " + "word " * words, id=f"h{turn}"))
+        messages.append(AIMessage(content=f"answer {turn} " + "word " * words, id=f"a{turn}"))
+    return messages
+
+
+class TestContextBudget(unittest.TestCase):
+    def test_token_counts_are_cached_per_message(self):
+        message = HumanMessage(content="hello there", id="cached-1")
+        with patch.object(context, "count_text_tokens", wraps=context.count_text_tokens) as counter:
+            first = context.count_message_tokens(message)
+            second = context.count_message_tokens(message)
+        self.assertEqual(first, second)
+        self.assertEqual(counter.call_count, 1)
+
+    def test_within_budget_summarizes_nothing(self):
+        messages = conversation(3)
+        self.assertEqual(context.plan_summarization(messages, 100_000, 2), [])
+
+    def test_over_budget_summarizes_oldest_whole_turns(self):
+        messages = conversation(6)
+        budget = context.count_messages_tokens(messages) // 2
+
+        selected = context.plan_summarization(messages, budget, keep_recent_turns=2)
+
+        self.assertTrue(selected)
+        self.assertEqual(selected, messages[: len(selected)])
+        self.assertIsInstance(messages[len(selected)], HumanMessage)
+        # The two most recent turns are always kept verbatim
+        self.assertLessEqual(len(selected), len(messages) - 4)
+
+    def test_tool_results_stay_with_their_turn(self):
+        messages = [
+            HumanMessage(content="q1 " + "word " * 200, id="h1"),
+            AIMessage(content="", tool_calls=[{"name": "search", "args": {}, "id": "c1"}], id="a1"),
+            ToolMessage(content="result " * 200, tool_call_id="c1", id="t1"),
+            AIMessage(content="done", id="a2"),
+            HumanMessage(content="q2", id="h2"),
+        ]
+        selected = context.plan_summarization(messages, 50, keep_recent_turns=1)
+        self.assertEqual([m.id for m in selected], ["h1", "a1", "t1", "a2"])
+
+
+class TestManageContextNode(unittest.TestCase):
+    @patch('TARS.graphs.utils.nodes._get_base_model')
+    @patch('TARS.graphs.utils.nodes.graph_config')
+    def test_folds_old_turns_into_summary(self, mock_graph_config, mock_get_base_model):
+        mock_graph_config.agent_model_name = "anthropic"
+        mock_graph_config.context_token_budgets = {"anthropic": 300}
+        mock_graph_config.context_keep_recent_turns = 1
+        mock_model = MagicMock()
+        mock_model.invoke.return_value = AIMessage(content="User asked several questions.")
+        mock_get_base_model.return_value = mock_model
+
+        state = {"messages": conversation(4), "summary": "Earlier: greetings."}
+        update = manage_context(state, {"configurable": {"thread_id": "TestUser"}})
+
+        self.assertEqual(update["summary"], "User asked several questions.")
+        self.assertTrue(all(isinstance(m, RemoveMessage) for m in update["messages"]))
+        prompt = mock_model.invoke.call_args[0][0][0].content
+        self.assertIn("Earlier: greetings.", prompt)
+
+    @patch('TARS.graphs.utils.nodes._invoke_model')
+    @patch('TARS.graphs.utils.nodes.graph_config')
+    def test_summary_goes_through_the_guarded_model_call(self, mock_graph_config, mock_invoke_model):
+        mock_graph_config.agent_model_name = "anthropic"
+        mock_graph_config.context_token_budgets = {"anthropic": 300}
+        mock_graph_config.context_keep_recent_turns = 1
+        mock_invoke_model.return_value = (AIMessage(content="Summary."), "anthropic")
+        config = {"configurable": {"thread_id": "TestUser", "deadline": time.time() + 30}}
+
+        update = manage_context({"messages": conversation(4)}, config)
+
+        self.assertEqual(update["summary"], "Summary.")
+        kwargs = mock_invoke_model.call_args.kwargs
+        self.assertFalse(kwargs["bind_tools"])
+        self.assertLessEqual(kwargs["timeout"], 30)
+
+    @patch('TARS.graphs.utils.nodes._get_base_model')
+    def test_within_budget_skips_model(self, mock_get_base_model):
+        update = manage_context({"messages": conversation(1)}, {"configurable": {}})
+        self.assertEqual(update, {})
+        mock_get_base_model.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
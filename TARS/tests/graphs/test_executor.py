@@ -0,0 +1,97 @@
+import asyncio
+import time
+import unittest
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.executor import ToolExecutor
+
+
+@tool
+def slow_search(query: str) -> str:
+    """Search slowly."""
+    time.sleep(0.3)
+    return f"results for {query}"
+
+
+@tool
+async def slow_video_search(query: str) -> str:
+    """Search videos slowly."""
+    await asyncio.sleep(0.3)
+    return f"videos for {query}"
+
+
+@tool
+def hanging_tool(query: str) -> str:
+    """Never returns in time."""
+    time.sleep(2)
+    return "too late"
+
+
+@tool
+def broken_tool(query: str) -> str:
+    """Always fails."""
+    raise RuntimeError("boom")
+
+
+def state_with_calls(*names):
+    tool_calls = [
+        {"name": name, "args": {"query": "tars"}, "id": f"call_{index}"}
+        for index, name in enumerate(names)
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+class TestToolExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = ToolExecutor(
+            [slow_search, slow_video_search, hanging_tool, broken_tool],
+            max_concurrency=4,
+            default_timeout=5.0,
+            timeouts={"hanging_tool": 0.2},
+        )
+
+    def test_sync_calls_run_concurrently(self):
+        started = time.perf_counter()
+        result = self.executor.invoke(state_with_calls("slow_search", "slow_search", "slow_search"), {})
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual([m.tool_call_id for m in result["messages"]], ["call_0", "call_1", "call_2"])
+        self.assertEqual(result["messages"][0].content, "results for tars")
+
+    def test_async_calls_run_concurrently(self):
+        started = time.perf_counter()
+        result = asyncio.run(
+            self.executor.ainvoke(state_with_calls("slow_search", "slow_video_search"), {})
+        )
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(
+            [m.content for m in result["messages"]], ["results for tars", "videos for tars"]
+        )
+
+    def test_timeouts_return_partial_results(self):
+        for run in (
+            lambda state: self.executor.invoke(state, {}),
+            lambda state: asyncio.run(self.executor.ainvoke(state, {})),
+        ):
+            result = run(state_with_calls("slow_search", "hanging_tool"))
+            search, hanging = result["messages"]
+            self.assertEqual(search.content, "results for tars")
+            self.assertEqual(hanging.status, "error")
+            self.assertTrue(hanging.artifact["timed_out"])
+            self.assertIn("timed out", hanging.content)
+
+    def test_errors_and_unknown_tools_become_error_messages(self):
+        result = self.executor.invoke(state_with_calls("broken_tool", "does_not_exist"), {})
+        broken, unknown = result["messages"]
+        self.assertEqual(broken.status, "error")
+        self.assertIn("boom", broken.content)
+        self.assertEqual(unknown.status, "error")
+        self.assertIn("not a valid tool", unknown.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from TARS.graphs.utils.circuit_breaker import CLOSED, CircuitBreakerRegistry
+from TARS.graphs.utils.hedging import HedgedModelCaller
+from TARS.graphs.utils.nodes import _HedgeGuard
+from TARS.graphs.utils.rate_limiter import RateLimitTimeout
+
+
+class FakeStreamingModel:
+    def __init__(self, text, first_token_delay=0.0, error=None):
+        self.text = text
+        self.first_token_delay = first_token_delay
+        self.error = error
+        self.cancelled = False
+        self.configs = []
+
+    def stream(self, messages, config=None):
+        self.configs.append(config)
+        time.sleep(self.first_token_delay)
+        if self.error:
+            raise self.error
+        for word in self.text.split():
+            yield AIMessageChunk(content=word + " ")
+
+    async def astream(self, messages, config=None):
+        self.configs.append(config)
+        try:
+            await asyncio.sleep(self.first_token_delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        for word in self.text.split():
+            yield AIMessageChunk(content=word + " ")
+
+
+MESSAGES = [HumanMessage(content="What is the weather today?")]
+
+
+class FakeGuard:
+    def __init__(self, admit=True):
+        self.admitted = admit
+        self.outcomes = []
+
+    def admit(self):
+        return self.admitted
+
+    def done(self, failed, used_tokens):
+        self.outcomes.append((failed, used_tokens))
+
+
+class TestHedgedModelCaller(unittest.TestCase):
+    def setUp(self):
+        self.hedger = HedgedModelCaller(initial_delay=0.1, min_samples=3)
+
+    def test_fast_primary_is_not_hedged(self):
+        response = self.hedger.invoke(
+            FakeStreamingModel("from primary"), FakeStreamingModel("from secondary"), MESSAGES
+        )
+        self.assertEqual(response.content, "from primary ")
+        self.assertEqual(self.hedger.stats()["hedges"], 0)
+
+    def test_stalled_primary_is_hedged_and_secondary_wins(self):
+        started = time.perf_counter()
+        response = self.hedger.invoke(
+            FakeStreamingModel("from primary", first_token_delay=1.0),
+            FakeStreamingModel("from secondary"),
+            MESSAGES,
+        )
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(response.content, "from secondary ")
+        stats = self.hedger.stats()
+        self.assertEqual((stats["hedges"], stats["secondary_wins"]), (1, 1))
+
+    def test_async_loser_is_cancelled_and_counted_as_waste(self):
+        primary = FakeStreamingModel("from primary", first_token_delay=1.0)
+        response = asyncio.run(
+            self.hedger.ainvoke(primary, FakeStreamingModel("from secondary"), MESSAGES)
+        )
+        self.assertEqual(response.content, "from secondary ")
+        self.assertTrue(primary.cancelled)
+        self.assertGreater(self.hedger.stats()["wasted_input_tokens"], 0)
+
+    def test_primary_failing_after_hedge_leaves_race_to_secondary(self):
+        primary = FakeStreamingModel("", first_token_delay=0.15, error=RuntimeError("overloaded"))
+        secondary = FakeStreamingModel("from secondary", first_token_delay=0.2)
+        self.assertEqual(self.hedger.invoke(primary, secondary, MESSAGES).content, "from secondary ")
+        self.assertEqual(
+            asyncio.run(self.hedger.ainvoke(primary, secondary, MESSAGES)).content, "from secondary "
+        )
+
+    def test_contenders_are_tagged_for_the_event_stream(self):
+        for run in (
+            lambda primary, secondary: self.hedger.invoke(primary, secondary, MESSAGES),
+            lambda primary, secondary: asyncio.run(self.hedger.ainvoke(primary, secondary, MESSAGES)),
+        ):
+            primary = FakeStreamingModel("from primary", first_token_delay=0.3)
+            secondary = FakeStreamingModel("from secondary")
+            run(primary, secondary)
+            (primary_meta,), (secondary_meta,) = (
+                [config["metadata"] for config in model.configs] for model in (primary, secondary)
+            )
+            self.assertEqual(primary_meta["hedge_id"], secondary_meta["hedge_id"])
+            self.assertEqual(
+                (primary_meta["hedge_contender"], secondary_meta["hedge_contender"]), ("primary", "secondary")
+            )
+
+    def test_refused_guard_skips_the_hedge(self):
+        secondary = FakeStreamingModel("from secondary")
+        guard = FakeGuard(admit=False)
+        response = self.hedger.invoke(
+            FakeStreamingModel("from primary", first_token_delay=0.2), secondary, MESSAGES, guard
+        )
+        self.assertEqual(response.content, "from primary ")
+        self.assertEqual((secondary.configs, guard.outcomes), ([], []))
+        self.assertEqual(self.hedger.stats()["hedges"], 0)
+
+    def test_guard_learns_how_the_secondary_ended(self):
+        # Winner
+        guard = FakeGuard()
+        self.hedger.invoke(
+            FakeStreamingModel("from primary", first_token_delay=0.3), FakeStreamingModel("from secondary"), MESSAGES, guard
+        )
+        self.assertEqual(guard.outcomes, [(False, None)])
+        # Failure
+        guard = FakeGuard()
+        primary = FakeStreamingModel("from primary", first_token_delay=0.2)
+        self.hedger.invoke(primary, FakeStreamingModel("", error=RuntimeError("overloaded")), MESSAGES, guard)
+        self.assertEqual(guard.outcomes, [(True, None)])
+        # Async loser, cancelled before answering: its input tokens were spent
+        guard = FakeGuard()
+        primary = FakeStreamingModel("from primary", first_token_delay=0.15)
+        secondary = FakeStreamingModel("from secondary", first_token_delay=1.0)
+        asyncio.run(self.hedger.ainvoke(primary, secondary, MESSAGES, guard))
+        (failed, used_tokens), *_ = guard.outcomes
+        self.assertIsNone(failed)
+        self.assertGreater(used_tokens, 0)
+
+    def test_errors_without_hedge_are_raised(self):
+        primary = FakeStreamingModel("", error=RuntimeError("overloaded"))
+        with self.assertRaises(RuntimeError):
+            self.hedger.invoke(primary, FakeStreamingModel("from secondary"), MESSAGES)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.hedger.ainvoke(primary, None, MESSAGES))
+
+    def test_delay_tracks_primary_time_to_first_token(self):
+        hedger = HedgedModelCaller(percentile=50, min_delay=0.0, min_samples=3)
+        self.assertEqual(hedger.hedge_delay(), hedger.initial_delay)
+        for _ in range(3):
+            hedger.invoke(FakeStreamingModel("ok", first_token_delay=0.05), None, MESSAGES)
+        self.assertAlmostEqual(hedger.hedge_delay(), 0.05, delta=0.03)
+
+
+class TestHedgeGuard(unittest.TestCase):
+    def setUp(self):
+        self.breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_seconds=60)
+        self.limiter = MagicMock()
+        for target, value in (("circuit_breakers", self.breakers), ("rate_limiter", self.limiter)):
+            patcher = patch(f"TARS.graphs.utils.nodes.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_open_breaker_refuses_the_hedge(self):
+        self.breakers.get("model:openai").record_failure()
+        self.assertFalse(_HedgeGuard("openai", MESSAGES).admit())
+        self.limiter.reserve.assert_not_called()
+
+    def test_hedge_needs_rate_limit_capacity_now(self):
+        self.limiter.reserve.side_effect = RateLimitTimeout("no capacity")
+        guard = _HedgeGuard("openai", MESSAGES)
+        self.assertFalse(guard.admit())
+        self.limiter.reserve.assert_called_once_with("openai", guard.reserved, max_wait=0.0)
+
+    def test_outcome_is_recorded_and_settled_once(self):
+        guard = _HedgeGuard("openai", MESSAGES)
+        self.assertTrue(guard.admit())
+        guard.done(True, None)
+        guard.done(None, None)
+        self.assertNotEqual(self.breakers.get("model:openai").state, CLOSED)
+        self.limiter.settle.assert_called_once_with("openai", guard.reserved, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from TARS.graphs.utils.llm_cache import (
+    LLMResponseCache,
+    MemoryLLMCacheBackend,
+    SQLiteLLMCacheBackend,
+    make_llm_cache_key,
+)
+from TARS.graphs.utils.nodes import call_model
+
+
+class FakeChatModel:
+    def __init__(self, temperature=0.0, model_name="fake-model"):
+        self.temperature = temperature
+        self.model_name = model_name
+
+
+def bound_model(temperature=0.0, tools=("search",)):
+    model = SimpleNamespace(
+        bound=FakeChatModel(temperature),
+        kwargs={"tools": [{"name": name} for name in tools]},
+    )
+    model.invoke = MagicMock(return_value=AIMessage(content="Hello!", id="run-1"))
+    return model
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    def test_key_ignores_message_ids_but_not_content(self):
+        key = make_llm_cache_key("m", {}, 0.0, [HumanMessage(content="hi", id="a")])
+        self.assertEqual(key, make_llm_cache_key("m", {}, 0.0, [HumanMessage(content="hi", id="b")]))
+        self.assertNotEqual(key, make_llm_cache_key("m", {}, 0.0, [HumanMessage(content="hey")]))
+        self.assertNotEqual(key, make_llm_cache_key("m", {"tools": []}, 0.0, [HumanMessage(content="hi")]))
+
+    def test_hit_returns_tagged_copy_without_id(self):
+        cache = LLMResponseCache(MemoryLLMCacheBackend())
+        model = bound_model()
+        messages = [HumanMessage(content="hi")]
+
+        key, response = cache.lookup(model, messages)
+        self.assertIsNone(response)
+        cache.store(key, AIMessage(content="Hello!", id="run-1"))
+
+        started = time.perf_counter()
+        _, response = cache.lookup(model, messages)
+        self.assertLess(time.perf_counter() - started, 0.01)
+        self.assertEqual(response.content, "Hello!")
+        self.assertIsNone(response.id)
+        self.assertTrue(response.response_metadata["cache_hit"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_non_zero_temperature_bypasses_cache(self):
+        cache = LLMResponseCache(MemoryLLMCacheBackend())
+        key, response = cache.lookup(bound_model(temperature=0.7), [HumanMessage(content="hi")])
+        self.assertIsNone(key)
+        self.assertEqual(cache.stats()["bypassed"], 1)
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        backend = MemoryLLMCacheBackend(max_entries=2)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.get("a")
+        backend.set("c", "3")
+        self.assertEqual(backend.get("a"), "1")
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.evictions, 1)
+
+    def test_sqlite_backend_persists_and_caps_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm_cache.sqlite")
+            backend = SQLiteLLMCacheBackend(path, max_entries=2)
+            for key in ("a", "b", "c"):
+                backend.set(key, key.upper())
+
+            reopened = SQLiteLLMCacheBackend(path, max_entries=2)
+            self.assertEqual(len(reopened), 2)
+            self.assertIsNone(reopened.get("a"))
+            self.assertEqual(reopened.get("c"), "C")
+
+
+class TestCallModelCache(unittest.TestCase):
+    @patch('TARS.graphs.utils.nodes.rate_limiter', None)
+    @patch('TARS.graphs.utils.nodes._get_model')
+    def test_repeated_prompt_skips_provider(self, mock_get_model):
+        model = bound_model()
+        mock_get_model.return_value = model
+        state = {"messages": [HumanMessage(content="Hello")]}
+        config = {"configurable": {"thread_id": "TestUser"}}
+
+        with patch('TARS.graphs.utils.nodes.llm_cache', LLMResponseCache(MemoryLLMCacheBackend())):
+            first = call_model(state, config)["messages"][0]
+            second = call_model(state, config)["messages"][0]
+
+        self.assertEqual(model.invoke.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertTrue(second.response_metadata["cache_hit"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils import models
+from TARS.graphs.utils.models import ModelRegistry, is_requestable, resolve_model_name
+from TARS.graphs.utils.nodes import call_model
+
+
+@tool
+def search(query: str) -> str:
+    """Search the web."""
+    return query
+
+
+def fake_builder(provider):
+    def build(model):
+        chat_model = MagicMock(name=f"{provider}:{model}")
+        chat_model.provider, chat_model.model = provider, model
+        chat_model.bind_tools.side_effect = lambda tools: MagicMock(bound=chat_model)
+        return chat_model
+    return build
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        builders = {provider: fake_builder(provider) for provider in models.PROVIDERS}
+        patcher = patch.dict(models._BUILDERS, builders)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = ModelRegistry()
+
+    def test_resolve_model_name(self):
+        self.assertEqual(resolve_model_name("openai:gpt-4o-mini"), ("openai", "gpt-4o-mini"))
+        with patch.object(models.anthropic_settings, "anthropic_model", "claude-default"):
+            self.assertEqual(resolve_model_name("anthropic"), ("anthropic", "claude-default"))
+        with self.assertRaises(ValueError):
+            resolve_model_name("unknown")
+
+    def test_only_configured_models_are_requestable(self):
+        with patch.object(models.graph_config, "agent_model_name", "anthropic"), \
+                patch.object(models.graph_config, "model_pool", ["openai:gpt-4o-mini"]), \
+                patch.object(models.graph_config, "requestable_models", []):
+            self.assertTrue(is_requestable("openai:gpt-4o-mini"))
+            self.assertTrue(is_requestable("anthropic"))
+            self.assertFalse(is_requestable("openai:o1-pro"))
+            self.assertFalse(is_requestable("unknown"))
+            with patch.object(models.graph_config, "requestable_models", ["openai:o1-pro"]):
+                self.assertTrue(is_requestable("openai:o1-pro"))
+                self.assertFalse(is_requestable("openai:gpt-4o-mini"))
+
+    def test_models_are_built_and_bound_once_per_key(self):
+        first = self.registry.get_bound("openai:gpt-4o-mini", [search])
+        self.assertIs(first, self.registry.get_bound("openai:gpt-4o-mini", [search]))
+        other = self.registry.get_bound("anthropic:claude-haiku", [search])
+
+        self.assertIsNot(first, other)
+        self.assertEqual(first.bound.model, "gpt-4o-mini")
+        self.assertEqual(other.bound.provider, "anthropic")
+        self.assertEqual(len(self.registry.pool()), 2)
+
+    def test_bound_variants_are_evicted_least_recently_used(self):
+        registry = ModelRegistry(max_bound_variants=2)
+        first = registry.get_bound("openai", [search])
+        registry.get_bound("openai", [])
+        registry.get_bound("openai", [search])
+        registry.get_bound("anthropic", [search])
+
+        self.assertIs(first, registry.get_bound("openai", [search]))
+        self.assertEqual(len(registry.pool()), 2)
+        self.assertNotIn([], [entry["tools"] for entry in registry.pool()])
+
+    def test_warm_skips_models_that_fail_to_build(self):
+        warmed = self.registry.warm(["openai:gpt-4o-mini", "unknown:model"], [search])
+        self.assertEqual(warmed, ["openai:gpt-4o-mini"])
+        self.assertEqual(
+            self.registry.pool(),
+            [{"provider": "openai", "model": "gpt-4o-mini", "tools": ["search"]}],
+        )
+
+
+class TestCallModelHonoursModelName(unittest.TestCase):
+    @patch('TARS.graphs.utils.nodes.llm_cache', None)
+    @patch('TARS.graphs.utils.nodes.rate_limiter', None)
+    @patch('TARS.graphs.utils.nodes.model_registry')
+    def test_configurable_model_name_is_used(self, mock_registry):
+        mock_registry.get_bound.return_value.invoke.return_value = AIMessage(content="Hi")
+        config = {"configurable": {"thread_id": "TestUser", "model_name": "openai:gpt-4o-mini"}}
+
+        call_model({"messages": [HumanMessage(content="Hello")]}, config)
+
+        self.assertEqual(mock_registry.get_bound.call_args[0][0], "openai:gpt-4o-mini")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import ANY, patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from TARS.graphs.utils.nodes import _invoke_model
+from TARS.graphs.utils.rate_limiter import RateLimitTimeout, SQLiteRateLimiter
+
+LIMITS = {"openai": {"requests_per_minute": 60, "tokens_per_minute": 6000}}
+
+
+class TestSQLiteRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "rate_limits.sqlite")
+
+    def limiter(self, max_wait=60.0):
+        return SQLiteRateLimiter(self.db_path, LIMITS, max_wait=max_wait)
+
+    def test_calls_within_capacity_do_not_wait(self):
+        limiter = self.limiter()
+        self.assertEqual(limiter.reserve("openai", 1000), 0.0)
+        self.assertEqual(limiter.reserve("openai", 1000), 0.0)
+
+    def test_exhausted_tokens_queue_for_the_refill_time(self):
+        limiter = self.limiter()
+        limiter.reserve("openai", 6000)
+        # 100 tokens/second refill: another 500 tokens are ready in about 5s
+        self.assertAlmostEqual(limiter.reserve("openai", 500), 5.0, delta=0.2)
+        # Later callers queue behind the earlier reservation
+        self.assertAlmostEqual(limiter.reserve("openai", 500), 10.0, delta=0.2)
+
+    def test_buckets_are_shared_between_processes(self):
+        self.limiter().reserve("openai", 6000)
+        self.assertGreater(self.limiter().reserve("openai", 100), 0.0)
+
+    def test_wait_beyond_max_raises_without_reserving(self):
+        limiter = self.limiter(max_wait=1.0)
+        limiter.reserve("openai", 6000)
+        with self.assertRaises(RateLimitTimeout):
+            limiter.reserve("openai", 1000)
+        self.assertLess(limiter.reserve("openai", 50), 1.0)
+
+    def test_callers_can_wait_less_than_the_limiter_allows(self):
+        limiter = self.limiter()
+        limiter.reserve("openai", 6000)
+        with self.assertRaises(RateLimitTimeout):
+            limiter.reserve("openai", 500, max_wait=2.0)
+        self.assertAlmostEqual(limiter.reserve("openai", 500, max_wait=10.0), 5.0, delta=0.2)
+
+    def test_settle_refunds_unused_tokens(self):
+        limiter = self.limiter()
+        limiter.reserve("openai", 6000)
+        limiter.settle("openai", 6000, 1000)
+        self.assertEqual(limiter.reserve("openai", 4000), 0.0)
+
+    def test_unknown_providers_are_not_limited(self):
+        self.assertEqual(self.limiter().reserve("google", 10**9), 0.0)
+
+    def test_acquire_sleeps_and_aacquire_awaits(self):
+        limiter = self.limiter()
+        limiter.reserve("openai", 6000)
+        with patch("TARS.graphs.utils.rate_limiter.time.sleep") as mock_sleep:
+            waited = limiter.acquire("openai", 100)
+        mock_sleep.assert_called_once_with(waited)
+        with patch("TARS.graphs.utils.rate_limiter.asyncio.sleep") as mock_async_sleep:
+            asyncio.run(limiter.aacquire("openai", 100))
+        mock_async_sleep.assert_called_once()
+        self.assertEqual(limiter.waits, 2)
+
+
+class TestModelCallsQueueWithinTheirDeadline(unittest.TestCase):
+    @patch('TARS.graphs.utils.nodes.model_registry')
+    @patch('TARS.graphs.utils.nodes.rate_limiter')
+    def test_wait_is_capped_by_and_taken_from_the_timeout(self, mock_limiter, mock_registry):
+        mock_limiter.acquire.return_value = 2.0
+        mock_registry.get_base.return_value.invoke.return_value = AIMessage(content="Hi")
+        with patch('TARS.graphs.utils.nodes.call_with_timeout', side_effect=lambda fn, timeout: fn()) as mock_call:
+            _invoke_model("openai", [HumanMessage(content="Hello")], bind_tools=False, timeout=10.0)
+
+        mock_limiter.acquire.assert_called_once_with("openai", ANY, max_wait=10.0)
+        self.assertEqual(mock_call.call_args[0][1], 8.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from TARS.graphs.utils.circuit_breaker import CircuitBreakerRegistry
+from TARS.graphs.utils.nodes import afast_reply, fast_reply, route_request, select_route
+from TARS.graphs.utils.router import AGENT, FAST, RouterStats, classify_heuristic, parse_classifier_reply
+
+
+class TestClassifyHeuristic(unittest.TestCase):
+    def test_trivial_messages_take_the_fast_path(self):
+        for text in ("hi", "Hey TARS!", "thanks so much :)", "ok cool", "good morning"):
+            self.assertEqual(classify_heuristic(text), FAST, text)
+
+    def test_tool_worthy_messages_go_to_the_agent(self):
+        for text in ("thanks, any news today?", "check my email", "search for TARS"):
+            self.assertEqual(classify_heuristic(text), AGENT, text)
+
+    def test_unclear_messages_are_left_undecided(self):
+        self.assertIsNone(classify_heuristic("explain how transformers work"))
+        self.assertIsNone(classify_heuristic("hi " * 20))
+
+    def test_classifier_reply_defaults_to_agent(self):
+        self.assertEqual(parse_classifier_reply(" direct."), FAST)
+        self.assertEqual(parse_classifier_reply("TOOLS"), AGENT)
+        self.assertEqual(parse_classifier_reply("not sure"), AGENT)
+
+
+class TestRouterStats(unittest.TestCase):
+    def test_savings_are_estimated_from_agent_latency(self):
+        stats = RouterStats()
+        stats.record_agent_call(1000.0)
+        self.assertEqual(stats.record_fast_reply(300.0), 700.0)
+        stats.record_decision(FAST, "heuristic")
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["decisions"][FAST], 1)
+        self.assertEqual(snapshot["latency_saved_ms"], 700.0)
+
+
+class TestRouterNodes(unittest.TestCase):
+    def setUp(self):
+        self.small = MagicMock(**{"invoke.return_value": AIMessage(content="Hey!")})
+        self.big = MagicMock(**{"invoke.return_value": AIMessage(content="From the agent")})
+        patchers = [
+            patch('TARS.graphs.utils.nodes.circuit_breakers', CircuitBreakerRegistry(enabled=False)),
+            patch('TARS.graphs.utils.nodes.llm_cache', None),
+            patch('TARS.graphs.utils.nodes.rate_limiter', None),
+            patch('TARS.graphs.utils.nodes.hedger', None),
+            patch('TARS.graphs.utils.nodes._get_base_model', lambda name=None: self.small),
+            patch('TARS.graphs.utils.nodes._get_model', lambda name=None, selected_tools=None: self.big),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.config = {"configurable": {"thread_id": "TestUser"}}
+
+    def test_router_uses_heuristics_without_calling_a_model(self):
+        update = route_request({"messages": [HumanMessage(content="thanks!")]}, self.config)
+        self.assertEqual(select_route(update), FAST)
+        self.small.invoke.assert_not_called()
+
+    @patch('TARS.graphs.utils.nodes.router_settings')
+    def test_classifier_decides_unclear_messages(self, mock_settings):
+        mock_settings.router_enabled = True
+        mock_settings.router_classifier_enabled = True
+        mock_settings.router_max_fast_words = 12
+        mock_settings.router_fast_model_name = None
+        self.small.invoke.return_value = AIMessage(content="DIRECT")
+        state = {"messages": [HumanMessage(content="explain recursion briefly")]}
+        self.assertEqual(route_request(state, self.config)["route"], FAST)
+
+        self.small.invoke.side_effect = TimeoutError("stalled")
+        self.assertEqual(route_request(state, self.config)["route"], AGENT)
+
+    def test_fast_reply_uses_unbound_model_without_tool_traffic(self):
+        tool_calls = [{"name": "search", "args": {"query": "tars"}, "id": "call_0"}]
+        state = {
+            "messages": [
+                HumanMessage(content="find TARS"),
+                AIMessage(content="", tool_calls=tool_calls),
+                ToolMessage(content="found", tool_call_id="call_0"),
+                AIMessage(content="Found it."),
+                HumanMessage(content="thanks"),
+            ]
+        }
+        result = fast_reply(state, self.config)
+
+        self.assertEqual(result["messages"][0].content, "Hey!")
+        self.big.invoke.assert_not_called()
+        sent = self.small.invoke.call_args[0][0]
+        self.assertIsInstance(sent[0], SystemMessage)
+        self.assertEqual([msg.content for msg in sent[1:]], ["find TARS", "Found it.", "thanks"])
+
+    def test_fast_reply_falls_back_to_the_agent(self):
+        self.small.ainvoke = MagicMock(side_effect=ConnectionError("down"))
+        self.big.ainvoke = MagicMock(return_value=asyncio.sleep(0, AIMessage(content="From the agent")))
+        result = asyncio.run(afast_reply({"messages": [HumanMessage(content="hi")]}, self.config))
+        self.assertEqual(result["messages"][0].content, "From the agent")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage, HumanMessage
+from TARS.graphs.core_agent import run_core_agent
+from TARS.graphs.utils.semantic_cache import SemanticAnswerCache
+
+VECTORS = {
+    "what is on my calendar tomorrow": [1.0, 0.0, 0.0],
+    "what's on my calendar tomorrow?": [0.99, 0.05, 0.0],
+    "summarize my unread email please": [0.0, 1.0, 0.0],
+}
+
+
+def embed(text):
+    return VECTORS.get(text, [0.0, 0.0, 1.0])
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticAnswerCache(
+            embed,
+            threshold=0.95,
+            tool_ttls={"fetch_calendar_events_for_x_days": 300, "fetch_emails_by_sender_name": 120},
+            invalidated_by={"handle_all_unread_gmail": ["fetch_emails_by_sender_name"]},
+        )
+
+    def test_similar_question_hits_and_others_miss(self):
+        self.cache.store("alice", "what is on my calendar tomorrow", "Two meetings.", run_ms=4000)
+
+        _, hit = self.cache.lookup("alice", "what's on my calendar tomorrow?")
+        self.assertEqual(hit.answer, "Two meetings.")
+        self.assertGreater(hit.similarity, 0.95)
+        self.assertIsNone(self.cache.lookup("alice", "summarize my unread email please")[1])
+        # Answers are per user
+        self.assertIsNone(self.cache.lookup("bob", "what is on my calendar tomorrow")[1])
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["latency_saved_ms"], 4000)
+
+    def test_freshness_window_is_bounded_by_tool_ttls(self):
+        with patch("TARS.graphs.utils.semantic_cache.time.time", return_value=1000.0):
+            self.cache.store(
+                "alice", "what is on my calendar tomorrow", "Two meetings.",
+                tools_used=["fetch_calendar_events_for_x_days"],
+            )
+        with patch("TARS.graphs.utils.semantic_cache.time.time", return_value=1299.0):
+            self.assertIsNotNone(self.cache.lookup("alice", "what is on my calendar tomorrow")[1])
+        with patch("TARS.graphs.utils.semantic_cache.time.time", return_value=1301.0):
+            self.assertIsNone(self.cache.lookup("alice", "what is on my calendar tomorrow")[1])
+
+    def test_answers_using_uncacheable_tools_or_short_questions_are_not_stored(self):
+        self.assertFalse(
+            self.cache.store("alice", "summarize my unread email please", "Done.", ["handle_all_unread_gmail"])
+        )
+        self.assertFalse(self.cache.store("alice", "yes", "Okay."))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_side_effecting_tool_invalidates_dependent_answers(self):
+        self.cache.store("alice", "summarize my unread email please", "3 emails.", ["fetch_emails_by_sender_name"])
+        self.cache.store("alice", "what is on my calendar tomorrow", "Two meetings.")
+
+        self.assertEqual(self.cache.notify_tool_run("alice", "handle_all_unread_gmail"), 1)
+        self.assertIsNone(self.cache.lookup("alice", "summarize my unread email please")[1])
+        self.assertIsNotNone(self.cache.lookup("alice", "what is on my calendar tomorrow")[1])
+
+    def test_per_user_bound_drops_oldest(self):
+        cache = SemanticAnswerCache(embed, max_entries_per_user=1)
+        cache.store("alice", "what is on my calendar tomorrow", "Two meetings.")
+        cache.store("alice", "summarize my unread email please", "3 emails.")
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertIsNone(cache.lookup("alice", "what is on my calendar tomorrow")[1])
+
+
+class TestCoreAgentSemanticCache(unittest.TestCase):
+    @patch('TARS.graphs.core_agent.graph')
+    def test_repeat_question_is_answered_from_cache(self, mock_graph):
+        mock_graph.stream.return_value = [
+            ("updates", {"agent": {"messages": [AIMessage(content="Two meetings.")]}})
+        ]
+        mock_graph.get_state.return_value.values = {}  # each question opens a conversation
+        cache = SemanticAnswerCache(embed)
+        with patch('TARS.graphs.core_agent.semantic_cache', cache):
+            first = list(run_core_agent("alice", "what is on my calendar tomorrow"))
+            second = list(run_core_agent("alice", "what's on my calendar tomorrow?"))
+
+        self.assertEqual(mock_graph.stream.call_count, 1)
+        self.assertIsNone(first[-1].cached)
+        self.assertEqual(second[-1].type, "final_answer")
+        self.assertEqual(second[-1].content, "Two meetings.")
+        self.assertTrue(second[-1].cached)
+        mock_graph.update_state.assert_called_once()
+
+    @patch('TARS.graphs.core_agent.graph')
+    def test_follow_ups_are_not_answered_from_another_conversation(self, mock_graph):
+        cache = SemanticAnswerCache(embed)
+        cache.store("alice", "summarize that email again", "Bob wants the report by Friday.", run_ms=4000)
+        mock_graph.stream.return_value = [
+            ("updates", {"agent": {"messages": [AIMessage(content="Carol moved the offsite.")]}})
+        ]
+        mock_graph.get_state.return_value.values = {
+            "messages": [HumanMessage(content="any mail from Carol?"), AIMessage(content="One, about the offsite.")]
+        }
+        with patch('TARS.graphs.core_agent.semantic_cache', cache):
+            events = list(run_core_agent("alice", "summarize that email again"))
+
+        self.assertEqual(events[-1].content, "Carol moved the offsite.")
+        self.assertIsNone(events[-1].cached)
+        mock_graph.stream.assert_called_once()
+        # The follow-up's answer is not stored either
+        self.assertEqual(cache.stats()["entries"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
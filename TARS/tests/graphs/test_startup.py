@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from TARS.graphs.utils import nodes
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Loaded on first use (model warmup, embeddings), never by importing the agent
+LAZY_MODULES = ["langchain_anthropic", "langchain_openai", "langchain_google_genai", "numpy"]
+
+CHILD = f"""
+import json, sys
+import TARS.graphs.core_agent
+print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))
+"""
+
+
+class TestColdStart(unittest.TestCase):
+    def test_importing_the_agent_does_not_load_provider_sdks(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = {
+                **os.environ,
+                "PYTHONPATH": str(PROJECT_ROOT),
+                "TARS_DATA_DIR": data_dir,
+                "SEMANTIC_CACHE_ENABLED": "false",
+                "HEDGE_ENABLED": "false",
+            }
+            result = subprocess.run(
+                [sys.executable, "-c", CHILD], capture_output=True, text=True, cwd=data_dir, env=env
+            )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+
+    @patch('TARS.graphs.utils.nodes.model_registry')
+    def test_warm_models_builds_the_configured_pool(self, mock_registry):
+        mock_registry.warm.return_value = ["anthropic"]
+        with patch.object(nodes.graph_config, "model_pool", ["anthropic", "openai:gpt-4o-mini"]):
+            self.assertEqual(nodes.warm_models(), ["anthropic"])
+        self.assertEqual(mock_registry.warm.call_args[0][0], ["anthropic", "openai:gpt-4o-mini"])
+
+
+if __name__ == '__main__':
+    unittest.main()
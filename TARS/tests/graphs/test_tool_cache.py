@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.executor import ToolExecutor
+from TARS.graphs.utils.tool_cache import ToolResultCache, make_cache_key
+
+calls = []
+
+
+@tool
+def search(query: str) -> str:
+    """Search the web."""
+    calls.append(query)
+    return f"results for {query}"
+
+
+@tool
+def send_email(query: str) -> str:
+    """Send an email."""
+    calls.append(query)
+    return "sent"
+
+
+def state_with_call(name, query="tars"):
+    tool_calls = [{"name": name, "args": {"query": query}, "id": "call_0"}]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+
+class TestToolResultCache(unittest.TestCase):
+    def test_keys_ignore_whitespace_and_argument_order(self):
+        self.assertEqual(
+            make_cache_key("search", {"query": "a  b", "limit": 5.0}),
+            make_cache_key("search", {"limit": 5, "query": " a b"}),
+        )
+        self.assertNotEqual(make_cache_key("search", {"query": "a"}), make_cache_key("other", {"query": "a"}))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ToolResultCache({"search": 10})
+        with patch("TARS.graphs.utils.tool_cache.time.time", return_value=1000.0):
+            cache.set("search", {"query": "x"}, "result")
+            self.assertEqual(cache.get("search", {"query": "x"})["content"], "result")
+        with patch("TARS.graphs.utils.tool_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("search", {"query": "x"}))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_bound_evicts_least_recently_used(self):
+        cache = ToolResultCache({"search": 60}, max_entries=2)
+        cache.set("search", {"query": "a"}, "A")
+        cache.set("search", {"query": "b"}, "B")
+        cache.get("search", {"query": "a"})
+        cache.set("search", {"query": "c"}, "C")
+
+        self.assertIsNotNone(cache.get("search", {"query": "a"}))
+        self.assertIsNone(cache.get("search", {"query": "b"}))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_side_effecting_and_unlisted_tools_are_never_cached(self):
+        cache = ToolResultCache({"search": 60, "send_email": 60}, side_effecting=["send_email"])
+        cache.set("send_email", {"query": "x"}, "sent")
+        cache.set("unlisted", {"query": "x"}, "value")
+        self.assertFalse(cache.is_cacheable("send_email"))
+        self.assertIsNone(cache.get("send_email", {"query": "x"}))
+        self.assertIsNone(cache.get("unlisted", {"query": "x"}))
+
+    def test_disk_tier_is_shared_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tool_cache.sqlite")
+            ToolResultCache({"search": 60}, disk_path=path).set("search", {"query": "x"}, "result", {"n": 1})
+
+            cache = ToolResultCache({"search": 60}, disk_path=path)
+            self.assertEqual(cache.get("search", {"query": "x"}), {"content": "result", "artifact": {"n": 1}})
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+
+
+class TestExecutorWithCache(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+        self.executor = ToolExecutor(
+            [search, send_email],
+            cache=ToolResultCache({"search": 60, "send_email": 60}, side_effecting=["send_email"]),
+        )
+
+    def test_repeat_call_is_served_from_cache(self):
+        first = self.executor.invoke(state_with_call("search"), {})["messages"][0]
+        second = self.executor.invoke(state_with_call("search"), {})["messages"][0]
+
+        self.assertEqual(calls, ["tars"])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.tool_call_id, "call_0")
+        self.assertTrue(second.response_metadata["cache_hit"])
+        self.assertEqual(self.executor.cache.stats()["hits"], 1)
+
+    def test_side_effecting_tool_always_runs(self):
+        self.executor.invoke(state_with_call("send_email"), {})
+        self.executor.invoke(state_with_call("send_email"), {})
+        self.assertEqual(calls, ["tars", "tars"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.context import count_text_tokens
+from TARS.graphs.utils.executor import ToolExecutor
+from TARS.graphs.utils.tool_output import ToolOutputGovernor
+
+EMAILS = [
+    {"id": f"m{index}", "sender": "Alice <alice@example.com>", "subject": f"Plan {index}", "content": "update " * 500}
+    for index in range(20)
+]
+
+
+def result(content, name="fetch_emails_by_sender_name", status="success"):
+    return ToolMessage(content=content, name=name, tool_call_id="call_0", status=status)
+
+
+@tool
+def fetch_emails_by_sender_name(sender_name: str) -> list:
+    """Fetch emails by sender name."""
+    return EMAILS + EMAILS[:5]
+
+
+class TestToolOutputGovernor(unittest.TestCase):
+    def setUp(self):
+        self.governor = ToolOutputGovernor({"fetch_emails_by_sender_name": 500}, default_cap=1000, item_chars=100)
+
+    def test_small_results_pass_through(self):
+        message = result(json.dumps(EMAILS[:1]), name="tavily_search_results_json")
+        self.assertIs(self.governor.govern(message), message)
+        self.assertEqual(self.governor.stats.snapshot()["tavily_search_results_json"]["governed"], 0)
+
+    def test_items_keep_their_headers_and_the_start_of_their_body(self):
+        governed = self.governor.govern(result(json.dumps(EMAILS + EMAILS[:5])))
+        details = governed.response_metadata["output_governor"]
+
+        self.assertLessEqual(count_text_tokens(governed.content), 500)
+        self.assertEqual(details["duplicates"], 5)
+        self.assertGreater(details["omitted"], 0)
+        items = json.loads(governed.content.rsplit("\n[", 1)[0])
+        self.assertEqual(items[0]["sender"], "Alice <alice@example.com>")
+        self.assertEqual(items[0]["subject"], "Plan 0")
+        self.assertTrue(items[0]["content"].startswith("update update"))
+        self.assertIn("more chars", items[0]["content"])
+        self.assertIn("more items omitted", governed.content)
+
+    def test_plain_text_keeps_its_head(self):
+        governed = self.governor.govern(result("word " * 5000, name="youtube_search"))
+        self.assertLessEqual(count_text_tokens(governed.content), 1000)
+        self.assertTrue(governed.content.startswith("word word"))
+        self.assertTrue(governed.content.endswith("[output truncated]"))
+
+    def test_errors_and_uncapped_tools_are_untouched(self):
+        error = result("x " * 5000, status="error")
+        self.assertIs(self.governor.govern(error), error)
+        unlimited = ToolOutputGovernor({}, default_cap=0)
+        message = result("x " * 5000)
+        self.assertIs(unlimited.govern(message), message)
+
+    def test_savings_are_reported(self):
+        self.governor.govern(result(json.dumps(EMAILS)))
+        stats = self.governor.stats.snapshot()["fetch_emails_by_sender_name"]
+        self.assertEqual(stats["governed"], 1)
+        self.assertEqual(stats["tokens_saved"], stats["tokens_before"] - stats["tokens_after"])
+        self.assertGreater(stats["tokens_saved"], 0)
+
+    @patch('TARS.graphs.utils.tool_output.rate_limiter', None)
+    @patch('TARS.graphs.utils.tool_output.model_registry')
+    def test_summaries_replace_oversized_results(self, mock_registry):
+        mock_registry.get_base.return_value = MagicMock(**{"invoke.return_value": AIMessage(content="Alice sent 20 plans.")})
+        governor = ToolOutputGovernor({}, default_cap=500, summary_model_name="openai:gpt-4o-mini")
+
+        governed = governor.govern(result(json.dumps(EMAILS)), question="What did Alice send?")
+        self.assertEqual(governed.content, "Alice sent 20 plans.")
+        self.assertEqual(governed.response_metadata["output_governor"]["method"], "summarize")
+        prompt = mock_registry.get_base.return_value.invoke.call_args[0][0][0].content
+        self.assertIn("What did Alice send?", prompt)
+
+    @patch('TARS.graphs.utils.tool_output.rate_limiter', None)
+    @patch('TARS.graphs.utils.tool_output.model_registry')
+    def test_failed_summaries_fall_back_to_truncation(self, mock_registry):
+        mock_registry.get_base.return_value = MagicMock(**{"ainvoke.side_effect": RuntimeError("down")})
+        governor = ToolOutputGovernor({}, default_cap=500, summary_model_name="openai:gpt-4o-mini")
+
+        governed = asyncio.run(governor.agovern(result(json.dumps(EMAILS))))
+        self.assertEqual(governed.response_metadata["output_governor"]["method"], "truncate")
+
+
+class TestExecutorGovernsResults(unittest.TestCase):
+    def setUp(self):
+        self.executor = ToolExecutor(
+            [fetch_emails_by_sender_name],
+            governor=ToolOutputGovernor({"fetch_emails_by_sender_name": 500}),
+        )
+        tool_calls = [{"name": "fetch_emails_by_sender_name", "args": {"sender_name": "Alice"}, "id": "call_0"}]
+        self.state = {"messages": [HumanMessage(content="Mail from Alice?"), AIMessage(content="", tool_calls=tool_calls)]}
+
+    def test_sync_results_are_capped(self):
+        message = self.executor.invoke(self.state, {})["messages"][0]
+        self.assertLessEqual(count_text_tokens(message.content), 500)
+
+    def test_async_results_are_capped(self):
+        message = asyncio.run(self.executor.ainvoke(self.state, {}))["messages"][0]
+        self.assertLessEqual(count_text_tokens(message.content), 500)
+        self.assertEqual(message.response_metadata["output_governor"]["duplicates"], 5)
+
+    @patch('TARS.graphs.utils.tool_output.rate_limiter', None)
+    @patch('TARS.graphs.utils.tool_output.model_registry')
+    def test_sync_summaries_run_in_parallel(self, mock_registry):
+        def slow_summary(prompt):
+            time.sleep(0.2)
+            return AIMessage(content="Alice sent plans.")
+
+        mock_registry.get_base.return_value = MagicMock(**{"invoke.side_effect": slow_summary})
+        executor = ToolExecutor(
+            [fetch_emails_by_sender_name],
+            governor=ToolOutputGovernor({}, default_cap=500, summary_model_name="openai:gpt-4o-mini"),
+        )
+        tool_calls = [
+            {"name": "fetch_emails_by_sender_name", "args": {"sender_name": "Alice"}, "id": f"call_{index}"}
+            for index in range(3)
+        ]
+        state = {"messages": [HumanMessage(content="Mail from Alice?"), AIMessage(content="", tool_calls=tool_calls)]}
+
+        started = time.perf_counter()
+        messages = executor.invoke(state, {})["messages"]
+
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual([message.content for message in messages], ["Alice sent plans."] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import asyncio
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.circuit_breaker import HALF_OPEN, CircuitBreakerRegistry
+from TARS.graphs.utils.executor import ToolExecutor
+from TARS.graphs.utils.tools import MultiplyTool, ToolRegistry, ToolSpec, load_tool
+
+active = []
+peak = []
+
+
+@tool
+def slow_lookup(query: str) -> str:
+    """Look something up slowly."""
+    active.append(query)
+    peak.append(len(active))
+    time.sleep(0.05)
+    active.remove(query)
+    return query
+
+
+SPECS = [
+    ToolSpec(
+        name="multiply",
+        import_path="TARS.graphs.utils.tools:MultiplyTool",
+        cache_ttl_seconds=60.0,
+        timeout_seconds=5.0,
+        cost_class="free",
+    ),
+    ToolSpec(
+        name="slow_lookup",
+        import_path=f"{__name__}:slow_lookup",
+        side_effecting=True,
+        cost_class="high",
+        max_concurrency=1,
+        keywords=("lookup",),
+    ),
+    ToolSpec(name="missing", import_path="TARS.no_such_module:tool"),
+]
+
+
+class TestToolRegistry(unittest.TestCase):
+    def test_tools_are_loaded_on_first_use_only(self):
+        registry = ToolRegistry(SPECS, enabled=["multiply"])
+        self.assertEqual(registry.loaded(), [])
+
+        first = registry.get("multiply")
+        self.assertIsInstance(first, MultiplyTool)
+        self.assertIs(first, registry.get("multiply"))
+        self.assertEqual(registry.loaded(), ["multiply"])
+
+    def test_load_tool_accepts_instances_and_classes(self):
+        self.assertIs(load_tool(SPECS[1]), slow_lookup)
+        self.assertEqual(load_tool(SPECS[0]).invoke({"a": 2, "b": 3}), 6)
+
+    def test_enabled_tools_skip_unknown_and_broken_tools(self):
+        registry = ToolRegistry(SPECS, enabled=["multiply", "missing", "unknown"])
+        self.assertEqual([tool.name for tool in registry.enabled_tools()], ["multiply"])
+
+    def test_metadata_is_available_without_loading(self):
+        registry = ToolRegistry(SPECS, enabled=[])
+        self.assertEqual(registry.cache_ttls(), {"multiply": 60.0})
+        self.assertEqual(registry.side_effecting(), ["slow_lookup"])
+        self.assertEqual(registry.concurrency_limits(), {"slow_lookup": 1})
+        self.assertEqual(registry.keywords()["slow_lookup"], ["lookup"])
+        self.assertLess(registry.costs()["multiply"], registry.costs()["slow_lookup"])
+        self.assertEqual(registry.loaded(), [])
+
+    @patch("TARS.graphs.utils.tools.tool_settings")
+    def test_settings_override_declared_metadata(self, mock_settings):
+        mock_settings.tool_timeouts = {"multiply": 1.0}
+        mock_settings.tool_cache_ttls = {"slow_lookup": 10.0}
+        mock_settings.tool_side_effecting = ["multiply"]
+        registry = ToolRegistry(SPECS, enabled=[])
+        self.assertEqual(registry.timeouts(), {"multiply": 1.0})
+        self.assertEqual(registry.cache_ttls(), {"multiply": 60.0, "slow_lookup": 10.0})
+        self.assertEqual(registry.side_effecting(), ["slow_lookup", "multiply"])
+
+    def test_custom_tools_are_not_imported_until_enabled(self):
+        with patch.dict(sys.modules):
+            sys.modules.pop("TARS.graphs.tools.custom_tools", None)
+            ToolRegistry(
+                [ToolSpec(name="get_word_length", import_path="TARS.graphs.tools.custom_tools:get_word_length")],
+                enabled=[],
+            )
+            self.assertNotIn("TARS.graphs.tools.custom_tools", sys.modules)
+
+
+class TestExecutorConcurrencyLimits(unittest.TestCase):
+    def setUp(self):
+        active.clear()
+        peak.clear()
+        self.executor = ToolExecutor([slow_lookup], concurrency_limits={"slow_lookup": 1})
+        tool_calls = [
+            {"name": "slow_lookup", "args": {"query": f"q{index}"}, "id": f"call_{index}"}
+            for index in range(3)
+        ]
+        self.state = {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+    def tearDown(self):
+        # Sync calls cut short keep running on their threads; let them finish before the next test
+        for _ in range(100):
+            if not active:
+                break
+            time.sleep(0.01)
+
+    def test_sync_calls_respect_the_tool_limit(self):
+        result = self.executor.invoke(self.state, {})
+        self.assertEqual([message.content for message in result["messages"]], ["q0", "q1", "q2"])
+        self.assertEqual(max(peak), 1)
+
+    def test_async_calls_respect_the_tool_limit(self):
+        result = asyncio.run(self.executor.ainvoke(self.state, {}))
+        self.assertEqual(len(result["messages"]), 3)
+        self.assertEqual(max(peak), 1)
+
+    def test_time_queued_behind_the_limit_is_not_a_timeout(self):
+        # Each call fits the timeout; the three together do not
+        breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_seconds=60)
+        executor = ToolExecutor(
+            [slow_lookup], timeouts={"slow_lookup": 0.12}, breakers=breakers, concurrency_limits={"slow_lookup": 1}
+        )
+        for run in (
+            lambda: executor.invoke(self.state, {}),
+            lambda: asyncio.run(executor.ainvoke(self.state, {})),
+        ):
+            result = run()
+            self.assertEqual([message.content for message in result["messages"]], ["q0", "q1", "q2"])
+            self.assertEqual(breakers.get("tool:slow_lookup").state, "closed")
+
+    def test_calls_still_queued_at_the_deadline_do_not_trip_the_breaker(self):
+        breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_seconds=60)
+        executor = ToolExecutor([slow_lookup], breakers=breakers, concurrency_limits={"slow_lookup": 1})
+        for run in (
+            lambda config: executor.invoke(self.state, config),
+            lambda config: asyncio.run(executor.ainvoke(self.state, config)),
+        ):
+            result = run({"configurable": {"deadline": time.time() + 0.08}})
+            first, cut_short, queued = result["messages"]
+            self.assertEqual(first.content, "q0")
+            self.assertTrue(cut_short.artifact["timed_out"])
+            self.assertTrue(queued.artifact["queued"])
+            self.assertEqual(breakers.get("tool:slow_lookup").state, "closed")
+
+
+    def half_open(self, probes):
+        """An executor whose slow_lookup breaker is half-open with the given probe slots."""
+        breakers = CircuitBreakerRegistry(failure_threshold=1, recovery_seconds=0, half_open_max_calls=probes)
+        breakers.get("tool:slow_lookup").record_failure()
+        executor = ToolExecutor([slow_lookup], breakers=breakers, concurrency_limits={"slow_lookup": 1})
+        return executor, breakers.get("tool:slow_lookup")
+
+    def assert_probes_returned(self, breaker, probes):
+        self.assertEqual(breaker.state, HALF_OPEN)
+        for _ in range(probes):
+            self.assertTrue(breaker.allow())
+
+    def test_deadline_cut_offs_and_queued_calls_return_their_probe_slots(self):
+        for run in (
+            lambda executor, config: executor.invoke(self.state, config),
+            lambda executor, config: asyncio.run(executor.ainvoke(self.state, config)),
+        ):
+            executor, breaker = self.half_open(3)
+            result = run(executor, {"configurable": {"deadline": time.time() + 0.02}})
+            cut_short, *queued = result["messages"]
+            self.assertTrue(cut_short.artifact["timed_out"])
+            self.assertTrue(all(message.artifact["queued"] for message in queued))
+            self.assert_probes_returned(breaker, 3)
+
+    def test_cancelled_async_calls_return_their_probe_slots(self):
+        executor, breaker = self.half_open(3)
+
+        async def cancel_midway():
+            task = asyncio.ensure_future(executor.ainvoke(self.state, {}))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_midway())
+        self.assert_probes_returned(breaker, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from TARS.graphs.utils.nodes import call_model
+from TARS.graphs.utils.tool_selector import ToolSelector, tokenize
+
+
+@tool
+def web_search(query: str) -> str:
+    """Search the web for current events and news."""
+    return query
+
+
+@tool
+def youtube_search(query: str) -> str:
+    """Search YouTube for videos."""
+    return query
+
+
+@tool
+def fetch_calendar_events_for_x_days(days: int) -> list:
+    """Fetch the events on the user's calendar for the next x days."""
+    return []
+
+
+@tool
+def fetch_dms_last_x_hours(hours: int) -> list:
+    """Fetch the Slack direct messages of the last x hours."""
+    return []
+
+
+TOOLS = [web_search, youtube_search, fetch_calendar_events_for_x_days, fetch_dms_last_x_hours]
+
+
+def names(tools):
+    return [tool.name for tool in tools]
+
+
+class TestToolSelector(unittest.TestCase):
+    def setUp(self):
+        self.selector = ToolSelector(
+            TOOLS, top_k=2, keywords={"fetch_dms_last_x_hours": ["dm"]}
+        )
+
+    def test_tokenize_drops_stopwords_numbers_and_plurals(self):
+        self.assertEqual(tokenize("Any Slack DMs in the last 3 hours?"), ["slack", "dm", "last", "hour"])
+
+    def test_selects_only_relevant_tools(self):
+        selected = self.selector.select([HumanMessage(content="What's on my calendar this week?")])
+        self.assertEqual(names(selected), ["fetch_calendar_events_for_x_days"])
+
+    def test_keeps_registration_order_and_top_k(self):
+        selected = self.selector.select([HumanMessage(content="search youtube and the web for news videos")])
+        self.assertEqual(names(selected), ["web_search", "youtube_search"])
+
+    def test_no_match_binds_every_tool(self):
+        selected = self.selector.select([HumanMessage(content="tell me a story")])
+        self.assertEqual(selected, TOOLS)
+        self.assertEqual(self.selector.stats()["fallbacks"], 1)
+
+    def test_tools_called_earlier_stay_bound(self):
+        tool_calls = [{"name": "youtube_search", "args": {"query": "tars"}, "id": "call_0"}]
+        messages = [
+            HumanMessage(content="find a video"),
+            AIMessage(content="", tool_calls=tool_calls),
+            ToolMessage(content="[]", tool_call_id="call_0"),
+            HumanMessage(content="any slack dms?"),
+        ]
+        self.assertEqual(names(self.selector.select(messages)), ["youtube_search", "fetch_dms_last_x_hours"])
+
+    def test_embedding_similarity_is_blended_in(self):
+        vectors = {"video": [1.0, 0.0], "other": [0.0, 1.0]}
+
+        def embed(text):
+            return vectors["video"] if "video" in text.lower() else vectors["other"]
+
+        selector = ToolSelector(TOOLS, top_k=1, embed=embed)
+        selected = selector.select([HumanMessage(content="show me some clips with a video")])
+        self.assertEqual(names(selected), ["youtube_search"])
+
+    def test_small_tool_sets_are_not_filtered(self):
+        selector = ToolSelector(TOOLS[:2], top_k=4)
+        self.assertEqual(selector.select([HumanMessage(content="calendar")]), TOOLS[:2])
+
+
+class TestCallModelBindsSelectedTools(unittest.TestCase):
+    @patch('TARS.graphs.utils.nodes.llm_cache', None)
+    @patch('TARS.graphs.utils.nodes.rate_limiter', None)
+    @patch('TARS.graphs.utils.nodes.model_registry')
+    def test_only_selected_tools_are_bound(self, mock_registry):
+        mock_registry.get_bound.return_value = MagicMock(**{"invoke.return_value": AIMessage(content="Hi")})
+        config = {"configurable": {"thread_id": "TestUser"}}
+
+        with patch('TARS.graphs.utils.nodes.tools', TOOLS), \
+                patch('TARS.graphs.utils.nodes.tool_selector', ToolSelector(TOOLS, top_k=2)):
+            call_model({"messages": [HumanMessage(content="Check my calendar")]}, config)
+
+        bound_tools = mock_registry.get_bound.call_args[0][1]
+        self.assertEqual(names(bound_tools), ["fetch_calendar_events_for_x_days"])
+
+
+if __name__ == '__main__':
+    unittest.main()
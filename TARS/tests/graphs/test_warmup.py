@@ -0,0 +1,84 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from TARS.graphs import core_agent
+from TARS.graphs.utils.warmup import PENDING, READY, WARMING, WarmupStatus
+
+
+class TestWarmupStatus(unittest.TestCase):
+    def test_ready_only_after_finish(self):
+        status = WarmupStatus()
+        self.assertEqual(status.state, PENDING)
+        self.assertTrue(status.begin())
+        self.assertFalse(status.begin())
+        self.assertFalse(status.ready)
+        status.finish()
+        self.assertTrue(status.ready)
+        self.assertEqual(status.state, READY)
+
+    def test_failed_steps_are_recorded_not_raised(self):
+        status = WarmupStatus()
+        with status.step("models"):
+            raise RuntimeError("no API key")
+        self.assertEqual(status.steps[0]["step"], "models")
+        self.assertEqual(status.steps[0]["error"], "no API key")
+
+    def test_ready_once_warmup_overruns_its_timeout(self):
+        status = WarmupStatus(timeout_seconds=0.01)
+        status.begin()
+        time.sleep(0.02)
+        self.assertEqual(status.state, WARMING)
+        self.assertTrue(status.ready)
+        self.assertTrue(status.snapshot()["timed_out"])
+
+
+@patch('TARS.graphs.core_agent.ping_models')
+@patch('TARS.graphs.core_agent.aping_models')
+@patch('TARS.graphs.core_agent.warm_models')
+@patch('TARS.graphs.utils.nodes.model_registry')
+class TestWarmUp(unittest.TestCase):
+    def setUp(self):
+        self.status = WarmupStatus()
+        patcher = patch.object(core_agent, "warmup_status", self.status)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_every_step_without_calling_a_model(self, mock_registry, mock_warm, mock_aping, mock_ping):
+        mock_warm.return_value = ["anthropic"]
+        core_agent.warm_up()
+
+        self.assertTrue(self.status.ready)
+        self.assertEqual([step["step"] for step in self.status.steps], ["models", "graph", "checkpointer", "connections"])
+        self.assertFalse(any("error" in step for step in self.status.steps), self.status.steps)
+        mock_ping.assert_called_once_with(["anthropic"])
+        # The dry run stops before the agent and fast-path nodes
+        mock_registry.get_base.assert_not_called()
+        mock_registry.get_bound.assert_not_called()
+
+    def test_async_warmup_pings_on_the_calling_loop(self, mock_registry, mock_warm, mock_aping, mock_ping):
+        mock_warm.return_value = ["anthropic", "openai"]
+        asyncio.run(core_agent.awarm_up())
+
+        self.assertTrue(self.status.ready)
+        mock_aping.assert_awaited_once_with(["anthropic", "openai"])
+        mock_ping.assert_not_called()
+
+    def test_ready_even_if_a_step_fails(self, mock_registry, mock_warm, mock_aping, mock_ping):
+        mock_warm.side_effect = RuntimeError("no API key")
+        core_agent.warm_up()
+
+        self.assertTrue(self.status.ready)
+        self.assertIn("error", self.status.steps[0])
+        mock_ping.assert_called_once_with([])
+
+    def test_disabled_warmup_is_ready_immediately(self, mock_registry, mock_warm, mock_aping, mock_ping):
+        with patch.object(core_agent.warmup_settings, "warmup_enabled", False):
+            core_agent.warm_up()
+        self.assertTrue(self.status.ready)
+        mock_warm.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from TARS.metrics.event_instrumentation import IncomingUserEvent
+from TARS.metrics.event_sink import BLOCK, DROP_NEWEST, DROP_OLDEST, BufferedEventSink, JSONLEventWriter
+
+
+def user_event(user_id="U1"):
+    return IncomingUserEvent(
+        user_id=user_id, user_name="Test User", event_time=datetime.now(timezone.utc), user_agent="API"
+    )
+
+
+class ListWriter:
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, events):
+        self.batches.append([event.user_id for event in events])
+
+    def close(self):
+        self.closed = True
+
+
+class TestBufferedEventSink(unittest.TestCase):
+    def test_close_writes_buffered_events_in_batches(self):
+        writer = ListWriter()
+        sink = BufferedEventSink(writer, batch_size=2, flush_interval=60)
+        for n in range(5):
+            self.assertTrue(sink.emit(user_event(f"U{n}")))
+        sink.close()
+        self.assertEqual(sum(writer.batches, []), ["U0", "U1", "U2", "U3", "U4"])
+        self.assertTrue(all(len(batch) <= 2 for batch in writer.batches))
+        self.assertTrue(writer.closed)
+        self.assertFalse(sink.emit(user_event()))
+        self.assertEqual(sink.snapshot()["written"], 5)
+
+    def test_worker_writes_after_flush_interval(self):
+        writer = ListWriter()
+        sink = BufferedEventSink(writer, flush_interval=0.01)
+        sink.emit(user_event())
+        deadline = time.monotonic() + 5
+        while not writer.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(writer.batches, [["U1"]])
+        sink.close()
+
+    def full_sink(self, overflow):
+        writer = ListWriter()
+        release = threading.Event()
+        writer.write = MagicMock(side_effect=lambda events: release.wait(5))
+        sink = BufferedEventSink(writer, max_buffer=2, batch_size=100, flush_interval=60, overflow=overflow, block_timeout=0.01)
+        sink.emit(user_event("U0"))
+        sink.emit(user_event("U1"))
+        return sink, release
+
+    def test_drop_newest_when_full(self):
+        sink, release = self.full_sink(DROP_NEWEST)
+        self.assertFalse(sink.emit(user_event("U2")))
+        self.assertEqual([event.user_id for event in sink._buffer], ["U0", "U1"])
+        self.assertEqual(sink.snapshot()["dropped"], 1)
+        release.set()
+        sink.close()
+
+    def test_drop_oldest_when_full(self):
+        sink, release = self.full_sink(DROP_OLDEST)
+        self.assertTrue(sink.emit(user_event("U2")))
+        self.assertEqual([event.user_id for event in sink._buffer], ["U1", "U2"])
+        release.set()
+        sink.close()
+
+    def test_block_gives_up_after_timeout(self):
+        sink, release = self.full_sink(BLOCK)
+        started = time.monotonic()
+        self.assertFalse(sink.emit(user_event("U2")))
+        self.assertGreaterEqual(time.monotonic() - started, 0.01)
+        release.set()
+        sink.close()
+
+    def test_block_never_waits_on_an_event_loop(self):
+        sink, release = self.full_sink(BLOCK)
+        sink.block_timeout = 5
+
+        async def emit_from_handler():
+            started = time.monotonic()
+            return sink.emit(user_event("U2")), time.monotonic() - started
+
+        emitted, waited = asyncio.run(emit_from_handler())
+        self.assertFalse(emitted)
+        self.assertLess(waited, 1)
+        self.assertEqual(sink.snapshot()["dropped"], 1)
+        release.set()
+        sink.close()
+
+    def test_write_errors_are_counted_not_raised(self):
+        writer = ListWriter()
+        writer.write = MagicMock(side_effect=OSError("disk full"))
+        sink = BufferedEventSink(writer, flush_interval=60)
+        sink.emit(user_event())
+        sink.close()
+        self.assertEqual((sink.snapshot()["write_errors"], sink.snapshot()["dropped"]), (1, 1))
+
+
+class TestJSONLEventWriter(unittest.TestCase):
+    def test_writes_json_lines_and_rotates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = JSONLEventWriter(tmp, max_bytes=1)
+            writer.write([user_event("U0"), user_event("U1")])
+            writer.write([user_event("U2")])
+            writer.close()
+            files = sorted(os.listdir(tmp))
+            self.assertEqual(len(files), 2)
+            with open(os.path.join(tmp, files[0]), encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual([row["user_id"] for row in rows], ["U0", "U1"])
+            self.assertEqual(rows[0]["user_agent"], "API")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from langsmith.utils import LangSmithConflictError
+from TARS.metrics.feedback_queue import FeedbackQueue
+
+
+class TestFeedbackQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spool_path = os.path.join(self.tmp.name, "feedback.sqlite")
+        self.client = MagicMock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_queue(self, **kwargs):
+        return FeedbackQueue(self.client, self.spool_path, **kwargs)
+
+    def test_submit_spools_without_calling_langsmith(self):
+        queue = self.make_queue()
+        feedback_id = queue.submit("run-1", "user_satisfaction", 1.0, "great")
+        self.client.create_feedback.assert_not_called()
+        self.assertEqual(queue.depth(), 1)
+
+        # Spooled feedback survives a restart
+        self.assertEqual(self.make_queue().depth(), 1)
+        self.assertEqual(queue.flush(), 1)
+        self.client.create_feedback.assert_called_once_with(
+            run_id="run-1", key="user_satisfaction", score=1.0, comment="great",
+            feedback_id=feedback_id, stop_after_attempt=1,
+        )
+        self.assertEqual(queue.depth(), 0)
+
+    def test_flushes_in_batches(self):
+        queue = self.make_queue(batch_size=2)
+        for n in range(5):
+            queue.submit(f"run-{n}", "user_satisfaction", 1.0)
+        self.assertEqual([queue.flush(), queue.flush(), queue.flush(), queue.flush()], [2, 2, 1, 0])
+        self.assertEqual(queue.snapshot()["sent"], 5)
+
+    def test_failure_backs_off_and_releases_the_rest_of_the_batch(self):
+        queue = self.make_queue(retry_base=10)
+        queue.submit("run-1", "user_satisfaction", 1.0)
+        queue.submit("run-2", "user_satisfaction", 0.0)
+        self.client.create_feedback.side_effect = ConnectionError("LangSmith is down")
+
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(self.client.create_feedback.call_count, 1)
+
+        # The failed item waits out its backoff; the other one is sent next
+        self.client.create_feedback.side_effect = None
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(queue.flush(), 0)
+        with patch("TARS.metrics.feedback_queue.time.time", return_value=time.time() + 11):
+            self.assertEqual(queue.flush(), 1)
+        snapshot = queue.snapshot()
+        self.assertEqual((snapshot["failed"], snapshot["sent"], snapshot["depth"]), (1, 2, 0))
+
+    def test_drops_after_max_attempts(self):
+        queue = self.make_queue(max_attempts=1)
+        queue.submit("run-1", "user_satisfaction", 1.0)
+        self.client.create_feedback.side_effect = ConnectionError("LangSmith is down")
+        queue.flush()
+        self.assertEqual((queue.depth(), queue.snapshot()["dropped"]), (0, 1))
+
+    def test_conflict_means_an_earlier_attempt_was_recorded(self):
+        queue = self.make_queue()
+        queue.submit("run-1", "user_satisfaction", 1.0)
+        self.client.create_feedback.side_effect = LangSmithConflictError("exists")
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(queue.depth(), 0)
+
+    def test_claimed_items_are_not_sent_twice(self):
+        first, second = self.make_queue(), self.make_queue()
+        first.submit("run-1", "user_satisfaction", 1.0)
+        self.assertEqual(len(first._claim()), 1)
+        self.assertEqual(second.flush(), 0)
+
+    def test_worker_sends_in_background_and_stop_flushes(self):
+        queue = self.make_queue(flush_interval=60)
+        queue.start()
+        queue.submit("run-1", "user_satisfaction", 1.0)
+        deadline = time.monotonic() + 5
+        while self.client.create_feedback.call_count < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queue.stop()
+        queue.submit("run-2", "user_satisfaction", 1.0)
+        queue.stop()
+        self.assertEqual(self.client.create_feedback.call_count, 2)
+        self.assertEqual(queue.depth(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from TARS.metrics.run_index import RunIndex
+
+
+class TestRunIndex(unittest.TestCase):
+    def test_latest_run_per_user_and_surface(self):
+        index = RunIndex()
+        index.record("run-1", "alice", "API")
+        index.record("run-2", "alice", "API")
+        index.record("run-3", "alice", "Slack")
+        self.assertEqual(index.latest_for_user("alice", "API").run_id, "run-2")
+        self.assertEqual(index.latest_for_user("alice", "Slack").run_id, "run-3")
+        self.assertIsNone(index.latest_for_user("bob", "API"))
+
+    def test_lookup_by_message_ts(self):
+        index = RunIndex()
+        index.record("run-1", "U1", "Slack", channel="D1")
+        index.attach_message("run-1", "D1", "1700000000.000100")
+        record = index.by_message_ts("1700000000.000100")
+        self.assertEqual((record.run_id, record.channel), ("run-1", "D1"))
+        self.assertIsNone(index.attach_message("unknown", "D1", "1.0"))
+
+    def test_memory_tier_is_bounded(self):
+        index = RunIndex(max_entries=2)
+        for n in range(5):
+            index.record(f"run-{n}", f"user-{n}", "Slack", message_ts=str(n))
+        self.assertEqual(index.stats(), {"cached": 2, "users": 2, "messages": 2})
+        self.assertIsNone(index.get("run-0"))
+        self.assertIsNone(index.by_message_ts("0"))
+        self.assertEqual(index.get("run-4").user_id, "user-4")
+
+    def test_records_expire(self):
+        index = RunIndex(ttl=60)
+        with patch("TARS.metrics.run_index.time.time", return_value=1000.0):
+            index.record("run-1", "alice", "API")
+        with patch("TARS.metrics.run_index.time.time", return_value=1061.0):
+            self.assertIsNone(index.latest_for_user("alice", "API"))
+            self.assertEqual(index.stats()["cached"], 0)
+
+    def test_sqlite_file_is_shared_between_workers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "runs.sqlite")
+            first, second = RunIndex(db_path), RunIndex(db_path)
+            first.record("run-1", "alice", "API")
+            second.record("run-2", "alice", "API")
+            first.record("run-3", "U1", "Slack")
+            second.attach_message("run-3", "D1", "42.0")
+
+            # Each worker sees the runs the other served
+            self.assertEqual(first.latest_for_user("alice", "API").run_id, "run-2")
+            self.assertEqual(first.by_message_ts("42.0").run_id, "run-3")
+            self.assertEqual(second.get("run-1").user_id, "alice")
+
+    def test_sqlite_purges_expired_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = RunIndex(os.path.join(tmp, "runs.sqlite"), ttl=60)
+            with patch("TARS.metrics.run_index.time.time", return_value=1000.0):
+                index.record("old", "alice", "API")
+            with patch("TARS.metrics.run_index.time.time", return_value=2000.0):
+                index.record("new", "bob", "API")
+                rows = index._connection().execute("SELECT run_id FROM runs").fetchall()
+                self.assertEqual(rows, [("new",)])
+                self.assertIsNone(index.latest_for_user("alice", "API"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,18 +1,34 @@
+import asyncio
+import json
 import unittest
 from unittest import mock
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from TARS.surfaces.API.api import app, ChatRequest, FeedbackRequest
 from unittest.mock import patch, MagicMock
+from TARS.graphs.utils.events import AgentEvent
+
+
+async def async_iter(items):
+    for item in items:
+        yield item
+
+
+def agent_events(*answers):
+    return async_iter(
+        [AgentEvent(type="user_echo", content="Hello")]
+        + [AgentEvent(type="final_answer", content=answer) for answer in answers]
+    )
 
 
 class TestAPI(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(app)
 
-    @patch('TARS.surfaces.API.api.run_core_agent')
+    @patch('TARS.surfaces.API.api.arun_core_agent')
     def test_chat_endpoint_success(self, mock_run_core_agent):
         # Mock the core agent to return a simple response
-        mock_run_core_agent.return_value = iter(["Hello! How can I help you?"])
+        mock_run_core_agent.return_value = agent_events("Hello! How can I help you?")
         
         response = self.client.post("/chat", json={"message": "Hello", "user_name": "TestUser"})
         self.assertEqual(response.status_code, 200)
@@ -21,11 +37,19 @@ class TestAPI(unittest.TestCase):
         self.assertIsInstance(response.json()["response"], str)
         self.assertIsInstance(response.json()["run_id"], str)
 
+    @patch('TARS.surfaces.API.api.arun_core_agent')
+    def test_chat_endpoints_reject_unconfigured_models(self, mock_run_core_agent):
+        for path in ("/chat", "/chat/stream"):
+            response = self.client.post(path, json={"message": "Hello", "model_name": "openai:o1-pro"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Model not available", response.json()["detail"])
+        mock_run_core_agent.assert_not_called()
+
     def test_chat_endpoint_invalid_input(self):
         response = self.client.post("/chat", json={})
         self.assertEqual(response.status_code, 422)
 
-    @patch('TARS.surfaces.API.api.run_core_agent')
+    @patch('TARS.surfaces.API.api.arun_core_agent')
     def test_chat_endpoint_error_handling(self, mock_run_core_agent):
         # Mock the core agent to raise an exception
         mock_run_core_agent.side_effect = Exception("Test Error")
@@ -34,27 +58,62 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)  # API returns 200 even on error
         self.assertIn("error", response.json()["response"].lower())
 
-    @patch('TARS.surfaces.API.api.run_core_agent')
+    @patch('TARS.surfaces.API.api.arun_core_agent')
     def test_chat_endpoint_empty_response(self, mock_run_core_agent):
         # Mock the core agent to return empty response
-        mock_run_core_agent.return_value = iter([])
+        mock_run_core_agent.return_value = agent_events()
         
         response = self.client.post("/chat", json={"message": "Hello", "user_name": "TestUser"})
         self.assertEqual(response.status_code, 200)
         self.assertIn("response", response.json())
         self.assertIn("didn't receive a proper response", response.json()["response"])
 
+    @patch('TARS.surfaces.API.api.arun_core_agent')
+    def test_chat_stream_endpoint_ndjson(self, mock_arun_core_agent):
+        mock_arun_core_agent.return_value = async_iter([
+            AgentEvent(type="user_echo", content="Hello"),
+            AgentEvent(type="model_delta", content="Hel"),
+            AgentEvent(type="model_delta", content="lo"),
+            AgentEvent(type="final_answer", content="Hello"),
+        ])
+
+        response = self.client.post("/chat/stream", json={"message": "Hello", "user_name": "TestUser"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+
+        events = [json.loads(line) for line in response.text.splitlines() if line]
+        self.assertEqual(events[0]["type"], "start")
+        self.assertIn("run_id", events[0])
+        self.assertNotIn("user_echo", [e["type"] for e in events])
+        self.assertEqual([e["content"] for e in events if e["type"] == "model_delta"], ["Hel", "lo"])
+        self.assertEqual(events[-2]["type"], "final_answer")
+        self.assertEqual(events[-1]["type"], "end")
+
+    @patch('TARS.surfaces.API.api.arun_core_agent')
+    def test_chat_stream_endpoint_sse(self, mock_arun_core_agent):
+        mock_arun_core_agent.return_value = async_iter([AgentEvent(type="model_delta", content="Hi")])
+
+        response = self.client.post(
+            "/chat/stream",
+            json={"message": "Hello", "user_name": "TestUser"},
+            headers={"Accept": "text/event-stream"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        self.assertIn('event: model_delta\ndata: {"type": "model_delta", "content": "Hi"', response.text)
+
     def test_test_endpoint(self):
         response = self.client.get("/test")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"message": "Hola! Welcome to our API!"})
 
     # Feedback endpoint tests
+    @patch('TARS.surfaces.API.api.feedback_queue', None)
     @patch('TARS.surfaces.API.api.langsmith_client')
     def test_feedback_endpoint_success(self, mock_langsmith_client):
         # First, create a chat to get a run_id
-        with patch('TARS.surfaces.API.api.run_core_agent') as mock_run_core_agent:
-            mock_run_core_agent.return_value = iter(["Test response"])
+        with patch('TARS.surfaces.API.api.arun_core_agent') as mock_run_core_agent:
+            mock_run_core_agent.return_value = agent_events("Test response")
             
             chat_response = self.client.post("/chat", json={
                 "message": "Hello", 
@@ -88,6 +147,27 @@ class TestAPI(unittest.TestCase):
             comment="Great response!"
         )
 
+    @patch('TARS.surfaces.API.api.feedback_queue')
+    @patch('TARS.surfaces.API.api.langsmith_client')
+    def test_feedback_endpoint_queues_feedback(self, mock_langsmith_client, mock_feedback_queue):
+        with patch('TARS.surfaces.API.api.arun_core_agent') as mock_run_core_agent:
+            mock_run_core_agent.return_value = agent_events("Test response")
+            chat_response = self.client.post("/chat", json={"message": "Hello", "user_name": "QueuedUser"})
+        mock_feedback_queue.submit.return_value = "queued_feedback_id"
+
+        feedback_response = self.client.post("/feedback", json={
+            "user_name": "QueuedUser",
+            "satisfaction_score": 1.0,
+            "comment": "Thanks"
+        })
+
+        self.assertEqual(feedback_response.status_code, 200)
+        self.assertEqual(feedback_response.json()["feedback_id"], "queued_feedback_id")
+        mock_feedback_queue.submit.assert_called_once_with(
+            chat_response.json()["run_id"], "user_satisfaction", 1.0, "Thanks"
+        )
+        mock_langsmith_client.create_feedback.assert_not_called()
+
     def test_feedback_endpoint_invalid_score_too_high(self):
         response = self.client.post("/feedback", json={
             "user_name": "TestUser",
@@ -133,11 +213,12 @@ class TestAPI(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 422)
 
+    @patch('TARS.surfaces.API.api.feedback_queue', None)
     @patch('TARS.surfaces.API.api.langsmith_client')
     def test_feedback_endpoint_langsmith_error(self, mock_langsmith_client):
         # First, create a chat to get a run_id
-        with patch('TARS.surfaces.API.api.run_core_agent') as mock_run_core_agent:
-            mock_run_core_agent.return_value = iter(["Test response"])
+        with patch('TARS.surfaces.API.api.arun_core_agent') as mock_run_core_agent:
+            mock_run_core_agent.return_value = agent_events("Test response")
             
             chat_response = self.client.post("/chat", json={
                 "message": "Hello", 
@@ -158,11 +239,12 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(feedback_response.status_code, 500)
         self.assertIn("Failed to submit feedback to LangSmith", feedback_response.json()["detail"])
 
+    @patch('TARS.surfaces.API.api.feedback_queue', None)
     @patch('TARS.surfaces.API.api.langsmith_client')
     def test_feedback_endpoint_without_comment(self, mock_langsmith_client):
         # First, create a chat to get a run_id
-        with patch('TARS.surfaces.API.api.run_core_agent') as mock_run_core_agent:
-            mock_run_core_agent.return_value = iter(["Test response"])
+        with patch('TARS.surfaces.API.api.arun_core_agent') as mock_run_core_agent:
+            mock_run_core_agent.return_value = agent_events("Test response")
             
             chat_response = self.client.post("/chat", json={
                 "message": "Hello", 
@@ -196,8 +278,8 @@ class TestAPI(unittest.TestCase):
     @patch('TARS.surfaces.API.api.langsmith_client')
     def test_feedback_endpoint_boundary_values(self, mock_langsmith_client):
         # First, create a chat to get a run_id
-        with patch('TARS.surfaces.API.api.run_core_agent') as mock_run_core_agent:
-            mock_run_core_agent.return_value = iter(["Test response"])
+        with patch('TARS.surfaces.API.api.arun_core_agent') as mock_run_core_agent:
+            mock_run_core_agent.return_value = agent_events("Test response")
             
             chat_response = self.client.post("/chat", json={
                 "message": "Hello", 
@@ -254,3 +336,54 @@ class TestAPI(unittest.TestCase):
         response = self.client.get("/auth/github/callback", params={"code": "mock_code"})
         self.assertEqual(response.status_code, 500)
         self.assertEqual(response.json(), {"detail": "Failed to validate access token or retrieve user information"})
+
+    def test_healthz(self):
+        response = self.client.get("/healthz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    @patch('TARS.surfaces.API.api.warmup_status')
+    def test_readyz_is_unavailable_until_warm(self, mock_status):
+        mock_status.snapshot.return_value = {"ready": False, "state": "warming"}
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+
+        mock_status.snapshot.return_value = {"ready": True, "state": "ready"}
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["ready"])
+
+    def test_shutdown_waits_for_the_cancelled_warmup(self):
+        finished = []
+
+        async def slow_warm_up():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.05)  # cleanup that outlives the cancel
+                finished.append(True)
+                raise
+
+        with patch('TARS.surfaces.API.api.awarm_up', slow_warm_up), TestClient(app) as client:
+            self.assertEqual(client.get("/healthz").status_code, 200)
+        self.assertEqual(finished, [True])
+
+    @patch('TARS.surfaces.API.api.github_token_verifier')
+    def test_github_chat_rejects_missing_and_invalid_tokens(self, mock_verifier):
+        response = self.client.post("/chat_github", json={"messages": []})
+        self.assertEqual(response.status_code, 400)
+
+        async def reject(token, client):
+            raise HTTPException(status_code=401, detail="Invalid GitHub token")
+
+        mock_verifier.verify.side_effect = reject
+        response = self.client.post(
+            "/chat_github", json={"messages": []}, headers={"X-GitHub-Token": "bad-token"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @patch('TARS.surfaces.API.api.github_token_verifier')
+    def test_github_chat_rejects_invalid_json(self, mock_verifier):
+        response = self.client.post(
+            "/chat_github", content=b"not json", headers={"X-GitHub-Token": "token"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+from TARS.surfaces.API.api import app, handle_github_chat_request
+
+CHUNKS = [b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n', b'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n', b"data: [DONE]\n\n"]
+
+
+class UpstreamStream(httpx.AsyncByteStream):
+    """An SSE body that records how much was read and whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeCopilot:
+    def __init__(self, status_code=200, content_type="text/event-stream"):
+        self.status_code = status_code
+        self.content_type = content_type
+        self.requests = []
+        self.stream = UpstreamStream(CHUNKS)
+
+    def handler(self, request):
+        self.requests.append(request)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "unauthorized"})
+        return httpx.Response(200, headers={"content-type": self.content_type}, stream=self.stream)
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+async def accept(token, client):
+    return "gpsandhu23"
+
+
+@patch('TARS.surfaces.API.api.github_token_verifier')
+class TestCopilotProxy(unittest.TestCase):
+    def setUp(self):
+        self.copilot = FakeCopilot()
+        app.state.http_client = self.copilot.client()
+        self.addCleanup(delattr, app.state, "http_client")
+        self.client = TestClient(app)
+        self.body = {"messages": [{"role": "user", "content": "old"}, {"role": "user", "content": "Hi"}]}
+        self.headers = {"X-GitHub-Token": "token"}
+
+    def test_sse_chunks_are_relayed(self, mock_verifier):
+        mock_verifier.verify.side_effect = accept
+        with self.client.stream("POST", "/chat_github", json=self.body, headers=self.headers) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+            self.assertEqual(b"".join(response.iter_bytes()), b"".join(CHUNKS))
+
+        upstream = self.copilot.requests[0]
+        self.assertEqual(upstream.headers["Authorization"], "Bearer token")
+        self.assertEqual(json.loads(upstream.content)["messages"], [{"role": "user", "content": "Hi"}])
+        self.assertTrue(self.copilot.stream.closed)
+
+    def test_upstream_errors_are_returned_whole(self, mock_verifier):
+        mock_verifier.verify.side_effect = accept
+        self.copilot.status_code = 401
+        response = self.client.post("/chat_github", json=self.body, headers=self.headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "unauthorized"})
+
+    def test_client_disconnect_closes_the_upstream_request(self, mock_verifier):
+        async def run():
+            async with self.copilot.client() as client:
+                response = await handle_github_chat_request(body=self.body, github_token="token", client=client)
+                first = await response.body_iterator.__anext__()
+                # What Starlette does when the client goes away mid-stream
+                await response.body_iterator.aclose()
+                return first
+
+        self.assertEqual(asyncio.run(run()), CHUNKS[0])
+        self.assertEqual(self.copilot.stream.read, 1)
+        self.assertTrue(self.copilot.stream.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+
+import httpx
+from fastapi import HTTPException
+from TARS.surfaces.API.github_auth import GitHubTokenVerifier, token_key
+
+USERS = {"good-token": "gpsandhu23", "other-token": "someone-else"}
+
+
+class FakeGitHub:
+    """A GitHub user API served by httpx.MockTransport, counting requests."""
+
+    def __init__(self, status_code=None, delay=0.0):
+        self.calls = 0
+        self.status_code = status_code
+        self.delay = delay
+
+    async def handler(self, request):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.status_code is not None:
+            return httpx.Response(self.status_code)
+        token = request.headers["Authorization"].split()[-1]
+        if token not in USERS:
+            return httpx.Response(401, json={"message": "Bad credentials"})
+        return httpx.Response(200, json={"login": USERS[token]})
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+class TestGitHubTokenVerifier(unittest.TestCase):
+    def setUp(self):
+        self.github = FakeGitHub()
+        self.verifier = GitHubTokenVerifier(["gpsandhu23"], ttl=60, negative_ttl=60)
+
+    def verify(self, *tokens, github=None):
+        async def run():
+            async with (github or self.github).client() as client:
+                return await asyncio.gather(
+                    *(self.verifier.verify(token, client) for token in tokens), return_exceptions=True
+                )
+
+        return asyncio.run(run())
+
+    def test_valid_tokens_are_verified_once(self):
+        self.assertEqual(self.verify("good-token"), ["gpsandhu23"])
+        self.assertEqual(self.verify("good-token"), ["gpsandhu23"])
+        self.assertEqual(self.github.calls, 1)
+        self.assertEqual(self.verifier.stats(), {"hits": 1, "misses": 1, "cached": 1})
+
+    def test_rejections_are_cached(self):
+        for _ in range(2):
+            invalid, other = self.verify("bad-token", "other-token")
+            self.assertEqual(invalid.status_code, 401)
+            self.assertEqual(other.status_code, 403)
+        self.assertEqual(self.github.calls, 2)
+
+    def test_concurrent_requests_share_one_call(self):
+        github = FakeGitHub(delay=0.05)
+        self.assertEqual(self.verify(*["good-token"] * 5, github=github), ["gpsandhu23"] * 5)
+        self.assertEqual(github.calls, 1)
+
+    def test_github_errors_are_not_cached(self):
+        error, = self.verify("good-token", github=FakeGitHub(status_code=503))
+        self.assertIsInstance(error, HTTPException)
+        self.assertEqual(error.status_code, 502)
+        self.assertEqual(self.verify("good-token"), ["gpsandhu23"])
+
+    def test_entries_expire(self):
+        self.verifier.ttl = 0
+        self.verify("good-token")
+        self.verify("good-token")
+        self.assertEqual(self.github.calls, 2)
+
+    def test_tokens_are_stored_hashed(self):
+        self.verify("good-token")
+        self.assertIn(token_key("good-token"), self.verifier._verdicts)
+        self.assertNotIn("good-token", self.verifier._verdicts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,8 @@
 
 import unittest
 from unittest.mock import patch, MagicMock
+from TARS.graphs.utils.events import AgentEvent
+from TARS.metrics.run_index import RunIndex
 from TARS.surfaces.slack.slack_app import SlackBot
 
 
@@ -80,9 +82,10 @@ class TestSlackBot(unittest.TestCase):
         mock_client = MagicMock()
         mock_client.chat_postMessage.return_value = MagicMock(data={'ts': '123456789.1234'})
         mock_fetch_user_info.return_value = ({'user': {'real_name': 'Test User'}}, 'Test User')
-        # Mock run_core_agent to return a generator that yields content strings
+        # Mock run_core_agent to return a generator that yields typed events
         def mock_generator():
-            yield "Hello! How can I help you?"
+            yield AgentEvent(type="user_echo", content="Test message")
+            yield AgentEvent(type="final_answer", content="Hello! How can I help you?")
         mock_run_core_agent.return_value = mock_generator()
         
         event = {'text': 'Test message', 'user': 'U12345'}
@@ -91,8 +94,8 @@ class TestSlackBot(unittest.TestCase):
         
         response = self.slack_bot.handle_direct_message(event, mock_client, user_id, channel_id)
         
-        self.assertIsInstance(response, str)
-        mock_send_response.assert_called()
+        self.assertEqual(response, "Hello! How can I help you?")
+        mock_send_response.assert_called_once()
 
     @patch('TARS.surfaces.slack.slack_app.SlackBot.handle_direct_message')
     @patch('TARS.surfaces.slack.slack_app.SlackBot.fetch_user_info')
@@ -132,5 +135,20 @@ class TestSlackBot(unittest.TestCase):
         self.slack_bot.send_response(mock_client, channel_id, ts, text)
         mock_client.chat_update.assert_called_once_with(channel=channel_id, ts=ts, text=text)
 
+    def test_reaction_feedback_goes_to_the_run_of_the_reacted_message(self):
+        self.slack_bot.run_index = RunIndex()
+        self.slack_bot.feedback_queue = MagicMock()
+        self.slack_bot.run_index.record("run-1", "U12345", "Slack", channel="D1", message_ts="100.1")
+        self.slack_bot.run_index.record("run-2", "U12345", "Slack", channel="D1", message_ts="200.2")
+
+        event = {'user': 'U12345', 'reaction': '+1', 'item': {'type': 'message', 'channel': 'D1', 'ts': '100.1'}}
+        self.slack_bot.handle_reaction(event, MagicMock())
+        self.assertEqual(self.slack_bot.feedback_queue.submit.call_args.args[0], "run-1")
+
+        # Without a known message, the user's latest run gets the feedback
+        event['item']['ts'] = '999.9'
+        self.slack_bot.handle_reaction(event, MagicMock())
+        self.assertEqual(self.slack_bot.feedback_queue.submit.call_args.args[0], "run-2")
+
 if __name__ == '__main__':
     unittest.main()
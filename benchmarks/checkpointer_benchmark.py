@@ -0,0 +1,108 @@
+"""
+Benchmark checkpoint read/write latency of the TARS conversation checkpointer.
+
+Grows a set of threads to increasing message counts and reports the median
+and p95 latency of put(), hot get_tuple() (served from the LRU tier) and
+cold get_tuple() (served from SQLite).
+
+Usage:
+    python benchmarks/checkpointer_benchmark.py --threads 50 --sizes 10 100 1000 5000
+    python benchmarks/checkpointer_benchmark.py --max-messages 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from TARS.graphs.utils.checkpointer import SQLiteLRUCheckpointer
+
+
+def make_messages(count: int):
+    messages = []
+    for index in range(count):
+        if index % 2 == 0:
+            messages.append(HumanMessage(content=f"Question {index}: what's on my calendar tomorrow?"))
+        else:
+            messages.append(AIMessage(content=f"Answer {index}: " + "lorem ipsum " * 20))
+    return messages
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def ms(samples, pct=None):
+    value = statistics.median(samples) if pct is None else percentile(samples, pct)
+    return f"{value * 1000:8.3f}"
+
+
+def run(threads: int, sizes, max_messages: int, reads: int):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        saver = SQLiteLRUCheckpointer(
+            os.path.join(tmpdir, "checkpoints.sqlite"),
+            hot_threads=threads,
+            max_messages=max_messages,
+        )
+        print(f"threads={threads} max_messages={max_messages or 'unbounded'}")
+        print(f"{'messages':>9} | {'put p50':>8} {'put p95':>8} | {'hot p50':>8} {'hot p95':>8} | {'cold p50':>8} {'cold p95':>8}  (ms)")
+
+        for step, size in enumerate(sizes, start=1):
+            messages = make_messages(size)
+            put_samples, hot_samples, cold_samples = [], [], []
+            for thread in range(threads):
+                thread_id = f"thread-{thread}"
+                latest = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+                configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+                if latest:
+                    configurable["checkpoint_id"] = latest.config["configurable"]["checkpoint_id"]
+                checkpoint = create_checkpoint(empty_checkpoint(), None, step)
+                checkpoint["channel_values"] = {"messages": messages}
+
+                started = time.perf_counter()
+                saver.put({"configurable": configurable}, checkpoint, {"step": step}, {})
+                put_samples.append(time.perf_counter() - started)
+
+            configs = [{"configurable": {"thread_id": f"thread-{thread}"}} for thread in range(threads)]
+            for _ in range(reads):
+                for config in configs:
+                    saver.get_tuple(config)  # make sure the thread is in the hot tier
+                    started = time.perf_counter()
+                    saver.get_tuple(config)
+                    hot_samples.append(time.perf_counter() - started)
+
+                for config in configs:
+                    saver._hot.clear()
+                    started = time.perf_counter()
+                    saver.get_tuple(config)
+                    cold_samples.append(time.perf_counter() - started)
+
+            print(
+                f"{size:>9} | {ms(put_samples)} {ms(put_samples, 95)} | "
+                f"{ms(hot_samples)} {ms(hot_samples, 95)} | {ms(cold_samples)} {ms(cold_samples, 95)}"
+            )
+        size = sum(
+            os.path.getsize(saver.db_path + suffix)
+            for suffix in ("", "-wal")
+            if os.path.exists(saver.db_path + suffix)
+        )
+        print(f"database size (incl. WAL): {size / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 2500, 5000])
+    parser.add_argument("--max-messages", type=int, default=0, help="per-thread message cap (0 = unbounded)")
+    parser.add_argument("--reads", type=int, default=3, help="read passes per size")
+    args = parser.parse_args()
+    run(args.threads, args.sizes, args.max_messages, args.reads)
@@ -0,0 +1,135 @@
+"""
+Benchmark cold-start import time and memory of each TARS entry point.
+
+Every sample imports the entry point in a fresh interpreter under
+`python -X importtime`, and records the wall-clock import time and the peak
+RSS of that process. The median over --repeat samples is reported, with the
+modules that spent the most time importing (self time, excluding children).
+
+With --check, the medians are compared against the per-entry-point budgets
+in a JSON file and the script exits non-zero if any budget is exceeded, so CI
+catches import-time regressions.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --entry core_agent --top 20
+    python benchmarks/startup_benchmark.py --repeat 5 --check benchmarks/startup_thresholds.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    "tools": "TARS.graphs.utils.tools",
+    "core_agent": "TARS.graphs.core_agent",
+    "api": "TARS.surfaces.API.api",
+    "slack": "TARS.surfaces.slack.slack_app",
+}
+
+# Runs in the child: time the import and report peak RSS in MB
+CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_mb}}))
+"""
+
+# Clients constructed at import only need a key to be present, not a valid one
+DUMMY_ENV = {
+    "OPENAI_API_KEY": "benchmark",
+    "ANTHROPIC_API_KEY": "benchmark",
+    "GOOGLE_API_KEY": "benchmark",
+    "TAVILY_API_KEY": "benchmark",
+    "SLACK_BOT_TOKEN": "xoxb-benchmark",
+    "SLACK_APP_TOKEN": "xapp-benchmark",
+    "LANGCHAIN_TRACING_V2": "false",
+}
+
+
+def parse_importtime(stderr: str):
+    """Return (module, self microseconds) pairs from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us)))
+    return modules
+
+
+def sample(module: str, data_dir: str):
+    env = {**DUMMY_ENV, **os.environ, "PYTHONPATH": str(PROJECT_ROOT), "TARS_DATA_DIR": data_dir}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(module=module)],
+        capture_output=True,
+        text=True,
+        cwd=data_dir,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    measurement["modules"] = parse_importtime(result.stderr)
+    return measurement
+
+
+def run(entries, repeat: int, top: int):
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name in entries:
+            samples = [sample(ENTRY_POINTS[name], data_dir) for _ in range(repeat)]
+            seconds = statistics.median(s["seconds"] for s in samples)
+            rss_mb = statistics.median(s["rss_mb"] for s in samples)
+            slowest = sorted(samples[-1]["modules"], key=lambda item: item[1], reverse=True)[:top]
+            results[name] = {"seconds": round(seconds, 3), "rss_mb": round(rss_mb, 1)}
+
+            print(f"{name:<12} {ENTRY_POINTS[name]:<32} {seconds * 1000:8.0f} ms {rss_mb:8.1f} MB")
+            for module, self_us in slowest:
+                print(f"{'':<12}   {self_us / 1000:8.1f} ms  {module}")
+    return results
+
+
+def check(results, thresholds_path: str) -> bool:
+    with open(thresholds_path) as thresholds_file:
+        thresholds = json.load(thresholds_file)
+    ok = True
+    for name, measured in results.items():
+        budget = thresholds.get(name)
+        if budget is None:
+            continue
+        for metric in ("seconds", "rss_mb"):
+            limit = budget.get(f"max_{metric}")
+            if limit is not None and measured[metric] > limit:
+                print(f"FAIL {name}: {metric} {measured[metric]} exceeds budget {limit}")
+                ok = False
+    if ok:
+        print("All entry points within their startup budgets")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entry", nargs="+", choices=sorted(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to list per entry point")
+    parser.add_argument("--json", metavar="PATH", help="write the medians to a JSON file")
+    parser.add_argument("--check", metavar="THRESHOLDS", help="fail if a median exceeds its budget")
+    args = parser.parse_args()
+
+    results = run(args.entry, args.repeat, args.top)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.check and not check(results, args.check):
+        sys.exit(1)
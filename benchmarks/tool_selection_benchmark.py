@@ -0,0 +1,171 @@
+"""
+Benchmark prompt tokens and latency with every tool bound versus the
+relevance-selected tool subset.
+
+For a set of representative user messages, reports the prompt tokens of the
+messages plus the bound tool schemas, the time spent selecting tools, and the
+time to bind tools to a model the first time versus from the registry cache.
+The catalogue is the agent's tools, the custom Gmail/Calendar/Slack/image
+tools (or stand-ins with the same schemas), and optional filler tools standing in for future
+integrations. With --live, each message is also sent to the model both ways
+and the provider-reported prompt tokens and latency are compared.
+
+Usage:
+    python benchmarks/tool_selection_benchmark.py --top-k 3
+    python benchmarks/tool_selection_benchmark.py --extra-tools 20
+    python benchmarks/tool_selection_benchmark.py --live openai:gpt-4o-mini
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Model clients need a key to be constructed, even when only binding tools
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from TARS.config.config import tool_settings
+from TARS.graphs.utils.context import count_messages_tokens, count_text_tokens
+from TARS.graphs.utils.models import ModelRegistry
+from TARS.graphs.utils.tool_selector import ToolSelector
+from TARS.graphs.utils.tools import tool_registry
+
+MESSAGES = [
+    "What's the latest news about the Mars mission?",
+    "Find me a YouTube video on sourdough baking",
+    "Do I have any unread emails from Alice?",
+    "What meetings are on my calendar tomorrow?",
+    "Any Slack DMs in the last 3 hours?",
+    "Describe the picture I just sent you",
+    "How many letters are in the word antidisestablishmentarianism?",
+]
+
+
+def handle_all_unread_gmail() -> list:
+    """Fetches all unread emails from Gmail, classifies them with an AI model and marks them as read."""
+
+
+def fetch_emails_by_sender_name(sender_name: str) -> list:
+    """Fetches emails from a specific sender by their name."""
+
+
+def read_image_tool(image_path: str, prompt: str) -> str:
+    """Reads an image from a URL or Slack file link and answers a prompt about it."""
+
+
+def fetch_dms_last_x_hours(hours: int) -> list:
+    """Fetches the direct messages sent to the user on Slack in the last x hours."""
+
+
+def fetch_calendar_events_for_x_days(days: int) -> list:
+    """Fetches the events on the user's Google Calendar for the next x days."""
+
+
+def get_word_length(word: str) -> int:
+    """Calculates and returns the length of a given word."""
+
+
+# Same names and signatures as the custom tools, used when those cannot be imported
+STAND_INS = [
+    handle_all_unread_gmail,
+    fetch_emails_by_sender_name,
+    read_image_tool,
+    fetch_dms_last_x_hours,
+    fetch_calendar_events_for_x_days,
+    get_word_length,
+]
+
+
+def load_catalogue(extra_tools: int):
+    catalogue = tool_registry.enabled_tools()
+    try:
+        catalogue += [tool_registry.get(func.__name__) for func in STAND_INS]
+    except Exception as e:
+        print(f"custom tools unavailable ({type(e).__name__}); using stand-ins with the same schemas")
+        catalogue += [StructuredTool.from_function(func) for func in STAND_INS]
+
+    def filler(index):
+        def run(query: str, limit: int = 10) -> str:
+            return query
+
+        return StructuredTool.from_function(
+            run,
+            name=f"integration_{index}",
+            description=f"Query integration {index} for records matching a query, "
+            f"returning at most limit results with their metadata.",
+        )
+
+    return catalogue + [filler(index) for index in range(extra_tools)]
+
+
+def schema_tokens(tools):
+    return sum(count_text_tokens(json.dumps(convert_to_openai_tool(tool))) for tool in tools)
+
+
+def timed(func, *args, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def run(top_k: int, extra_tools: int, live: str):
+    catalogue = load_catalogue(extra_tools)
+    selector = ToolSelector(
+        catalogue, top_k=top_k, keywords=tool_registry.keywords(), costs=tool_registry.costs()
+    )
+    registry = ModelRegistry()
+    model_name = live or "openai:gpt-4o-mini"
+    all_schema_tokens = schema_tokens(catalogue)
+
+    print(f"tools={len(catalogue)} top_k={top_k} all-tool schemas={all_schema_tokens} tokens")
+    print(f"{'message':<48} | {'all':>6} {'subset':>6} {'saved':>6} | {'select':>8} {'bind':>8} {'cached':>8}  (tokens, ms)")
+
+    totals = {"all": 0, "subset": 0}
+    for text in MESSAGES:
+        messages = [SystemMessage(content="You are TARS."), HumanMessage(content=text)]
+        message_tokens = count_messages_tokens(messages)
+        selected, select_seconds = timed(selector.select, messages, repeat=50)
+        _, bind_seconds = timed(registry.get_bound, model_name, selected)
+        _, cached_seconds = timed(registry.get_bound, model_name, selected, repeat=50)
+
+        before = message_tokens + all_schema_tokens
+        after = message_tokens + schema_tokens(selected)
+        totals["all"] += before
+        totals["subset"] += after
+        print(
+            f"{text[:48]:<48} | {before:>6} {after:>6} {before - after:>6} | "
+            f"{select_seconds * 1000:8.3f} {bind_seconds * 1000:8.3f} {cached_seconds * 1000:8.3f}"
+        )
+        print(f"{'':<48}   bound: {', '.join(tool.name for tool in selected)}")
+
+        if live:
+            for label, bound_tools in (("all", catalogue), ("subset", selected)):
+                model = registry.get_bound(model_name, bound_tools)
+                response, seconds = timed(model.invoke, messages)
+                usage = response.usage_metadata or {}
+                print(f"{'':<48}   live {label:>6}: {usage.get('input_tokens')} prompt tokens, {seconds * 1000:.0f} ms")
+
+    saved = totals["all"] - totals["subset"]
+    print(f"total prompt tokens: {totals['all']} -> {totals['subset']} ({saved / totals['all']:.0%} saved)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=tool_settings.tool_selection_top_k)
+    parser.add_argument("--extra-tools", type=int, default=10, help="filler tools standing in for future integrations")
+    parser.add_argument("--live", metavar="MODEL", help='also call the model, e.g. "openai:gpt-4o-mini"')
+    args = parser.parse_args()
+    run(args.top_k, args.extra_tools, args.live)